@@ -0,0 +1,228 @@
+import os
+import json
+import hashlib
+import logging
+import threading
+from importlib import metadata
+from typing import Optional, Dict, Any, List, Tuple
+from instrumentation import get_default_tracer
+
+# Configure logging
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+logger = logging.getLogger(__name__)
+
+DEFAULT_CACHE_DIR = os.path.join(os.path.expanduser("~"), ".cache", "recipe_finder", "artifacts")
+
+# Source files whose contents define how a recipe renders; editing any of them changes every key
+RENDERER_SOURCES = ["para2pdf.py", "nutrition.py"]
+RENDERER_PACKAGES = ["reportlab", "matplotlib"]
+
+_renderer_version: Optional[str] = None
+
+
+def renderer_version() -> str:
+    """
+    Fingerprint the rendering code and libraries.
+
+    Hashes the source of the renderer modules (layout, styles and chart
+    code) and the installed ReportLab and matplotlib versions, so artifacts
+    rendered by older code are never served after an upgrade or a style
+    change. The files are read, not imported, so this stays cheap.
+
+    Returns:
+        str: A short hex digest.
+    """
+    global _renderer_version
+    if _renderer_version is None:
+        digest = hashlib.sha256()
+        here = os.path.dirname(os.path.abspath(__file__))
+        for name in RENDERER_SOURCES:
+            with open(os.path.join(here, name), "rb") as f:
+                digest.update(f.read())
+        for package in RENDERER_PACKAGES:
+            try:
+                digest.update(f"{package}=={metadata.version(package)}".encode("utf-8"))
+            except metadata.PackageNotFoundError:
+                digest.update(f"{package}==missing".encode("utf-8"))
+        _renderer_version = digest.hexdigest()[:16]
+    return _renderer_version
+
+
+def artifact_key(kind: str, content: Any, **options: Any) -> str:
+    """
+    Build the content address of a rendered artifact.
+
+    Args:
+        kind (str): Artifact type, e.g. "pdf" or "chart".
+        content: The JSON-serializable input the artifact is rendered from.
+        **options: Render options that change the output, e.g. ``chart_backend``.
+
+    Returns:
+        str: A sha256 hex digest of the canonicalized input and the renderer version.
+    """
+    payload = json.dumps(
+        {"kind": kind, "content": content, "options": options, "renderer": renderer_version()},
+        sort_keys=True,
+        separators=(",", ":"),
+        ensure_ascii=False,
+        default=str,
+    )
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+class ArtifactCache:
+    """
+    Content-addressed on-disk cache for rendered PDFs and charts.
+
+    Each artifact is one file named after its key, written atomically so
+    concurrent processes can share the directory. Reads bump the file's
+    modification time, and once the directory exceeds ``max_bytes`` the
+    least recently used files are deleted.
+    """
+
+    def __init__(self, directory: str = DEFAULT_CACHE_DIR, max_bytes: int = 512 * 1024 * 1024):
+        """
+        Args:
+            directory (str): Directory holding the cached artifacts.
+            max_bytes (int): Upper bound on the total size of cached artifacts.
+        """
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        os.makedirs(directory, exist_ok=True)
+        self._size = sum(size for _, size, _ in self._entries())
+
+    def _path(self, key: str, extension: str) -> str:
+        return os.path.join(self.directory, key[:2], f"{key}.{extension}")
+
+    def _entries(self) -> List[Tuple[str, int, float]]:
+        """List (path, size, mtime) for every stored artifact."""
+        entries = []
+        for root, _, files in os.walk(self.directory):
+            for name in files:
+                if name.endswith(".tmp"):
+                    continue
+                path = os.path.join(root, name)
+                try:
+                    stat = os.stat(path)
+                except FileNotFoundError:
+                    continue
+                entries.append((path, stat.st_size, stat.st_mtime))
+        return entries
+
+    def get(self, key: str, extension: str) -> Optional[bytes]:
+        """
+        Look up a cached artifact.
+
+        Args:
+            key (str): The key returned by ``artifact_key``.
+            extension (str): File extension the artifact was stored with, e.g. "pdf".
+
+        Returns:
+            Optional[bytes]: The artifact, or None on a miss.
+        """
+        path = self._path(key, extension)
+        try:
+            with open(path, "rb") as f:
+                data = f.read()
+            os.utime(path)
+        except FileNotFoundError:
+            with self._lock:
+                self.misses += 1
+            get_default_tracer().record_cache("artifact", False)
+            return None
+        with self._lock:
+            self.hits += 1
+        get_default_tracer().record_cache("artifact", True)
+        return data
+
+    def set(self, key: str, extension: str, data: bytes) -> None:
+        """
+        Store an artifact and evict old ones if the cache is over budget.
+
+        Args:
+            key (str): The key returned by ``artifact_key``.
+            extension (str): File extension to store the artifact with.
+            data (bytes): The rendered artifact.
+        """
+        path = self._path(key, extension)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        with open(tmp_path, "wb") as f:
+            f.write(data)
+        with self._lock:
+            try:
+                # Overwriting a key replaces its old artifact rather than adding to it
+                old_size = os.path.getsize(path)
+            except OSError:
+                old_size = 0
+            os.replace(tmp_path, path)
+            self._size += len(data) - old_size
+            over_budget = self._size > self.max_bytes
+        if over_budget:
+            self._evict()
+
+    def _evict(self) -> None:
+        """Delete least recently used artifacts until under ``max_bytes``."""
+        with self._lock:
+            # Rescan, other processes may have added or removed files
+            entries = sorted(self._entries(), key=lambda entry: entry[2])
+            total = sum(size for _, size, _ in entries)
+            for path, size, _ in entries:
+                if total <= self.max_bytes:
+                    break
+                try:
+                    os.remove(path)
+                except FileNotFoundError:
+                    pass
+                total -= size
+            self._size = total
+
+    def clear(self) -> None:
+        """Remove every cached artifact."""
+        with self._lock:
+            for path, _, _ in self._entries():
+                try:
+                    os.remove(path)
+                except FileNotFoundError:
+                    pass
+            self._size = 0
+
+    def stats(self) -> Dict[str, int]:
+        """
+        Report cache metrics.
+
+        Returns:
+            dict: Hit and miss counters for this process plus entry count and stored bytes.
+        """
+        entries = self._entries()
+        with self._lock:
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "entries": len(entries),
+                "bytes": sum(size for _, size, _ in entries),
+            }
+
+
+_default_cache: Optional[ArtifactCache] = None
+_default_cache_lock = threading.Lock()
+
+
+def get_default_artifact_cache() -> ArtifactCache:
+    """
+    Return the process-wide artifact cache, creating it on first use.
+
+    The location can be overridden with the ``ARTIFACT_CACHE_DIR`` env variable.
+
+    Returns:
+        ArtifactCache: The shared cache.
+    """
+    global _default_cache
+    if _default_cache is None:
+        with _default_cache_lock:
+            if _default_cache is None:
+                _default_cache = ArtifactCache(os.getenv("ARTIFACT_CACHE_DIR", DEFAULT_CACHE_DIR))
+    return _default_cache
@@ -0,0 +1,244 @@
+import asyncio
+import logging
+import httpx
+from typing import Optional, List, Dict, Any, Callable, Union
+from concurrent.futures import TimeoutError as FutureTimeout
+from prompt import (
+    extract_user_prompt,
+    extract_system_prompt,
+    recipe_user_prompt,
+    recipe_system_prompt,
+)
+from utility import get_completion_async, completion_request, xml_extract_ingredients, parse_recipe
+from http_client import AsyncSpoonacularClient, get_default_async_client
+from result_cache import ResultCache, normalize_query
+from bulk_resolver import BulkInfoResolver
+from recipe_index import RecipeIndex
+from ingredient_extractor import IngredientExtractor
+from recipe_finder import RecipeFinder
+from instrumentation import get_default_tracer, traced
+from completion_cache import completion_key
+from single_flight import acoalesce
+from spoonacular_quota import QuotaExhausted
+from cassette import CassetteMiss
+from deadline import Deadline, DeadlineExceeded, deadline_scope, run_stage, check_deadline, deadline_timeout
+
+# Configure logging
+logging.basicConfig(
+    level=logging.INFO,
+    format='%(asctime)s - %(levelname)s - %(message)s'
+)
+logger = logging.getLogger(__name__)
+
+
+class AsyncRecipeFinder(RecipeFinder):
+    """
+    Asyncio version of ``RecipeFinder``.
+
+    Runs the same stages and returns the same recipe dict, but every network
+    call is awaited so one process can serve many queries concurrently.
+
+    Usage:
+        recipe_data = await AsyncRecipeFinder("chicken, rice, garlic")()
+    """
+
+    def __init__(
+        self,
+        user_query: str,
+        client: Optional[AsyncSpoonacularClient] = None,
+        cache: Optional[ResultCache] = None,
+        info_resolver: Optional[BulkInfoResolver] = None,
+        recipe_index: Optional[RecipeIndex] = None,
+        extractor: Optional[IngredientExtractor] = None,
+        on_section: Optional[Callable[[str, Any], None]] = None,
+        deadline: Optional[Union[float, Deadline]] = None,
+    ):
+        super().__init__(
+            user_query,
+            client=client,
+            cache=cache,
+            info_resolver=info_resolver,
+            recipe_index=recipe_index,
+            extractor=extractor,
+            on_section=on_section,
+            deadline=deadline,
+        )
+
+    def _default_client(self) -> None:
+        # The shared async client is bound to the running loop, so resolve it on first call
+        return None
+
+    @traced("recipe")
+    async def __call__(self) -> Optional[Dict[str, Any]]:
+        get_default_tracer().current_span().set("query", self.user_query)
+        if self.client is None:
+            self.client = get_default_async_client()
+
+        with deadline_scope(self._request_deadline()):
+            try:
+                return await self._run()
+            except DeadlineExceeded as e:
+                get_default_tracer().current_span().set("deadline_exceeded", e.stage)
+                logger.error(f"{e}, falling back to a partial recipe.")
+                return self.partial_result()
+
+    async def _run(self) -> Optional[Dict[str, Any]]:
+        cache_key = normalize_query(self.user_query)
+        if self.load_cached(cache_key):
+            return self.recipe_data
+
+        await run_stage("extraction", self.extract_ingredients)
+        recipe = await run_stage("search", self.extract_recipe)
+        if not recipe:
+            logger.error("No recipe found.")
+            return None
+
+        self.recipe_id = recipe[0].get("id")
+        self.title = recipe[0].get("title")
+        self.image = recipe[0].get("image")
+
+        recipe_info = self.recipe_info = await run_stage("info", self.extract_recipe_info)
+        if not recipe_info:
+            logger.error("Failed to fetch recipe info.")
+            return None
+
+        self.ingredients_info = self.get_ingredients_info(recipe)
+        self.nutrients = self.extract_recipe_nutrients(recipe_info)
+        self.diet = self.get_diet_info(recipe_info)
+
+        summary = recipe_info.get("summary", "")
+        instructions = recipe_info.get("instructions", "")
+        self.recipe_data = parse_recipe(await run_stage(
+            "rewrite", lambda: self.generate_full_instruction(summary, self.ingredients_info, instructions)
+        ))
+
+        self.enrich_recipe()
+
+        if self.recipe_data:
+            self.cache.set(cache_key, self.recipe_data)
+        return self.recipe_data
+
+    @traced("extract_ingredients")
+    async def extract_ingredients(self) -> None:
+        """
+        Extract ingredients from the user query.
+
+        """
+        logger.info("Extracting ingredients from the user query.")
+        if self.extract_ingredients_locally():
+            return
+        user_prompt = extract_user_prompt.format(user_query=self.user_query)
+        messages = self.construct_messages(extract_system_prompt, user_prompt)
+        try:
+            self.ingredients = await acoalesce(
+                "extraction", normalize_query(self.user_query), lambda: get_completion_async(messages, stage="extraction")
+            )
+            logger.info("Successfully extracted ingredients.")
+        except DeadlineExceeded:
+            raise
+        except Exception as e:
+            check_deadline()
+            logger.error(f"Error extracting ingredients: {e}")
+
+    @traced("extract_recipe")
+    async def extract_recipe(self) -> Optional[List[Dict[str, Any]]]:
+        """
+        Fetch recipe based on extracted ingredients.
+
+        Returns:
+            list: A list of dictionaries representing the recipe.
+        """
+        logger.info("Fetching recipe based on extracted ingredients.")
+        if not self.ingredients:
+            logger.error("Ingredients are missing.")
+            return None
+
+        ingredients = xml_extract_ingredients(self.ingredients)
+
+        if self.recipe_index is not None:
+            local = self.recipe_index.find_by_ingredients(ingredients, number=1)
+            if local:
+                logger.info("Found recipe in the local index.")
+                return local
+            logger.info("No local match, falling back to Spoonacular.")
+
+        try:
+            return await acoalesce(
+                "search", normalize_query(ingredients),
+                lambda: self.client.find_by_ingredients(ingredients, number=1, ranking=1),
+            )
+        except (httpx.HTTPError, QuotaExhausted, CassetteMiss) as e:
+            check_deadline()
+            logger.error(f"Failed to fetch recipe: {e}")
+            return None
+
+    @traced("extract_recipe_info")
+    async def extract_recipe_info(self) -> Optional[Dict[str, Any]]:
+        """
+        Fetch detailed recipe information.
+
+        Returns:
+            dict: A dictionary representing the detailed recipe information.
+        """
+        logger.info("Fetching detailed recipe information.")
+        if not self.recipe_id:
+            logger.error("Recipe ID is missing.")
+            return None
+
+        if self.recipe_index is not None:
+            local = self.recipe_index.get_information(self.recipe_id)
+            if local is not None:
+                return local
+
+        import requests
+
+        try:
+            if self.info_resolver is not None:
+                # The resolver batches lookups on its own threads, so wait for it off the event loop
+                return await acoalesce(
+                    "info", self.recipe_id,
+                    lambda: asyncio.to_thread(self.info_resolver.resolve, self.recipe_id, deadline_timeout()),
+                )
+            return await acoalesce(
+                "info", self.recipe_id, lambda: self.client.get_recipe_information(self.recipe_id, include_nutrition=True)
+            )
+        except DeadlineExceeded:
+            raise
+        except (httpx.HTTPError, requests.RequestException, QuotaExhausted, CassetteMiss, FutureTimeout) as e:
+            check_deadline()
+            logger.error(f"Failed to fetch recipe info: {e}")
+            return None
+
+    @traced("generate_full_instruction")
+    async def generate_full_instruction(self, summary: str, ingredients: Dict[str, List[str]], instructions: str) -> str:
+        """
+        Generate complete recipe instructions.
+
+        Args:
+            summary (str): a summary of the instructions
+            ingredients (dict): ingredients
+            instructions (str): instructions
+
+        Returns:
+            str: A string representing the complete recipe instructions.
+
+        """
+        logger.info("Generating complete recipe instructions.")
+        user_prompt = recipe_user_prompt.format(
+            INSERT_SUMMARY=summary,
+            INSERT_INGREDIENTS=ingredients["usedIngredients"],
+            INSERT_ORIGINAL_INSTRUCTIONS=instructions,
+        )
+        messages = self.construct_messages(recipe_system_prompt, user_prompt)
+        try:
+            if self.on_section is not None:
+                # The completion stream is synchronous, so it runs, and calls on_section, on a worker thread
+                return await asyncio.to_thread(self.stream_full_instruction, messages)
+            prompt_hash = completion_key(*completion_request(messages, "rewrite"))
+            return await acoalesce("rewrite", prompt_hash, lambda: get_completion_async(messages, stage="rewrite"))
+        except DeadlineExceeded:
+            raise
+        except Exception as e:
+            check_deadline()
+            logger.error(f"Error generating instructions: {e}")
+            return ""
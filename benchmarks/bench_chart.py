@@ -0,0 +1,74 @@
+"""
+Benchmark the nutrition chart backends used by para2pdf.create_recipe_pdf.
+
+Renders the same recipe with the native vector chart and with the
+300-dpi matplotlib PNG, and reports render time and PDF size for each.
+
+Usage:
+    python benchmarks/bench_chart.py [--repeat 10]
+"""
+import os
+import sys
+import logging
+import argparse
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ["ARTIFACT_CACHE_DISABLED"] = "1"  # measure rendering, not cache hits
+
+from para2pdf import create_recipe_pdf  # noqa: E402
+
+SAMPLE_NUTRIENTS = [
+    {"name": "Calories", "amount": 584.0, "unit": "kcal", "percentOfDailyNeeds": 29.2},
+    {"name": "Protein", "amount": 38.0, "unit": "g", "percentOfDailyNeeds": 76.0},
+    {"name": "Iron", "amount": 4.1, "unit": "mg", "percentOfDailyNeeds": 22.8},
+    {"name": "Vitamin A", "amount": 2400.0, "unit": "IU", "percentOfDailyNeeds": 48.0},
+    {"name": "Vitamin C", "amount": 31.0, "unit": "mg", "percentOfDailyNeeds": 37.6},
+    {"name": "Vitamin B6", "amount": 0.9, "unit": "mg", "percentOfDailyNeeds": 45.0},
+    {"name": "Potassium", "amount": 910.0, "unit": "mg", "percentOfDailyNeeds": 26.0},
+    {"name": "Zinc", "amount": 1.0, "unit": "mg", "percentOfDailyNeeds": 6.7},
+]
+
+SAMPLE_RECIPE = {
+    "title": "Garlic Chicken and Rice",
+    "summary": "A comforting one-pan dinner of golden chicken thighs and fluffy garlic rice.",
+    "ingredients": {
+        "Original Ingredients": ["1 lb Chicken thighs, boneless", "1 cup Rice, rinsed", "4 cloves Garlic, minced"],
+        "Added Ingredients": ["2 cups Chicken broth, low sodium", "1 tbsp Butter, "],
+    },
+    "instructions": ["Season and sear the chicken.", "Toast the rice with garlic.", "Simmer with broth for 18 minutes."],
+    "cooking_notes": ["Rest 5 minutes before serving."],
+    "diet": {"Dietary Suitability": {"Vegetarian": "No", "Gluten-Free": "Yes"}},
+    "nutrients": SAMPLE_NUTRIENTS,
+}
+
+
+def measure(backend: str, repeat: int, directory: str):
+    """Return the mean render time in seconds and the PDF size in bytes."""
+    path = os.path.join(directory, f"{backend}.pdf")
+    create_recipe_pdf(SAMPLE_RECIPE, path, chart_backend=backend)  # warm up imports and fonts
+    started = time.perf_counter()
+    for _ in range(repeat):
+        create_recipe_pdf(SAMPLE_RECIPE, path, chart_backend=backend)
+    elapsed = (time.perf_counter() - started) / repeat
+    return elapsed, os.path.getsize(path)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--repeat", type=int, default=10)
+    args = parser.parse_args()
+    logging.disable(logging.CRITICAL)
+
+    with tempfile.TemporaryDirectory() as directory:
+        results = {backend: measure(backend, args.repeat, directory) for backend in ("vector", "raster")}
+
+    for backend, (seconds, size) in results.items():
+        print(f"{backend:>6}: {seconds * 1000:8.1f} ms/render  {size / 1024:8.1f} KiB")
+    vector, raster = results["vector"], results["raster"]
+    print(f"vector is {raster[0] / vector[0]:.1f}x faster and {raster[1] / vector[1]:.1f}x smaller")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,102 @@
+"""
+Microbenchmark for utility.parse_recipe on large generated recipes.
+
+Compares the expat-based parser against the previous BeautifulSoup
+implementation (when bs4 and lxml are installed) and checks that both
+return the same dict.
+
+Usage:
+    python benchmarks/bench_parser.py [--sections 4] [--ingredients 25] [--steps 60] [--repeat 50]
+"""
+import os
+import sys
+import logging
+import argparse
+import timeit
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from utility import parse_recipe  # noqa: E402
+
+
+def generate_recipe_xml(sections: int, ingredients: int, steps: int, notes: int = 10) -> str:
+    """Build a recipe document in the shape the rewrite prompt asks the model for."""
+    parts = ['<?xml version="1.0" encoding="UTF-8"?>\n<recipe>\n<recipe-name>Benchmark Stew</recipe-name>\n']
+    parts.append("<summary>A hearty stew &amp; a long summary. " + "Rich and savory. " * 40 + "</summary>\n<ingredients>\n")
+    for s in range(sections):
+        parts.append(f'<section name="Section {s}">\n')
+        for i in range(ingredients):
+            parts.append(
+                f"<ingredient><name>Ingredient {s}-{i}</name><quantity>{i + 1} cups</quantity>"
+                f"<notes>Finely chopped (or substitute {i})</notes></ingredient>\n"
+            )
+        parts.append("</section>\n")
+    parts.append("</ingredients>\n<instructions>\n")
+    for i in range(steps):
+        parts.append(f"<step><instruction>Step {i}: stir gently for {i} minutes until fragrant and golden.</instruction></step>\n")
+    parts.append("</instructions>\n<cooking-notes>\n")
+    for i in range(notes):
+        parts.append(f"<note>Tip {i}: rest the stew before serving.</note>\n")
+    parts.append("</cooking-notes>\n</recipe>\n")
+    return "".join(parts)
+
+
+def parse_recipe_bs4(xml_content: str) -> dict:
+    """The previous BeautifulSoup-based implementation, kept for comparison."""
+    from bs4 import BeautifulSoup
+
+    soup = BeautifulSoup(xml_content, 'xml')
+    summary = soup.find('summary').text.strip() if soup.find('summary') else 'No summary provided'
+    ingredients = {}
+    for section in soup.find_all('section'):
+        section_name = section.get('name', 'Unnamed Section')
+        ingredients[section_name] = []
+        for ingredient in section.find_all('ingredient'):
+            name = ingredient.find('name').text.strip() if ingredient.find('name') else "Unknown"
+            quantity = ingredient.find('quantity').text.strip() if ingredient.find('quantity') else "Unknown"
+            notes = ingredient.find('notes').text.strip() if ingredient.find('notes') else ""
+            ingredients[section_name].append(f"{quantity} {name}, {notes}")
+    instructions = []
+    for step in soup.find_all('step'):
+        instruction_text = step.find('instruction').text.strip() if step.find('instruction') else ''
+        if instruction_text:
+            instructions.append(instruction_text)
+    cooking_notes = []
+    for note in soup.find_all('note'):
+        note_text = note.text.strip() if note.text else ''
+        if note_text:
+            cooking_notes.append(note_text)
+    return {'summary': summary, 'ingredients': ingredients, 'instructions': instructions, 'cooking_notes': cooking_notes}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--sections", type=int, default=4)
+    parser.add_argument("--ingredients", type=int, default=25)
+    parser.add_argument("--steps", type=int, default=60)
+    parser.add_argument("--repeat", type=int, default=50)
+    args = parser.parse_args()
+    logging.disable(logging.CRITICAL)
+
+    xml = generate_recipe_xml(args.sections, args.ingredients, args.steps)
+    malformed = xml.replace("&amp;", "&").replace("</step>\n<step>", "<step>", 1)
+    print(f"document size: {len(xml) / 1024:.1f} KiB")
+
+    results = {}
+    for label, document in (("well-formed", xml), ("malformed", malformed)):
+        seconds = timeit.timeit(lambda: parse_recipe(document), number=args.repeat) / args.repeat
+        results[label] = seconds
+        print(f"parse_recipe ({label}): {seconds * 1000:.3f} ms")
+
+    try:
+        seconds = timeit.timeit(lambda: parse_recipe_bs4(xml), number=args.repeat) / args.repeat
+    except Exception as e:
+        print(f"BeautifulSoup baseline unavailable: {e}")
+        return
+    print(f"BeautifulSoup baseline: {seconds * 1000:.3f} ms")
+    print(f"speedup (well-formed): {seconds / results['well-formed']:.1f}x")
+    print(f"same result: {parse_recipe(xml) == parse_recipe_bs4(xml)}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,104 @@
+"""
+Benchmark RecipeIndex.find_by_ingredients on a large synthetic index.
+
+Generates recipes whose ingredients follow a skewed popularity curve, so
+a few staples appear in most recipes, then times queries of common, rare
+and mixed ingredients. With --check, rankings are compared against a
+brute-force scan (slow on large indexes).
+
+Usage:
+    python benchmarks/bench_recipe_index.py [--recipes 1000000] [--vocabulary 2000] [--repeat 20] [--max-candidates 512] [--check]
+"""
+import os
+import sys
+import math
+import time
+import random
+import logging
+import argparse
+import statistics
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from recipe_index import RecipeIndex, DEFAULT_MAX_CANDIDATES  # noqa: E402
+
+
+def generate_recipes(count: int, vocabulary: int, seed: int = 7):
+    """Yield recipe information dicts with 3 to 20 ingredients drawn from a Zipf-like distribution."""
+    rng = random.Random(seed)
+    # Ingredient dicts are shared between recipes to keep a million of them in memory
+    ingredients = [{"name": f"ingredient {i}", "original": f"1 cup ingredient {i}"} for i in range(vocabulary)]
+    weights = [1 / (rank + 1) ** 0.9 for rank in range(vocabulary)]
+    cumulative = []
+    total = 0.0
+    for weight in weights:
+        total += weight
+        cumulative.append(total)
+    for recipe_id in range(count):
+        size = rng.randint(3, 20)
+        chosen = set(rng.choices(range(vocabulary), cum_weights=cumulative, k=size))
+        yield {
+            "id": recipe_id,
+            "title": f"Recipe {recipe_id}",
+            "image": None,
+            "extendedIngredients": [ingredients[i] for i in chosen],
+        }
+
+
+def brute_force(index: RecipeIndex, ingredients: str, number: int):
+    """Rank every recipe with the index's rules, without posting lists or candidate limits."""
+    wanted = {name.strip() for name in ingredients.split(",")}
+    required = max(1, math.ceil(len(wanted) * index.min_share))
+    scored = []
+    for position, recipe in enumerate(index._recipes):
+        names = {ingredient["name"] for ingredient in recipe["extendedIngredients"]}
+        used = len(names & wanted)
+        if used >= required:
+            scored.append((-used, len(names) - used, recipe["id"]))
+    return [(-used, missed) for used, missed, _ in sorted(scored)[:number]]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--recipes", type=int, default=1_000_000)
+    parser.add_argument("--vocabulary", type=int, default=2000)
+    parser.add_argument("--repeat", type=int, default=20)
+    parser.add_argument("--number", type=int, default=1)
+    parser.add_argument("--max-candidates", type=int, default=DEFAULT_MAX_CANDIDATES)
+    parser.add_argument("--check", action="store_true", help="Compare rankings with a brute-force scan")
+    args = parser.parse_args()
+    logging.disable(logging.CRITICAL)
+
+    started = time.perf_counter()
+    index = RecipeIndex(max_candidates=args.max_candidates)
+    index.add_all(generate_recipes(args.recipes, args.vocabulary))
+    print(f"built {len(index)} recipes in {time.perf_counter() - started:.1f} s")
+
+    rng = random.Random(11)
+    queries = {
+        "3 common": [0, 1, 2],
+        "10 common": list(range(10)),
+        "16 common": list(range(16)),
+        "3 rare": rng.sample(range(args.vocabulary // 2, args.vocabulary), 3),
+        "5 mixed": [0, 3] + rng.sample(range(100, args.vocabulary), 3),
+        "10 mixed": list(range(5)) + rng.sample(range(50, args.vocabulary), 5),
+    }
+    for label, terms in queries.items():
+        query = ", ".join(f"ingredient {i}" for i in terms)
+        timings = []
+        for _ in range(args.repeat):
+            started = time.perf_counter()
+            result = index.find_by_ingredients(query, number=args.number)
+            timings.append(time.perf_counter() - started)
+        ranking = [(match["usedIngredientCount"], match["missedIngredientCount"]) for match in result]
+        line = (
+            f"{label:>10}: median {statistics.median(timings) * 1000:.3f} ms, "
+            f"max {max(timings) * 1000:.3f} ms, best (used, missed) {ranking}"
+        )
+        if args.check:
+            line += f", brute force {brute_force(index, query, args.number)}"
+        print(line)
+
+
+if __name__ == "__main__":
+    main()
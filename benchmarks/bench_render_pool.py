@@ -0,0 +1,58 @@
+"""
+Benchmark PDF rendering throughput of render_pool.RenderPool.
+
+Renders the same batch of recipes in the calling thread and through render
+pools of increasing size, and reports recipes per second and the speedup
+over the single-threaded baseline. Speedup is bounded by the number of
+available cores.
+
+Usage:
+    python benchmarks/bench_render_pool.py [--recipes 200] [--workers 1 2 4]
+"""
+import os
+import sys
+import time
+import logging
+import argparse
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ["ARTIFACT_CACHE_DISABLED"] = "1"  # measure rendering, not cache hits
+
+from para2pdf import render_recipe_pdf_bytes  # noqa: E402
+from render_pool import RenderPool  # noqa: E402
+from bench_chart import SAMPLE_RECIPE  # noqa: E402
+
+
+def recipes(count: int):
+    for i in range(count):
+        yield dict(SAMPLE_RECIPE, title=f"{SAMPLE_RECIPE['title']} #{i}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--recipes", type=int, default=200)
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 2, 4])
+    parser.add_argument("--chart-backend", choices=["vector", "raster"], default="vector")
+    args = parser.parse_args()
+    logging.disable(logging.CRITICAL)
+
+    render_recipe_pdf_bytes(SAMPLE_RECIPE, args.chart_backend)  # warm up imports and fonts
+    started = time.perf_counter()
+    for recipe_data in recipes(args.recipes):
+        render_recipe_pdf_bytes(recipe_data, args.chart_backend)
+    baseline = args.recipes / (time.perf_counter() - started)
+
+    print(f"cores: {os.cpu_count()}, recipes: {args.recipes}, chart: {args.chart_backend}")
+    print(f"{'in-thread':>10}  {baseline:8.1f} recipes/s")
+    for workers in args.workers:
+        with RenderPool(workers, chart_backend=args.chart_backend) as pool:
+            list(pool.map(recipes(workers)))  # let every worker finish its startup
+            started = time.perf_counter()
+            for _ in pool.map(recipes(args.recipes)):
+                pass
+            throughput = args.recipes / (time.perf_counter() - started)
+        print(f"{workers:>8} w  {throughput:8.1f} recipes/s  {throughput / baseline:5.2f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,98 @@
+"""
+Measure cold-start import time of the entry-point modules and enforce a budget.
+
+Each module is imported in a fresh interpreter under ``python -X importtime``.
+The script reports its cumulative import time (best of several runs), the
+slowest modules it pulled in, and whether any heavy dependency was loaded
+that should only load on the path that needs it. Exits with status 1 when a
+module exceeds its time budget or loads a forbidden dependency.
+
+Usage:
+    python benchmarks/bench_startup.py [--repeat 5] [--top 8] [--budget run=300]
+"""
+import os
+import sys
+import argparse
+import subprocess
+from typing import Dict, List, Tuple
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Cumulative import time allowed per module, in milliseconds
+BUDGETS_MS = {
+    "run": 250,
+    "recipe_finder": 250,
+    "renderers": 40,
+}
+
+# Dependencies that must stay off each module's import path
+HEAVY = ["reportlab", "matplotlib", "numpy", "aisuite", "openai", "httpx", "requests", "bs4"]
+FORBIDDEN = {
+    "run": HEAVY,
+    "recipe_finder": HEAVY,
+    "renderers": HEAVY,
+}
+
+
+def measure(module: str) -> Tuple[float, List[Tuple[float, str]], List[str]]:
+    """
+    Import a module in a fresh interpreter.
+
+    Returns:
+        tuple: Cumulative import time in ms, (self ms, name) of every imported
+            module, and the top-level packages present afterwards.
+    """
+    code = f"import sys, {module}; print(' '.join(sorted({{m.split('.')[0] for m in sys.modules}})))"
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", code],
+        cwd=ROOT, capture_output=True, text=True, check=True,
+    )
+    total = 0.0
+    modules = []
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        self_us, cumulative_us, name = line[len("import time:"):].split("|")
+        modules.append((int(self_us) / 1000, name.strip()))
+        if name.rstrip() == f" {module}":
+            total = int(cumulative_us) / 1000
+    return total, modules, result.stdout.split()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--repeat", type=int, default=5, help="Runs per module; the fastest is reported.")
+    parser.add_argument("--top", type=int, default=8, help="Slowest imported modules to list.")
+    parser.add_argument("--budget", action="append", default=[], metavar="MODULE=MS",
+                        help="Override or add a module budget.")
+    parser.add_argument("modules", nargs="*", help="Modules to measure, defaults to the budgeted ones.")
+    args = parser.parse_args()
+
+    budgets: Dict[str, float] = dict(BUDGETS_MS)
+    for item in args.budget:
+        module, ms = item.split("=")
+        budgets[module] = float(ms)
+
+    failures = []
+    for module in args.modules or list(budgets):
+        runs = [measure(module) for _ in range(args.repeat)]
+        total, modules, loaded = min(runs, key=lambda run: run[0])
+        budget = budgets.get(module)
+        status = "ok" if budget is None or total <= budget else "OVER"
+        print(f"{module}: {total:.1f} ms" + (f" (budget {budget:.0f} ms, {status})" if budget else ""))
+        for self_ms, name in sorted(modules, reverse=True)[:args.top]:
+            print(f"    {self_ms:7.1f} ms  {name}")
+        if status == "OVER":
+            failures.append(f"{module} took {total:.1f} ms, budget {budget:.0f} ms")
+        heavy = sorted(set(FORBIDDEN.get(module, [])) & set(loaded))
+        if heavy:
+            print(f"    loads heavy dependencies: {', '.join(heavy)}")
+            failures.append(f"{module} loads {', '.join(heavy)}")
+
+    if failures:
+        print("\nStartup budget exceeded:\n  " + "\n  ".join(failures))
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,282 @@
+"""
+End-to-end benchmark suite run against local stub Spoonacular and LLM servers.
+
+Starts the servers from ``stub_servers`` with the requested latency, jitter
+and error rate, points the pipeline at them and measures:
+
+- single-query latency of ``RecipeFinder`` with a per-stage breakdown
+- batch throughput of ``run.run_batch``
+- ``utility.parse_recipe`` on the recorded rewrite and on a large document
+- PDF render time with the vector and raster chart backends
+
+Caches are disabled so every run does the same work. Results are written
+as JSON, and ``--compare`` prints the change against an earlier result file.
+
+Usage:
+    python benchmarks/bench_suite.py [--queries 20] [--batch 100] [--latency 0.05]
+    python benchmarks/bench_suite.py --compare benchmarks/results/bench-20260101T000000Z.json
+"""
+import os
+import sys
+import json
+import time
+import logging
+import platform
+import argparse
+import tempfile
+import statistics
+import subprocess
+from pathlib import Path
+from typing import Dict, Any, List, Optional, Tuple
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from stub_servers import StubConfig, SpoonacularStub, LLMStub, load_fixture  # noqa: E402
+
+# Ingredient lists cycled through by the latency and batch runs
+QUERIES = [
+    "pork chops, garlic, cherry tomatoes",
+    "chicken thighs, rice, garlic, lemon",
+    "I have some salmon, asparagus and a bit of butter",
+    "beef mince, onions, canned tomatoes, kidney beans",
+    "tofu, broccoli, soy sauce, ginger",
+    "eggs, spinach, feta",
+    "what can I make with chickpeas, coconut milk and curry paste",
+    "shrimp, linguine, chili flakes, parsley",
+]
+
+# Metrics compared by --compare, with True where higher is better
+COMPARED = {
+    ("single_query", "p50_ms"): False,
+    ("single_query", "p90_ms"): False,
+    ("batch", "queries_per_second"): True,
+    ("parser", "recorded_us"): False,
+    ("parser", "large_us"): False,
+    ("pdf", "vector_ms"): False,
+    ("pdf", "raster_ms"): False,
+}
+
+
+def percentile(values: List[float], pct: float) -> float:
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, max(0, round(pct / 100 * len(ordered)) - 1))
+    return ordered[index]
+
+
+def summarize_ms(seconds: List[float]) -> Dict[str, float]:
+    ms = [s * 1000 for s in seconds]
+    return {
+        "runs": len(ms),
+        "mean_ms": round(statistics.fmean(ms), 3),
+        "min_ms": round(min(ms), 3),
+        "p50_ms": round(percentile(ms, 50), 3),
+        "p90_ms": round(percentile(ms, 90), 3),
+        "p99_ms": round(percentile(ms, 99), 3),
+        "max_ms": round(max(ms), 3),
+    }
+
+
+def configure_environment(spoonacular_url: str, llm_url: str) -> None:
+    """Point the pipeline at the stubs and turn off every cache; must run before the pipeline is imported."""
+    os.environ["SPOONACULAR_BASE_URL"] = spoonacular_url
+    os.environ["OPENAI_BASE_URL"] = llm_url + "/v1"
+    os.environ["spoonacular_API"] = "stub"
+    os.environ["API_KEY"] = "stub"
+    os.environ["SPOONACULAR_RATE"] = "0"  # measure the pipeline, not the client-side rate limit
+    os.environ["COMPLETION_CACHE_DISABLED"] = "1"
+    os.environ["ARTIFACT_CACHE_DISABLED"] = "1"
+    os.environ.pop("RECIPE_INDEX_PATH", None)
+    os.environ.pop("PIPELINE_TRACING", None)
+
+
+def bench_single_query(count: int) -> Tuple[Dict[str, Any], Optional[Dict[str, Any]]]:
+    from recipe_finder import RecipeFinder
+    from result_cache import ResultCache
+    from instrumentation import get_default_tracer, InMemoryExporter
+
+    tracer = get_default_tracer()
+    exporter = InMemoryExporter()
+    tracer.add_exporter(exporter)
+    tracer.enabled = True
+
+    RecipeFinder(QUERIES[0], cache=ResultCache())()  # warm up clients and connection pools
+    exporter.traces.clear()
+
+    durations, failures, recipe_data = [], 0, None
+    for i in range(count):
+        started = time.perf_counter()
+        result = RecipeFinder(QUERIES[i % len(QUERIES)], cache=ResultCache())()
+        durations.append(time.perf_counter() - started)
+        if result is None:
+            failures += 1
+        recipe_data = recipe_data or result
+
+    tracer.enabled = False
+    tracer.exporters.remove(exporter)
+    stages: Dict[str, List[float]] = {}
+    for trace in exporter.traces:
+        for span in trace[:-1]:
+            stages.setdefault(span.name, []).append(span.duration * 1000)
+
+    result = summarize_ms(durations)
+    result["failures"] = failures
+    result["stages_mean_ms"] = {name: round(statistics.fmean(ms), 3) for name, ms in sorted(stages.items())}
+    return result, recipe_data
+
+
+def bench_batch(count: int, workers: int, output_format: str) -> Dict[str, Any]:
+    from run import run_batch
+
+    with tempfile.TemporaryDirectory() as tmp:
+        input_path = Path(tmp) / "queries.jsonl"
+        with open(input_path, "w", encoding="utf-8") as f:
+            for i in range(count):
+                f.write(json.dumps({"id": f"q{i}", "ingredients": f"{QUERIES[i % len(QUERIES)]} #{i}"}) + "\n")
+        started = time.perf_counter()
+        counts = run_batch(str(input_path), Path(tmp) / "out", output_format=output_format, workers=workers)
+        elapsed = time.perf_counter() - started
+
+    return {
+        "queries": count,
+        "workers": workers,
+        "format": output_format,
+        "seconds": round(elapsed, 3),
+        "queries_per_second": round(count / elapsed, 2),
+        "ok": counts["ok"],
+        "failed": counts["failed"],
+    }
+
+
+def bench_parser(repeat: int) -> Dict[str, Any]:
+    import timeit
+    from utility import parse_recipe
+    from bench_parser import generate_recipe_xml
+
+    recorded = load_fixture("rewrite_completion.xml")
+    large = generate_recipe_xml(sections=4, ingredients=25, steps=60)
+    recorded_s = min(timeit.repeat(lambda: parse_recipe(recorded), number=repeat, repeat=3)) / repeat
+    large_s = min(timeit.repeat(lambda: parse_recipe(large), number=max(1, repeat // 10), repeat=3)) / max(1, repeat // 10)
+    return {
+        "recorded_bytes": len(recorded.encode("utf-8")),
+        "recorded_us": round(recorded_s * 1e6, 2),
+        "large_bytes": len(large.encode("utf-8")),
+        "large_us": round(large_s * 1e6, 2),
+    }
+
+
+def bench_pdf(recipe_data: Dict[str, Any], repeat: int, raster_repeat: int) -> Dict[str, Any]:
+    from para2pdf import render_recipe_pdf_bytes
+
+    result: Dict[str, Any] = {}
+    for backend, runs in (("vector", repeat), ("raster", raster_repeat)):
+        if not runs:
+            continue
+        render_recipe_pdf_bytes(recipe_data, backend)  # load fonts and the chart backend
+        durations = []
+        for _ in range(runs):
+            started = time.perf_counter()
+            pdf = render_recipe_pdf_bytes(recipe_data, backend)
+            durations.append(time.perf_counter() - started)
+        result[f"{backend}_ms"] = round(statistics.median(durations) * 1000, 3)
+        result[f"{backend}_bytes"] = len(pdf)
+    return result
+
+
+def git_commit() -> Optional[str]:
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=ROOT,
+                              capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def compare(current: Dict[str, Any], baseline_path: str) -> None:
+    with open(baseline_path, encoding="utf-8") as f:
+        baseline = json.load(f)
+    print(f"\nCompared with {baseline_path} (commit {baseline.get('commit')}):")
+    for (section, metric), higher_is_better in COMPARED.items():
+        old = baseline.get("results", {}).get(section, {}).get(metric)
+        new = current["results"].get(section, {}).get(metric)
+        if not old or new is None:
+            continue
+        change = (new - old) / old * 100
+        better = change > 0 if higher_is_better else change < 0
+        name = f"{section}.{metric}"
+        print(f"  {name:32} {old:12.2f} -> {new:12.2f}  {change:+7.1f}% {'better' if better else 'worse'}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--queries", type=int, default=20, help="Sequential queries for the latency run.")
+    parser.add_argument("--batch", type=int, default=100, help="Queries in the batch throughput run, 0 to skip.")
+    parser.add_argument("--workers", type=int, default=8, help="Batch pipeline threads.")
+    parser.add_argument("--batch-format", default="json", help="Output format of the batch run.")
+    parser.add_argument("--parser-repeat", type=int, default=200)
+    parser.add_argument("--pdf-repeat", type=int, default=10)
+    parser.add_argument("--raster-repeat", type=int, default=2, help="Raster chart renders, 0 to skip.")
+    parser.add_argument("--latency", type=float, default=0.02, help="Stub Spoonacular latency in seconds.")
+    parser.add_argument("--llm-latency", type=float, default=0.2, help="Stub LLM latency in seconds.")
+    parser.add_argument("--llm-slow-rate", type=float, default=0.0, help="Fraction of stub LLM requests that are slow.")
+    parser.add_argument("--llm-slow-latency", type=float, default=2.0, help="Extra seconds of a slow stub LLM request.")
+    parser.add_argument("--hedge-percentile", type=float, help="Hedge LLM requests slower than this latency percentile.")
+    parser.add_argument("--jitter", type=float, default=0.01, help="Random latency variation in seconds.")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="Fraction of stub requests that fail.")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", help="Result file, defaults to benchmarks/results/bench-<timestamp>.json.")
+    parser.add_argument("--compare", metavar="PATH", help="Earlier result file to compare against.")
+    args = parser.parse_args()
+    logging.disable(logging.CRITICAL)
+
+    spoonacular_config = StubConfig(args.latency, args.jitter, args.error_rate, args.seed)
+    llm_config = StubConfig(args.llm_latency, args.jitter, args.error_rate, args.seed + 1,
+                            slow_rate=args.llm_slow_rate, slow_latency=args.llm_slow_latency)
+    with SpoonacularStub(spoonacular_config) as spoonacular, LLMStub(llm_config) as llm:
+        configure_environment(spoonacular.url, llm.url)
+        if args.hedge_percentile:
+            os.environ["LLM_HEDGE_PERCENTILE"] = str(args.hedge_percentile)
+        results: Dict[str, Any] = {}
+
+        results["single_query"], recipe_data = bench_single_query(args.queries)
+        print(f"single query: p50 {results['single_query']['p50_ms']:.1f} ms, "
+              f"p90 {results['single_query']['p90_ms']:.1f} ms, p99 {results['single_query']['p99_ms']:.1f} ms")
+        if args.batch:
+            results["batch"] = bench_batch(args.batch, args.workers, args.batch_format)
+            print(f"batch: {results['batch']['queries_per_second']:.1f} queries/s "
+                  f"({results['batch']['ok']} ok, {results['batch']['failed']} failed)")
+        results["parser"] = bench_parser(args.parser_repeat)
+        print(f"parser: recorded {results['parser']['recorded_us']:.1f} us, large {results['parser']['large_us']:.1f} us")
+        if recipe_data is not None:
+            results["pdf"] = bench_pdf(recipe_data, args.pdf_repeat, args.raster_repeat)
+            print("pdf: " + ", ".join(f"{key} {value}" for key, value in results["pdf"].items()))
+
+        stubs = {"spoonacular": spoonacular.stats(), "llm": llm.stats()}
+
+    report = {
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime()),
+        "commit": git_commit(),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "cpu_count": os.cpu_count(),
+        "config": {
+            "args": {key: value for key, value in vars(args).items() if key not in ("output", "compare")},
+            "spoonacular": spoonacular_config.to_dict(),
+            "llm": llm_config.to_dict(),
+        },
+        "stubs": stubs,
+        "results": results,
+    }
+    output = args.output or os.path.join(
+        ROOT, "benchmarks", "results", f"bench-{report['timestamp'].replace('-', '').replace(':', '')}.json"
+    )
+    os.makedirs(os.path.dirname(output), exist_ok=True)
+    with open(output, "w", encoding="utf-8") as f:
+        json.dump(report, f, indent=2)
+    print(f"Results written to {output}")
+
+    if args.compare:
+        compare(report, args.compare)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,348 @@
+"""
+Local stand-ins for the Spoonacular API and the OpenAI chat completion endpoint.
+
+Both servers answer from recorded payloads in ``benchmarks/fixtures`` and can
+add latency, jitter and random failures, so the pipeline can be measured
+end to end without network access or API keys. Point the pipeline at them
+with ``SPOONACULAR_BASE_URL`` and ``OPENAI_BASE_URL``.
+
+Usage:
+    with SpoonacularStub(StubConfig(latency=0.05)) as spoonacular, LLMStub() as llm:
+        os.environ["SPOONACULAR_BASE_URL"] = spoonacular.url
+        os.environ["OPENAI_BASE_URL"] = llm.url + "/v1"
+
+    python benchmarks/stub_servers.py --latency 0.05 --error-rate 0.01
+"""
+import os
+import copy
+import json
+import time
+import random
+import hashlib
+import argparse
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Optional, Dict, Any, List, Tuple
+from urllib.parse import urlsplit, parse_qs
+
+FIXTURES_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "fixtures")
+
+
+def load_fixture(name: str) -> str:
+    with open(os.path.join(FIXTURES_DIR, name), encoding="utf-8") as f:
+        return f.read()
+
+
+class StubConfig:
+    """Latency and failure behaviour of a stub server."""
+
+    def __init__(self, latency: float = 0.0, jitter: float = 0.0, error_rate: float = 0.0,
+                 seed: Optional[int] = None, token_latency: float = 0.0, slow_rate: float = 0.0,
+                 slow_latency: float = 0.0):
+        """
+        Args:
+            latency (float): Base seconds added before each response.
+            jitter (float): Up to this many seconds are added or removed at random.
+            error_rate (float): Fraction of requests answered with an error status.
+            seed (int): Random seed, fixed for reproducible runs.
+            token_latency (float): Extra seconds per completion token, LLM stub only.
+            slow_rate (float): Fraction of requests that are slow, to simulate a latency tail.
+            slow_latency (float): Extra seconds added to a slow request.
+        """
+        self.latency = latency
+        self.jitter = jitter
+        self.error_rate = error_rate
+        self.token_latency = token_latency
+        self.slow_rate = slow_rate
+        self.slow_latency = slow_latency
+        self._random = random.Random(seed)
+        self._lock = threading.Lock()
+
+    def delay(self) -> float:
+        with self._lock:
+            delay = max(0.0, self.latency + self._random.uniform(-self.jitter, self.jitter))
+            if self.slow_rate and self._random.random() < self.slow_rate:
+                delay += self.slow_latency
+            return delay
+
+    def fail(self) -> bool:
+        if not self.error_rate:
+            return False
+        with self._lock:
+            return self._random.random() < self.error_rate
+
+    def to_dict(self) -> Dict[str, float]:
+        return {"latency": self.latency, "jitter": self.jitter, "error_rate": self.error_rate,
+                "token_latency": self.token_latency, "slow_rate": self.slow_rate, "slow_latency": self.slow_latency}
+
+
+class StubServer:
+    """
+    Threaded HTTP server on a free localhost port, run in a daemon thread.
+
+    Subclasses implement ``handle(method, path, query, body, handler)`` returning
+    ``(status, payload)`` or ``(status, payload, headers)``; payloads that
+    aren't bytes are sent as JSON.
+    """
+
+    def __init__(self, config: Optional[StubConfig] = None, port: int = 0):
+        """
+        Args:
+            config (StubConfig): Latency and failure behaviour.
+            port (int): Port to listen on, 0 for any free port.
+        """
+        self.config = config or StubConfig()
+        self.requests = 0
+        self.errors = 0
+        self._counter_lock = threading.Lock()
+        self._server = ThreadingHTTPServer(("127.0.0.1", port), self._handler_class())
+        self._server.daemon_threads = True
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def url(self) -> str:
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def _handler_class(self):
+        stub = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def log_message(self, format, *args):
+                pass
+
+            def do_GET(self):
+                stub._dispatch(self, "GET")
+
+            def do_POST(self):
+                stub._dispatch(self, "POST")
+
+        return Handler
+
+    def _dispatch(self, handler: BaseHTTPRequestHandler, method: str) -> None:
+        url = urlsplit(handler.path)
+        query = {key: values[-1] for key, values in parse_qs(url.query).items()}
+        length = int(handler.headers.get("Content-Length") or 0)
+        body = json.loads(handler.rfile.read(length)) if length else None
+        with self._counter_lock:
+            self.requests += 1
+
+        time.sleep(self.config.delay())
+        if self.config.fail():
+            with self._counter_lock:
+                self.errors += 1
+            self.respond(handler, 503, {"status": "failure", "message": "Injected stub failure"})
+            return
+        try:
+            status, payload, *headers = self.handle(method, url.path, query, body, handler)
+        except Exception as e:
+            status, payload, headers = 500, {"status": "failure", "message": str(e)}, []
+        if payload is not None:
+            self.respond(handler, status, payload, headers=headers[0] if headers else None)
+
+    @staticmethod
+    def respond(handler: BaseHTTPRequestHandler, status: int, payload: Any,
+                content_type: str = "application/json", headers: Optional[Dict[str, str]] = None) -> None:
+        data = payload if isinstance(payload, bytes) else json.dumps(payload).encode("utf-8")
+        handler.send_response(status)
+        handler.send_header("Content-Type", content_type)
+        handler.send_header("Content-Length", str(len(data)))
+        for name, value in (headers or {}).items():
+            handler.send_header(name, value)
+        handler.end_headers()
+        handler.wfile.write(data)
+
+    def handle(self, method: str, path: str, query: Dict[str, str], body: Any,
+               handler: BaseHTTPRequestHandler) -> Tuple[int, Any]:
+        raise NotImplementedError
+
+    def stats(self) -> Dict[str, int]:
+        with self._counter_lock:
+            return {"requests": self.requests, "errors": self.errors}
+
+    def start(self) -> "StubServer":
+        self._thread = threading.Thread(target=self._server.serve_forever, name=type(self).__name__, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        self._server.shutdown()
+        self._server.server_close()
+
+    def __enter__(self) -> "StubServer":
+        return self.start()
+
+    def __exit__(self, *exc_info) -> None:
+        self.stop()
+
+
+class SpoonacularStub(StubServer):
+    """
+    Serves ``findByIngredients``, ``/recipes/{id}/information`` and ``informationBulk``.
+
+    Every ingredient list maps to a stable recipe id derived from its hash,
+    and the recorded information payload is returned under that id, so
+    different queries exercise distinct ids the way the live API would.
+    Responses carry the ``X-API-Quota-*`` headers, and requests beyond
+    ``rate_limit`` per second are answered with 429 like the live API.
+    """
+
+    def __init__(self, config: Optional[StubConfig] = None, port: int = 0,
+                 rate_limit: Optional[float] = None, daily_points: float = 1500.0):
+        """
+        Args:
+            config (StubConfig): Latency and failure behaviour.
+            port (int): Port to listen on, 0 for any free port.
+            rate_limit (float): Requests per second before answering 429, None for no limit.
+            daily_points (float): Daily point quota reported in the headers.
+        """
+        super().__init__(config, port)
+        self.search_result = json.loads(load_fixture("find_by_ingredients.json"))
+        self.information = json.loads(load_fixture("recipe_information.json"))
+        self.rate_limit = rate_limit
+        self.daily_points = daily_points
+        self.points_used = 0.0
+        self.throttled = 0
+        self._window: List[float] = []
+
+    def _throttle(self) -> bool:
+        """Sliding one-second window rate limit."""
+        if self.rate_limit is None:
+            return False
+        now = time.monotonic()
+        with self._counter_lock:
+            self._window = [t for t in self._window if now - t < 1.0]
+            if len(self._window) >= self.rate_limit:
+                self.throttled += 1
+                return True
+            self._window.append(now)
+        return False
+
+    def handle(self, method, path, query, body, handler):
+        if self._throttle():
+            return 429, {"status": "failure", "code": 429, "message": "Too many requests"}, {"Retry-After": "1"}
+        status, payload = self._route(method, path, query)
+        cost = 0.0
+        if status == 200:
+            if path == "/recipes/findByIngredients":
+                cost = 1 + 0.01 * len(payload)
+            elif path == "/recipes/informationBulk":
+                cost = 1 + 0.5 * max(0, len(payload) - 1)
+            else:
+                cost = 1.0
+        with self._counter_lock:
+            if status == 200 and self.points_used + cost > self.daily_points:
+                status, payload, cost = 402, {"status": "failure", "code": 402, "message": "Daily points limit reached"}, 0.0
+            self.points_used += cost
+            headers = {
+                "X-API-Quota-Request": f"{cost:g}",
+                "X-API-Quota-Used": f"{self.points_used:g}",
+                "X-API-Quota-Left": f"{max(0.0, self.daily_points - self.points_used):g}",
+            }
+        return status, payload, headers
+
+    def stats(self) -> Dict[str, Any]:
+        stats: Dict[str, Any] = super().stats()
+        with self._counter_lock:
+            stats.update(throttled=self.throttled, points_used=self.points_used)
+        return stats
+
+    def _info(self, recipe_id: int) -> Dict[str, Any]:
+        info = copy.deepcopy(self.information)
+        info["id"] = recipe_id
+        return info
+
+    def _route(self, method: str, path: str, query: Dict[str, str]) -> Tuple[int, Any]:
+        if method != "GET":
+            return 405, {"status": "failure", "message": "Method not allowed"}
+        if "apiKey" not in query:
+            return 401, {"status": "failure", "code": 401, "message": "You are not authorized."}
+        if path == "/recipes/findByIngredients":
+            digest = hashlib.sha1(query.get("ingredients", "").encode("utf-8")).hexdigest()
+            recipes = copy.deepcopy(self.search_result)[:int(query.get("number", 1))]
+            for recipe in recipes:
+                recipe["id"] = 100000 + int(digest[:8], 16) % 900000
+            return 200, recipes
+        if path == "/recipes/informationBulk":
+            ids = [int(i) for i in query.get("ids", "").split(",") if i]
+            return 200, [self._info(recipe_id) for recipe_id in ids]
+        parts = path.strip("/").split("/")
+        if len(parts) == 3 and parts[0] == "recipes" and parts[2] == "information" and parts[1].isdigit():
+            return 200, self._info(int(parts[1]))
+        return 404, {"status": "failure", "code": 404, "message": "Not found"}
+
+
+class LLMStub(StubServer):
+    """
+    Serves the OpenAI ``/v1/chat/completions`` endpoint, streaming or not.
+
+    Ingredient extraction prompts get the recorded extraction answer and
+    everything else the recorded recipe rewrite. Token counts are
+    approximated as one per four characters.
+    """
+
+    def __init__(self, config: Optional[StubConfig] = None, port: int = 0):
+        super().__init__(config, port)
+        self.extraction = load_fixture("extraction_completion.xml")
+        self.rewrite = load_fixture("rewrite_completion.xml")
+
+    def handle(self, method, path, query, body, handler):
+        if method != "POST" or not path.endswith("/chat/completions"):
+            return 404, {"error": {"message": "Not found", "type": "invalid_request_error"}}
+        messages = body.get("messages", [])
+        prompt = "".join(message.get("content", "") for message in messages)
+        content = self.extraction if "<ingredient_extraction>" in prompt else self.rewrite
+        usage = {"prompt_tokens": len(prompt) // 4, "completion_tokens": len(content) // 4}
+        usage["total_tokens"] = usage["prompt_tokens"] + usage["completion_tokens"]
+        time.sleep(self.config.token_latency * usage["completion_tokens"])
+
+        base = {"id": "chatcmpl-stub", "created": int(time.time()), "model": body.get("model", "stub")}
+        if not body.get("stream"):
+            choice = {"index": 0, "message": {"role": "assistant", "content": content}, "finish_reason": "stop"}
+            return 200, dict(base, object="chat.completion", choices=[choice], usage=usage)
+
+        handler.send_response(200)
+        handler.send_header("Content-Type", "text/event-stream")
+        handler.send_header("Transfer-Encoding", "chunked")
+        handler.end_headers()
+        for start in range(0, len(content), 64):
+            delta = {"index": 0, "delta": {"content": content[start:start + 64]}, "finish_reason": None}
+            self._send_chunk(handler, dict(base, object="chat.completion.chunk", choices=[delta]))
+        self._send_chunk(handler, "[DONE]")
+        handler.wfile.write(b"0\r\n\r\n")
+        return 200, None
+
+    @staticmethod
+    def _send_chunk(handler: BaseHTTPRequestHandler, event: Any) -> None:
+        data = ("data: " + (event if isinstance(event, str) else json.dumps(event)) + "\n\n").encode("utf-8")
+        handler.wfile.write(f"{len(data):x}\r\n".encode("ascii") + data + b"\r\n")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Run the stub Spoonacular and LLM servers until interrupted.")
+    parser.add_argument("--spoonacular-port", type=int, default=8801)
+    parser.add_argument("--llm-port", type=int, default=8802)
+    parser.add_argument("--latency", type=float, default=0.0, help="Base response latency in seconds.")
+    parser.add_argument("--jitter", type=float, default=0.0, help="Random latency variation in seconds.")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="Fraction of requests that fail with 503.")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--rate-limit", type=float, help="Spoonacular requests per second before answering 429.")
+    parser.add_argument("--daily-points", type=float, default=1500.0, help="Spoonacular daily point quota.")
+    args = parser.parse_args()
+
+    def config() -> StubConfig:
+        return StubConfig(args.latency, args.jitter, args.error_rate, args.seed)
+
+    with SpoonacularStub(config(), args.spoonacular_port, args.rate_limit, args.daily_points) as spoonacular, LLMStub(config(), args.llm_port) as llm:
+        print(f"SPOONACULAR_BASE_URL={spoonacular.url}")
+        print(f"OPENAI_BASE_URL={llm.url}/v1")
+        try:
+            threading.Event().wait()
+        except KeyboardInterrupt:
+            pass
+
+
+if __name__ == "__main__":
+    main()
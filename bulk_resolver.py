@@ -0,0 +1,155 @@
+import time
+import logging
+import threading
+from concurrent.futures import Future
+from typing import Optional, Dict, Any, List
+from http_client import SpoonacularClient, get_default_client
+from single_flight import SingleFlight
+
+# Configure logging
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+logger = logging.getLogger(__name__)
+
+# Result handed to waiters whose id the bulk call didn't return; each waiter then fetches it itself
+_PER_ID = object()
+
+
+class BulkInfoResolver:
+    """
+    Collects recipe information lookups from many callers into bulk requests.
+
+    The first caller to ask for an id opens a short collection window; every
+    id requested by any thread during that window is resolved with a single
+    ``informationBulk`` call and each result is handed back to the threads
+    waiting on it. Ids missing from the bulk response, or a failed bulk call,
+    fall back to per-id ``/information`` requests; each id goes back to the
+    callers that asked for it, which fetch it under their own deadline while
+    the other callers carry on. Callers waiting on the same id share one
+    per-id request.
+    """
+
+    def __init__(
+        self,
+        client: Optional[SpoonacularClient] = None,
+        window: float = 0.02,
+        max_batch: int = 50,
+        include_nutrition: bool = True,
+    ):
+        """
+        Args:
+            client (SpoonacularClient): Client used for the requests.
+            window (float): Seconds to wait for more ids before sending a batch.
+            max_batch (int): Send the batch as soon as it holds this many ids.
+            include_nutrition (bool): Whether to include nutrition data.
+        """
+        self.client = client or get_default_client()
+        self.window = window
+        self.max_batch = max_batch
+        self.include_nutrition = include_nutrition
+        self.bulk_calls = 0
+        self.fallback_calls = 0
+        self._pending: Dict[int, Future] = {}
+        self._generation = 0
+        self._window_open = False
+        self._lock = threading.Lock()
+        self._per_id = SingleFlight("recipe info fallback")
+
+    def resolve(self, recipe_id: int, timeout: Optional[float] = None) -> Dict[str, Any]:
+        """
+        Return detailed information for one recipe, batched with concurrent callers.
+
+        Args:
+            recipe_id (int): Spoonacular recipe id.
+            timeout (float): Seconds to wait for the result.
+
+        Returns:
+            dict: A dictionary representing the detailed recipe information.
+
+        Raises:
+            requests.RequestException: If neither the bulk nor the per-id call succeeded.
+        """
+        return self.resolve_many([recipe_id], timeout)[0]
+
+    def resolve_many(self, recipe_ids: List[int], timeout: Optional[float] = None) -> List[Dict[str, Any]]:
+        """
+        Return detailed information for several recipes, in the order given.
+
+        Args:
+            recipe_ids (list): Spoonacular recipe ids.
+            timeout (float): Seconds to wait for the results.
+
+        Returns:
+            list: A list of dictionaries representing the detailed recipe information.
+        """
+        futures = []
+        lead_generation = None
+        flush_now = False
+        with self._lock:
+            for recipe_id in recipe_ids:
+                future = self._pending.get(recipe_id)
+                if future is None:
+                    future = Future()
+                    self._pending[recipe_id] = future
+                futures.append(future)
+            if len(self._pending) >= self.max_batch:
+                flush_now = True
+            elif not self._window_open and futures:
+                # We opened this window, so we are responsible for flushing it
+                self._window_open = True
+                lead_generation = self._generation
+
+        if flush_now:
+            self._flush()
+        elif lead_generation is not None:
+            time.sleep(self.window)
+            self._flush(lead_generation)
+
+        results = [future.result(timeout) for future in futures]
+        return [
+            self._fetch(recipe_id) if result is _PER_ID else result
+            for recipe_id, result in zip(recipe_ids, results)
+        ]
+
+    def _fetch(self, recipe_id: int) -> Dict[str, Any]:
+        """Fetch one recipe with a per-id request, shared with other callers waiting on the same id."""
+        def fetch() -> Dict[str, Any]:
+            with self._lock:
+                self.fallback_calls += 1
+            return self.client.get_recipe_information(recipe_id, self.include_nutrition)
+        return self._per_id.do(recipe_id, fetch)
+
+    def _flush(self, generation: Optional[int] = None) -> None:
+        """Send the pending ids as one bulk request and resolve their futures, or hand them back for per-id calls."""
+        with self._lock:
+            if generation is not None and generation != self._generation:
+                # The window was already flushed because it filled up
+                return
+            batch = self._pending
+            self._pending = {}
+            self._generation += 1
+            self._window_open = False
+            if batch:
+                self.bulk_calls += 1
+        if not batch:
+            return
+
+        ids = list(batch)
+        results: Dict[int, Dict[str, Any]] = {}
+        try:
+            logger.info(f"Resolving {len(ids)} recipes with one bulk request.")
+            for info in self.client.get_recipe_information_bulk(ids, self.include_nutrition) or []:
+                results[info.get("id")] = info
+        except Exception as e:
+            logger.error(f"Bulk recipe info request failed, falling back to per-id calls: {e}")
+
+        for recipe_id in ids:
+            batch[recipe_id].set_result(results.get(recipe_id, _PER_ID))
+
+    def stats(self) -> Dict[str, int]:
+        """
+        Report how many bulk and per-id fallback requests were sent.
+
+        Returns:
+            dict: ``bulk_calls`` and ``fallback_calls`` counters.
+        """
+        return {"bulk_calls": self.bulk_calls, "fallback_calls": self.fallback_calls}
@@ -0,0 +1,311 @@
+import os
+import json
+import mmap
+import time
+import zlib
+import atexit
+import asyncio
+import hashlib
+import logging
+import struct
+import threading
+from typing import Optional, Dict, Any, Tuple, Callable, Awaitable
+
+# Configure logging
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+logger = logging.getLogger(__name__)
+
+# Archive layout:
+#   MAGIC | record* | index | footer
+#   record: sha256 key (32) | payload length (u32) | zlib-compressed JSON {"v": value, "t": seconds}
+#   index:  count entries of key (32) | record offset (u64) | record length (u32), sorted by key
+#   footer: index offset (u64) | entry count (u64) | FOOTER_MAGIC
+MAGIC = b"RCASSET1"
+FOOTER_MAGIC = b"RCASIDX1"
+RECORD_HEADER = struct.Struct("<32sI")
+INDEX_ENTRY = struct.Struct("<32sQI")
+FOOTER = struct.Struct("<QQ8s")
+
+MODES = ("record", "replay")
+
+
+class CassetteMiss(LookupError):
+    """Raised in replay mode when a request was never recorded."""
+
+
+def request_key(kind: str, request: Any) -> bytes:
+    """
+    Build the archive key of a request.
+
+    Args:
+        kind (str): Request family, e.g. "spoonacular" or "completion".
+        request: JSON-serializable description of the request.
+
+    Returns:
+        bytes: The sha256 digest of the canonicalized request.
+    """
+    payload = json.dumps([kind, request], sort_keys=True, separators=(",", ":"), ensure_ascii=False, default=str)
+    return hashlib.sha256(payload.encode("utf-8")).digest()
+
+
+class Cassette:
+    """
+    Record/replay archive of Spoonacular and LLM responses.
+
+    In record mode every request goes to the real service and its decoded
+    response is appended to the archive together with how long it took.
+    In replay mode responses are served from the archive and a request
+    that was never recorded raises ``CassetteMiss``. Replay memory-maps
+    the file and binary-searches the sorted index in place, so archives
+    far larger than RAM open instantly and only the pages touched are
+    read. Replayed calls sleep for the recorded duration times
+    ``latency_scale``; the default of 0 replays at full speed.
+
+    An archive whose recording was interrupted has no index; it is
+    rebuilt by scanning the records the next time the file is opened for
+    recording.
+    """
+
+    def __init__(self, path: str, mode: str = "replay", latency_scale: float = 0.0):
+        """
+        Args:
+            path (str): Archive file.
+            mode (str): "record" or "replay".
+            latency_scale (float): Replay delay as a multiple of the recorded duration.
+
+        Raises:
+            ValueError: If the mode is unknown or the file isn't a cassette archive.
+            FileNotFoundError: In replay mode, if the archive doesn't exist.
+        """
+        if mode not in MODES:
+            raise ValueError(f"Unknown cassette mode {mode!r}, expected one of {MODES}")
+        self.path = path
+        self.mode = mode
+        self.latency_scale = latency_scale
+        self.hits = 0
+        self.misses = 0
+        self.recorded = 0
+        self._lock = threading.Lock()
+        self._file = None
+        self._map: Optional[mmap.mmap] = None
+        self._index: Dict[bytes, Tuple[int, int]] = {}
+        self._index_offset = 0
+        self._count = 0
+        if mode == "replay":
+            self._open_replay()
+        else:
+            self._open_record()
+
+    def _open_replay(self) -> None:
+        self._file = open(self.path, "rb")
+        size = os.fstat(self._file.fileno()).st_size
+        if size < len(MAGIC) + FOOTER.size:
+            raise ValueError(f"{self.path} is not a complete cassette archive")
+        self._map = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+        index_offset, count, footer_magic = FOOTER.unpack_from(self._map, size - FOOTER.size)
+        if self._map[:len(MAGIC)] != MAGIC or footer_magic != FOOTER_MAGIC:
+            raise ValueError(f"{self.path} is not a complete cassette archive")
+        self._index_offset = index_offset
+        self._count = count
+        logger.info(f"Replaying {count} recorded responses from {self.path}")
+
+    def _open_record(self) -> None:
+        exists = os.path.exists(self.path) and os.path.getsize(self.path) > 0
+        self._file = open(self.path, "r+b" if exists else "w+b")
+        if not exists:
+            self._file.write(MAGIC)
+            return
+        end = self._load_existing()
+        # New records overwrite the old index, which is written again on close
+        self._file.seek(end)
+        self._file.truncate()
+        logger.info(f"Recording into {self.path}, keeping {len(self._index)} earlier responses")
+
+    def _load_existing(self) -> int:
+        """Read the index of an existing archive, rebuilding it if the footer is missing, and return where records end."""
+        data = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+        try:
+            if data[:len(MAGIC)] != MAGIC:
+                raise ValueError(f"{self.path} is not a cassette archive")
+            size = len(data)
+            if size >= len(MAGIC) + FOOTER.size:
+                index_offset, count, footer_magic = FOOTER.unpack_from(data, size - FOOTER.size)
+                if footer_magic == FOOTER_MAGIC and index_offset + count * INDEX_ENTRY.size + FOOTER.size == size:
+                    for i in range(count):
+                        key, offset, length = INDEX_ENTRY.unpack_from(data, index_offset + i * INDEX_ENTRY.size)
+                        self._index[key] = (offset, length)
+                    return index_offset
+
+            logger.info(f"Cassette {self.path} has no index, rebuilding it from the records")
+            offset = len(MAGIC)
+            while offset + RECORD_HEADER.size <= size:
+                key, payload_length = RECORD_HEADER.unpack_from(data, offset)
+                length = RECORD_HEADER.size + payload_length
+                if offset + length > size:
+                    break  # torn final record
+                self._index[key] = (offset, length)
+                offset += length
+            return offset
+        finally:
+            data.close()
+
+    def __len__(self) -> int:
+        return self._count if self.mode == "replay" else len(self._index)
+
+    def _find(self, key: bytes) -> Optional[Tuple[int, int]]:
+        """Binary-search the memory-mapped index."""
+        lo, hi = 0, self._count
+        while lo < hi:
+            mid = (lo + hi) // 2
+            entry_key, offset, length = INDEX_ENTRY.unpack_from(self._map, self._index_offset + mid * INDEX_ENTRY.size)
+            if entry_key == key:
+                return offset, length
+            if entry_key < key:
+                lo = mid + 1
+            else:
+                hi = mid
+        return None
+
+    def _load(self, key: bytes) -> Tuple[Any, float]:
+        location = self._find(key)
+        if location is None:
+            with self._lock:
+                self.misses += 1
+            raise CassetteMiss(f"Request {key.hex()[:16]} was not recorded in {self.path}")
+        offset, length = location
+        record = json.loads(zlib.decompress(self._map[offset + RECORD_HEADER.size:offset + length]))
+        with self._lock:
+            self.hits += 1
+        return record["v"], record["t"] * self.latency_scale
+
+    def _store(self, key: bytes, value: Any, seconds: float) -> None:
+        payload = zlib.compress(json.dumps({"v": value, "t": round(seconds, 6)}, separators=(",", ":")).encode("utf-8"))
+        with self._lock:
+            offset = self._file.seek(0, os.SEEK_END)
+            self._file.write(RECORD_HEADER.pack(key, len(payload)) + payload)
+            self._file.flush()
+            self._index[key] = (offset, RECORD_HEADER.size + len(payload))
+            self.recorded += 1
+
+    def through(self, kind: str, request: Any, fetch: Callable[[], Any]) -> Any:
+        """
+        Serve a request from the archive, or fetch and record it.
+
+        Args:
+            kind (str): Request family, e.g. "spoonacular" or "completion".
+            request: JSON-serializable description of the request.
+            fetch (Callable): Performs the real request; only called in record mode.
+
+        Returns:
+            The recorded or freshly fetched JSON-serializable response.
+
+        Raises:
+            CassetteMiss: In replay mode, if the request was never recorded.
+        """
+        key = request_key(kind, request)
+        if self.mode == "replay":
+            value, delay = self._load(key)
+            if delay:
+                time.sleep(delay)
+            return value
+        started = time.perf_counter()
+        value = fetch()
+        self._store(key, value, time.perf_counter() - started)
+        return value
+
+    async def athrough(self, kind: str, request: Any, fetch: Callable[[], Awaitable[Any]]) -> Any:
+        """Asynchronous counterpart of ``through``; ``fetch`` returns an awaitable."""
+        key = request_key(kind, request)
+        if self.mode == "replay":
+            value, delay = self._load(key)
+            if delay:
+                await asyncio.sleep(delay)
+            return value
+        started = time.perf_counter()
+        value = await fetch()
+        self._store(key, value, time.perf_counter() - started)
+        return value
+
+    def replay(self, kind: str, request: Any) -> Any:
+        """
+        Serve a recorded response, sleeping for its simulated latency.
+
+        Raises:
+            CassetteMiss: If the request was never recorded.
+        """
+        value, delay = self._load(request_key(kind, request))
+        if delay:
+            time.sleep(delay)
+        return value
+
+    def record(self, kind: str, request: Any, value: Any, seconds: float = 0.0) -> None:
+        """Append a response obtained outside ``through``, e.g. a finished stream."""
+        self._store(request_key(kind, request), value, seconds)
+
+    def close(self) -> None:
+        """Write the sorted index in record mode and release the file."""
+        with self._lock:
+            if self._file is None:
+                return
+            if self.mode == "record":
+                index_offset = self._file.seek(0, os.SEEK_END)
+                entries = sorted(self._index.items())
+                self._file.write(b"".join(INDEX_ENTRY.pack(key, offset, length) for key, (offset, length) in entries))
+                self._file.write(FOOTER.pack(index_offset, len(entries), FOOTER_MAGIC))
+                self._file.flush()
+                os.fsync(self._file.fileno())
+                logger.info(f"Cassette {self.path} closed with {len(entries)} responses")
+            if self._map is not None:
+                self._map.close()
+                self._map = None
+            self._file.close()
+            self._file = None
+
+    def stats(self) -> Dict[str, int]:
+        """
+        Report cassette metrics.
+
+        Returns:
+            dict: Mode, entry count, and replay hit, miss and recorded counters.
+        """
+        with self._lock:
+            return {"mode": self.mode, "entries": len(self), "hits": self.hits,
+                    "misses": self.misses, "recorded": self.recorded}
+
+    def __enter__(self) -> "Cassette":
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+
+_default_cassette: Optional[Cassette] = None
+_default_cassette_loaded = False
+_default_cassette_lock = threading.Lock()
+
+
+def get_default_cassette() -> Optional[Cassette]:
+    """
+    Return the process-wide cassette configured by the environment.
+
+    ``CASSETTE_MODE`` ("record" or "replay") and ``CASSETTE_PATH`` enable it;
+    ``CASSETTE_LATENCY_SCALE`` sets the replay delay as a multiple of the
+    recorded duration. A recording is finalized when the process exits.
+
+    Returns:
+        Optional[Cassette]: The shared cassette, or None when record/replay is off.
+    """
+    global _default_cassette, _default_cassette_loaded
+    if not _default_cassette_loaded:
+        with _default_cassette_lock:
+            if not _default_cassette_loaded:
+                mode = os.getenv("CASSETTE_MODE")
+                if mode:
+                    _default_cassette = Cassette(
+                        os.getenv("CASSETTE_PATH", "recipe_cassette.bin"),
+                        mode,
+                        float(os.getenv("CASSETTE_LATENCY_SCALE", "0")),
+                    )
+                    atexit.register(_default_cassette.close)
+                _default_cassette_loaded = True
+    return _default_cassette
@@ -0,0 +1,186 @@
+import os
+import json
+import time
+import sqlite3
+import hashlib
+import logging
+import threading
+from typing import Optional, Dict, List
+from instrumentation import get_default_tracer
+
+# Configure logging
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+logger = logging.getLogger(__name__)
+
+DEFAULT_CACHE_PATH = os.path.join(os.path.expanduser("~"), ".cache", "recipe_finder", "completions.sqlite3")
+
+
+def completion_key(model: str, temperature: float, messages: List[Dict[str, str]]) -> str:
+    """
+    Build the content address of a completion request.
+
+    Args:
+        model (str): The model identifier, e.g. "openai:gpt-4o".
+        temperature (float): The sampling temperature.
+        messages (list): The chat messages sent to the model.
+
+    Returns:
+        str: A sha256 hex digest of the canonicalized request.
+    """
+    payload = json.dumps(
+        {"model": model, "temperature": temperature, "messages": messages},
+        sort_keys=True,
+        separators=(",", ":"),
+        ensure_ascii=False,
+    )
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+class CompletionCache:
+    """
+    Persistent LLM completion cache backed by SQLite.
+
+    Entries survive restarts and the database is shared safely between
+    processes (WAL journal, busy timeout). Entries expire after ``ttl``
+    seconds and the least recently used ones are evicted once the stored
+    completions exceed ``max_bytes``.
+    """
+
+    def __init__(self, path: str = DEFAULT_CACHE_PATH, ttl: Optional[float] = 7 * 24 * 3600, max_bytes: int = 64 * 1024 * 1024):
+        """
+        Args:
+            path (str): Location of the SQLite database file.
+            ttl (float): Seconds an entry stays valid, None to never expire.
+            max_bytes (int): Upper bound on the total size of cached completions.
+        """
+        self.path = path
+        self.ttl = ttl
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        self._local = threading.local()
+
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        with self._connect() as conn:
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS completions ("
+                " key TEXT PRIMARY KEY,"
+                " value TEXT NOT NULL,"
+                " size INTEGER NOT NULL,"
+                " created REAL NOT NULL,"
+                " accessed REAL NOT NULL)"
+            )
+            conn.execute("CREATE INDEX IF NOT EXISTS completions_accessed ON completions (accessed)")
+
+    def _connect(self) -> sqlite3.Connection:
+        """Return this thread's connection, opening it on first use."""
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=30, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    def get(self, key: str) -> Optional[str]:
+        """
+        Look up a cached completion.
+
+        Args:
+            key (str): The key returned by ``completion_key``.
+
+        Returns:
+            Optional[str]: The cached completion, or None on a miss or expired entry.
+        """
+        now = time.time()
+        conn = self._connect()
+        row = conn.execute("SELECT value, created FROM completions WHERE key = ?", (key,)).fetchone()
+        if row is None or (self.ttl is not None and now - row[1] > self.ttl):
+            if row is not None:
+                conn.execute("DELETE FROM completions WHERE key = ?", (key,))
+            with self._lock:
+                self.misses += 1
+            get_default_tracer().record_cache("completion", False)
+            return None
+        conn.execute("UPDATE completions SET accessed = ? WHERE key = ?", (now, key))
+        with self._lock:
+            self.hits += 1
+        get_default_tracer().record_cache("completion", True)
+        return row[0]
+
+    def set(self, key: str, value: str) -> None:
+        """
+        Store a completion and evict old entries if the cache is over budget.
+
+        Args:
+            key (str): The key returned by ``completion_key``.
+            value (str): The completion text.
+        """
+        now = time.time()
+        size = len(value.encode("utf-8"))
+        conn = self._connect()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            conn.execute(
+                "INSERT OR REPLACE INTO completions (key, value, size, created, accessed) VALUES (?, ?, ?, ?, ?)",
+                (key, value, size, now, now),
+            )
+            self._evict(conn, now)
+            conn.execute("COMMIT")
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+
+    def _evict(self, conn: sqlite3.Connection, now: float) -> None:
+        """Drop expired entries, then least recently used ones until under ``max_bytes``."""
+        if self.ttl is not None:
+            conn.execute("DELETE FROM completions WHERE created < ?", (now - self.ttl,))
+        total = conn.execute("SELECT COALESCE(SUM(size), 0) FROM completions").fetchone()[0]
+        if total <= self.max_bytes:
+            return
+        for key, size in conn.execute("SELECT key, size FROM completions ORDER BY accessed ASC").fetchall():
+            conn.execute("DELETE FROM completions WHERE key = ?", (key,))
+            total -= size
+            if total <= self.max_bytes:
+                break
+
+    def clear(self) -> None:
+        """Remove every cached completion."""
+        self._connect().execute("DELETE FROM completions")
+
+    def stats(self) -> Dict[str, int]:
+        """
+        Report cache metrics.
+
+        Returns:
+            dict: Hit and miss counters for this process plus entry count and stored bytes.
+        """
+        entries, size = self._connect().execute(
+            "SELECT COUNT(*), COALESCE(SUM(size), 0) FROM completions"
+        ).fetchone()
+        with self._lock:
+            return {"hits": self.hits, "misses": self.misses, "entries": entries, "bytes": size}
+
+
+_default_cache: Optional[CompletionCache] = None
+_default_cache_lock = threading.Lock()
+
+
+def get_default_cache() -> CompletionCache:
+    """
+    Return the process-wide completion cache, creating it on first use.
+
+    The location can be overridden with the ``COMPLETION_CACHE_PATH`` env variable.
+
+    Returns:
+        CompletionCache: The shared cache.
+    """
+    global _default_cache
+    if _default_cache is None:
+        with _default_cache_lock:
+            if _default_cache is None:
+                _default_cache = CompletionCache(os.getenv("COMPLETION_CACHE_PATH", DEFAULT_CACHE_PATH))
+    return _default_cache
@@ -0,0 +1,289 @@
+import json
+import logging
+import argparse
+from typing import Dict, Any, List, Optional, Tuple, Iterable, Iterator, Callable, Union, BinaryIO, Sized
+from reportlab.lib.pagesizes import letter
+from reportlab.lib import colors
+from reportlab.lib.units import inch
+from reportlab.lib.styles import ParagraphStyle
+from reportlab.pdfbase.pdfmetrics import stringWidth
+from reportlab.pdfgen.canvas import Canvas
+from reportlab.platypus import SimpleDocTemplate, Paragraph, Spacer, PageBreak, Flowable
+from para2pdf import get_advanced_styles, build_recipe_elements
+
+# Configure logging
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+logger = logging.getLogger(__name__)
+
+TOC_ROW_HEIGHT = 18
+
+Recipes = Union[Iterable[Dict[str, Any]], Callable[[], Iterable[Dict[str, Any]]]]
+
+
+class _FlowableStream(list):
+    """
+    Flowable list that refills itself from an iterator of chunks as platypus consumes it.
+
+    ``doc.build`` pops flowables off the front of its list, so handing it this
+    list keeps only the current recipe's flowables in memory.
+    """
+
+    def __init__(self, chunks: Iterable[List]):
+        super().__init__()
+        self._chunks = iter(chunks)
+
+    def __len__(self) -> int:
+        while not list.__len__(self):
+            chunk = next(self._chunks, None)
+            if chunk is None:
+                break
+            self.extend(chunk)
+        return list.__len__(self)
+
+
+class _CookbookCanvas(Canvas):
+    """Canvas that lets the document fill in forms, such as the table of contents, right before saving."""
+
+    before_save: Optional[Callable[[Canvas], None]] = None
+
+    def save(self):
+        if self.before_save is not None:
+            self.before_save(self)
+        super().save()
+
+
+class _CookbookTemplate(SimpleDocTemplate):
+    """Document template that bookmarks each recipe title and records its page."""
+
+    def __init__(self, output, chapter_style: str, **kwargs):
+        super().__init__(output, **kwargs)
+        self.chapter_style = chapter_style
+        self.entries: List[Tuple[str, int]] = []
+        self.toc_pages: List["_TocPage"] = []
+
+    def beforeDocument(self):
+        self.canv.before_save = self._fill_toc
+
+    def afterFlowable(self, flowable):
+        if isinstance(flowable, _TocPage):
+            self.toc_pages.append(flowable)
+        elif isinstance(flowable, Paragraph) and flowable.style.name == self.chapter_style:
+            title = flowable.getPlainText()
+            key = f"recipe-{len(self.entries)}"
+            self.canv.bookmarkPage(key)
+            self.canv.addOutlineEntry(title, key, level=0)
+            self.entries.append((title, self.page))
+
+    def _fill_toc(self, canv: Canvas) -> None:
+        for toc_page in self.toc_pages:
+            toc_page.fill(canv, self.entries)
+
+
+class _TocPage(Flowable):
+    """
+    One reserved table of contents page.
+
+    Rows have a fixed height, so the page can be laid out and its links placed
+    before any recipe is drawn; the titles and page numbers are drawn into a
+    PDF form once the whole book has been laid out, and the page shows that form.
+    """
+
+    def __init__(self, name: str, first: int, count: int, styles: Dict, heading: bool):
+        super().__init__()
+        self.name = name
+        self.first = first
+        self.count = count
+        self.body_style = styles["body"]
+        self.heading = Paragraph("Contents", styles["heading"]) if heading else None
+
+    def wrap(self, availWidth, availHeight):
+        self.width, self.height = availWidth, availHeight
+        return availWidth, availHeight
+
+    def _top(self) -> float:
+        """Y coordinate of the first row, below the heading if this page has one."""
+        if self.heading is None:
+            return self.height
+        return self.height - _heading_height(self.heading, self.width)
+
+    def draw(self):
+        if self.heading is not None:
+            _, height = self.heading.wrap(self.width, self.height)
+            self.heading.drawOn(self.canv, 0, self.height - height)
+        self.canv.doForm(self.name)
+        top = self._top()
+        for row in range(self.count):
+            y = top - (row + 1) * TOC_ROW_HEIGHT
+            # Destinations are named, so the links resolve to recipes laid out after this page
+            self.canv.linkRect("", f"recipe-{self.first + row}", (0, y, self.width, y + TOC_ROW_HEIGHT), relative=1)
+
+    def fill(self, canv: Canvas, entries: List[Tuple[str, int]]) -> None:
+        """Define this page's form with the rows' titles and page numbers."""
+        font, size = self.body_style.fontName, self.body_style.fontSize
+        number_width = 0.8 * inch
+        top = self._top()
+        canv.beginForm(self.name, 0, 0, self.width, self.height)
+        canv.setStrokeColor(colors.HexColor('#ECF0F1'))
+        canv.setLineWidth(0.25)
+        for row, (title, page) in enumerate(entries[self.first:self.first + self.count]):
+            y = top - (row + 1) * TOC_ROW_HEIGHT
+            canv.setFillColor(self.body_style.textColor)
+            canv.setFont(font, size)
+            canv.drawString(0, y + 5, _fit(title, font, size, self.width - number_width))
+            canv.setFont('Times-Roman', 11)
+            canv.drawRightString(self.width, y + 5, str(page))
+            canv.line(0, y, self.width, y)
+        canv.endForm()
+
+
+def _heading_height(heading: Paragraph, width: float) -> float:
+    _, height = heading.wrap(width, 10 * inch)
+    return height + heading.style.spaceAfter
+
+
+def _fit(text: str, font: str, size: float, width: float) -> str:
+    """Shorten ``text`` with an ellipsis so it fits on one line of ``width`` points."""
+    if stringWidth(text, font, size) <= width:
+        return text
+    while text and stringWidth(text + "\u2026", font, size) > width:
+        text = text[:-1]
+    return text.rstrip() + "\u2026"
+
+
+def _draw_page_number(canvas, doc) -> None:
+    canvas.saveState()
+    canvas.setFont('Times-Roman', 9)
+    canvas.setFillColor(colors.HexColor('#7F8C8D'))
+    canvas.drawCentredString(doc.pagesize[0] / 2, 0.4 * inch, str(doc.page))
+    canvas.restoreState()
+
+
+def _toc_pages(count: int, width: float, height: float, styles: Dict) -> List:
+    """Reserve enough table of contents pages for ``count`` recipes."""
+    heading = _heading_height(Paragraph("Contents", styles["heading"]), width)
+    elements = []
+    first = 0
+    while first < count or not elements:
+        rows = int((height - (heading if not elements else 0)) // TOC_ROW_HEIGHT)
+        rows = min(rows, count - first)
+        elements.append(_TocPage(f"toc-{len(elements) // 2}", first, rows, styles, heading=not elements))
+        elements.append(PageBreak())
+        first += rows
+    return elements
+
+
+def build_cookbook(
+    recipes: Recipes,
+    output: Union[str, BinaryIO],
+    title: str = "Cookbook",
+    chart_backend: str = "vector",
+    toc: bool = True,
+) -> List[Tuple[str, int]]:
+    """
+    Render many recipes into a single cookbook PDF.
+
+    Recipes are laid out one at a time as they are read, so only the
+    current recipe's flowables are held in memory. Every recipe starts on a
+    new page and gets a PDF bookmark; styles are built once for the whole
+    book, and identical images are embedded once by ReportLab.
+
+    The book is laid out in a single pass, including the printed table of
+    contents: its pages are reserved after the cover, one fixed-height row
+    per recipe, and filled in with the titles and page numbers once the
+    last recipe is laid out. Reserving them needs the number of recipes up
+    front, so ``recipes`` must be sized (a sequence, ``read_recipe_files``
+    or a callable returning either); other iterables get bookmarks only.
+
+    Args:
+        recipes: Recipe dictionaries as produced by ``RecipeFinder``, or a callable returning them.
+        output (str or BinaryIO): Output filename or writable binary stream.
+        title (str): Cookbook title for the cover page and PDF metadata.
+        chart_backend (str): "vector" or "raster", see ``para2pdf.build_recipe_elements``.
+        toc (bool): Whether to print a table of contents after the cover.
+
+    Returns:
+        list: The (title, page number) of every recipe in the book.
+    """
+    styles = get_advanced_styles()
+    styles["cover"] = ParagraphStyle(
+        "CookbookCoverStyle",
+        parent=styles["title"],
+        fontSize=34,
+        leading=40,
+        alignment=1,  # Centered
+    )
+
+    if callable(recipes):
+        recipes = recipes()
+    if toc and not isinstance(recipes, Sized):
+        logger.warning("Recipes have no length, building the cookbook without a table of contents.")
+        toc = False
+
+    doc = _CookbookTemplate(
+        output,
+        chapter_style=styles["title"].name,
+        pagesize=letter,
+        rightMargin=72,
+        leftMargin=72,
+        topMargin=72,
+        bottomMargin=36,
+        title=title,
+    )
+
+    def chunks() -> Iterator[List]:
+        yield [
+            Spacer(1, 2.5 * inch),
+            Paragraph(title, styles["cover"]),
+            PageBreak(),
+        ]
+        if toc:
+            # Frames pad their content by 6 points on each side
+            yield _toc_pages(len(recipes), doc.width - 12, doc.height - 12, styles)
+        for i, recipe_data in enumerate(recipes):
+            elements = build_recipe_elements(recipe_data, styles, chart_backend)
+            if i:
+                elements.insert(0, PageBreak())
+            yield elements
+
+    doc.build(_FlowableStream(chunks()), onLaterPages=_draw_page_number, canvasmaker=_CookbookCanvas)
+    logger.info(f"Cookbook generated with {len(doc.entries)} recipes.")
+    return doc.entries
+
+
+class RecipeFiles:
+    """Recipe JSON files read lazily and in order; sized, so a cookbook can reserve its table of contents."""
+
+    def __init__(self, paths: List[str]):
+        self.paths = list(paths)
+
+    def __len__(self) -> int:
+        return len(self.paths)
+
+    def __iter__(self) -> Iterator[Dict[str, Any]]:
+        for path in self.paths:
+            with open(path, encoding="utf-8") as f:
+                yield json.load(f)
+
+
+def read_recipe_files(paths: List[str]) -> RecipeFiles:
+    """
+    Lazily read recipe JSON files, such as ``run.py --batch --format json`` output.
+
+    Args:
+        paths (list): Paths of JSON files with one recipe each.
+
+    Returns:
+        RecipeFiles: A sized iterable yielding the recipes in order; each file is read once per iteration.
+    """
+    return RecipeFiles(paths)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Combine recipe JSON files into one cookbook PDF.")
+    parser.add_argument("recipes", nargs="+", help="Recipe JSON files, e.g. from run.py --batch --format json.")
+    parser.add_argument("-o", "--output", default="cookbook.pdf", help="Output PDF path.")
+    parser.add_argument("--title", default="Cookbook", help="Cookbook title.")
+    parser.add_argument("--no-toc", action="store_true", help="Skip the table of contents.")
+    parser.add_argument("--chart-backend", choices=["vector", "raster"], default="vector")
+    args = parser.parse_args()
+    build_cookbook(read_recipe_files(args.recipes), args.output, args.title, args.chart_backend, not args.no_toc)
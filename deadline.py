@@ -0,0 +1,216 @@
+import time
+import asyncio
+import logging
+import contextvars
+from contextlib import contextmanager
+from typing import Optional, Dict, Callable, Awaitable, Any, Iterator
+
+# Configure logging
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+logger = logging.getLogger(__name__)
+
+# Relative share of the remaining budget each pipeline stage may use, in pipeline order
+STAGE_WEIGHTS: Dict[str, float] = {
+    "extraction": 1.0,
+    "search": 1.0,
+    "info": 1.0,
+    "rewrite": 5.0,
+}
+
+_current: contextvars.ContextVar[Optional["Deadline"]] = contextvars.ContextVar("recipe_deadline", default=None)
+
+
+class DeadlineExceeded(TimeoutError):
+    """Raised when a request or one of its stages runs out of time."""
+
+    def __init__(self, stage: Optional[str] = None):
+        self.stage = stage
+        super().__init__(f"Deadline exceeded{f' in {stage}' if stage else ''}")
+
+
+class Deadline:
+    """
+    A point in time by which a request, or one stage of it, must finish.
+
+    Stage deadlines are carved out of the request deadline with
+    ``for_stage``: a stage gets its weight's share of the time remaining
+    for it and the stages after it, so time a fast stage leaves unused
+    flows to the later ones.
+    """
+
+    def __init__(self, seconds: float, stage: Optional[str] = None, expires_at: Optional[float] = None):
+        """
+        Args:
+            seconds (float): Budget from now, ignored when ``expires_at`` is given.
+            stage (str): Stage the deadline belongs to, None for the whole request.
+            expires_at (float): Absolute ``time.monotonic()`` expiry.
+        """
+        self.expires_at = expires_at if expires_at is not None else time.monotonic() + seconds
+        self.stage = stage
+
+    def remaining(self) -> float:
+        """Seconds left, never negative."""
+        return max(0.0, self.expires_at - time.monotonic())
+
+    def expired(self) -> bool:
+        return time.monotonic() >= self.expires_at
+
+    def check(self) -> None:
+        """
+        Raises:
+            DeadlineExceeded: If the deadline has passed.
+        """
+        if self.expired():
+            raise DeadlineExceeded(self.stage)
+
+    def timeout(self, cap: Optional[float] = None) -> float:
+        """
+        Return a timeout for a call made under this deadline.
+
+        Args:
+            cap (float): The call's own timeout, None for no cap.
+
+        Returns:
+            float: The smaller of the remaining time and ``cap``.
+
+        Raises:
+            DeadlineExceeded: If no time is left.
+        """
+        self.check()
+        remaining = self.remaining()
+        return remaining if cap is None else min(remaining, cap)
+
+    def for_stage(self, stage: str) -> "Deadline":
+        """
+        Carve the deadline of one pipeline stage out of this one.
+
+        Args:
+            stage (str): A stage in ``STAGE_WEIGHTS``; unknown stages get the whole remaining budget.
+
+        Returns:
+            Deadline: The stage deadline, never later than this one.
+        """
+        stages = list(STAGE_WEIGHTS)
+        if stage not in STAGE_WEIGHTS:
+            return Deadline(0, stage, self.expires_at)
+        remaining_weight = sum(STAGE_WEIGHTS[name] for name in stages[stages.index(stage):])
+        share = self.remaining() * STAGE_WEIGHTS[stage] / remaining_weight
+        return Deadline(0, stage, min(self.expires_at, time.monotonic() + share))
+
+    def __repr__(self) -> str:
+        return f"Deadline(remaining={self.remaining():.3f}, stage={self.stage!r})"
+
+
+def current_deadline() -> Optional[Deadline]:
+    """Return the deadline of the innermost scope, None outside any."""
+    return _current.get()
+
+
+@contextmanager
+def deadline_scope(deadline: Optional[Deadline]) -> Iterator[Optional[Deadline]]:
+    """
+    Make ``deadline`` the current deadline for calls made in this context.
+
+    Args:
+        deadline (Deadline): The deadline, None to leave the context unbounded.
+    """
+    token = _current.set(deadline)
+    try:
+        yield deadline
+    finally:
+        _current.reset(token)
+
+
+@contextmanager
+def stage_deadline(stage: str) -> Iterator[Optional[Deadline]]:
+    """
+    Run a pipeline stage under its share of the current deadline.
+
+    Args:
+        stage (str): The stage name.
+
+    Raises:
+        DeadlineExceeded: If the request deadline has already passed.
+    """
+    parent = _current.get()
+    if parent is None:
+        yield None
+        return
+    parent.check()
+    with deadline_scope(parent.for_stage(stage)) as deadline:
+        yield deadline
+
+
+async def run_stage(stage: str, fn: Callable[[], Awaitable[Any]]) -> Any:
+    """
+    Await a pipeline stage under its share of the current deadline, cancelling it when the share runs out.
+
+    Args:
+        stage (str): The stage name.
+        fn (Callable): Returns the awaitable to run.
+
+    Returns:
+        The result of the awaitable.
+
+    Raises:
+        DeadlineExceeded: If the stage doesn't finish in time.
+    """
+    with stage_deadline(stage) as deadline:
+        if deadline is None:
+            return await fn()
+        try:
+            return await asyncio.wait_for(fn(), deadline.remaining())
+        except asyncio.TimeoutError:
+            raise DeadlineExceeded(stage) from None
+
+
+def check_deadline() -> None:
+    """
+    Raise if the current deadline has passed; stages call this before treating a failure as an ordinary error.
+
+    Raises:
+        DeadlineExceeded: If the current deadline has passed.
+    """
+    deadline = _current.get()
+    if deadline is not None:
+        deadline.check()
+
+
+def deadline_timeout(cap: Optional[float] = None) -> Optional[float]:
+    """
+    Clamp a call's timeout to the current deadline.
+
+    Args:
+        cap (float): The call's own timeout, None for no cap.
+
+    Returns:
+        Optional[float]: ``cap`` when no deadline is set, otherwise the smaller of it and the time left.
+
+    Raises:
+        DeadlineExceeded: If the current deadline has passed.
+    """
+    deadline = _current.get()
+    if deadline is None:
+        return cap
+    return deadline.timeout(cap)
+
+
+def stop_before_deadline(wait: Callable[[Any], float]) -> Callable[[Any], bool]:
+    """
+    Build a tenacity ``stop`` condition that gives up instead of sleeping past the deadline.
+
+    Args:
+        wait (Callable): The retry's wait strategy, used to predict the next sleep.
+
+    Returns:
+        Callable: A stop callable raising ``DeadlineExceeded``, chained to the last
+            attempt's error, when the next sleep wouldn't leave time for another attempt.
+    """
+    def stop(retry_state) -> bool:
+        deadline = _current.get()
+        if deadline is not None and deadline.remaining() <= wait(retry_state):
+            error = retry_state.outcome.exception() if retry_state.outcome is not None else None
+            logger.info(f"Not retrying, the next attempt would start after the deadline: {error}")
+            raise DeadlineExceeded(deadline.stage) from error
+        return False
+    return stop
@@ -0,0 +1,330 @@
+import os
+import asyncio
+import logging
+import threading
+import weakref
+from typing import Optional, Dict, Any, List, Tuple
+from instrumentation import get_default_tracer
+from cassette import get_default_cassette
+from spoonacular_quota import get_default_scheduler, endpoint_cost, MAX_THROTTLE_RETRIES
+from deadline import deadline_timeout
+
+# Configure logging
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+logger = logging.getLogger(__name__)
+
+SPOONACULAR_BASE_URL = "https://api.spoonacular.com"
+
+
+class SpoonacularClient:
+    """
+    Thread-safe HTTP client for the Spoonacular API.
+
+    All calls share one ``requests.Session`` whose adapter keeps a pool of
+    keep-alive connections per host, so consecutive lookups reuse the same
+    TCP+TLS connection instead of paying the handshake every time. The
+    session, and ``requests`` itself, are only loaded on the first request.
+    """
+
+    def __init__(
+        self,
+        api_key: Optional[str] = None,
+        base_url: Optional[str] = None,
+        pool_connections: int = 10,
+        pool_maxsize: int = 10,
+        connect_timeout: float = 3.05,
+        read_timeout: float = 15.0,
+    ):
+        """
+        Args:
+            api_key (str): Spoonacular API key, defaults to the ``spoonacular_API`` env variable.
+            base_url (str): API root, override to point at a local stub server.
+            pool_connections (int): Number of per-host pools to keep.
+            pool_maxsize (int): Maximum keep-alive connections kept per host.
+            connect_timeout (float): Seconds to wait for a connection.
+            read_timeout (float): Seconds to wait for a response.
+        """
+        self.api_key = api_key if api_key is not None else os.getenv("spoonacular_API")
+        self.base_url = (base_url or os.getenv("SPOONACULAR_BASE_URL") or SPOONACULAR_BASE_URL).rstrip("/")
+        self.timeout: Tuple[float, float] = (connect_timeout, read_timeout)
+
+        self.pool_connections = pool_connections
+        self.pool_maxsize = pool_maxsize
+        self._adapter = None
+        self._session = None
+        self._session_lock = threading.Lock()
+
+    def _get_session(self):
+        """Return the pooled session, creating it on first use."""
+        if self._session is None:
+            with self._session_lock:
+                if self._session is None:
+                    import requests
+                    from requests.adapters import HTTPAdapter
+
+                    adapter = HTTPAdapter(pool_connections=self.pool_connections, pool_maxsize=self.pool_maxsize)
+                    session = requests.Session()
+                    session.mount("http://", adapter)
+                    session.mount("https://", adapter)
+                    self._adapter = adapter
+                    self._session = session
+        return self._session
+
+    def get(self, path: str, params: Optional[Dict[str, Any]] = None, timeout: Optional[Any] = None) -> Any:
+        """
+        Send a GET request to the Spoonacular API and decode the JSON body.
+
+        Args:
+            path (str): Endpoint path, e.g. "/recipes/findByIngredients".
+            params (dict): Query parameters; the API key is added automatically.
+            timeout: Optional override of the (connect, read) timeout.
+
+        Returns:
+            The decoded JSON response.
+
+        Raises:
+            requests.RequestException: On connection errors or non-2xx responses.
+            spoonacular_quota.QuotaExhausted: When the daily point quota can't cover the request.
+            cassette.CassetteMiss: When replaying a cassette that didn't record this request.
+            deadline.DeadlineExceeded: When the current deadline passes before the request is sent.
+        """
+        cassette = get_default_cassette()
+        if cassette is not None:
+            return cassette.through("spoonacular", [path, params], lambda: self._request(path, params, timeout))
+        return self._request(path, params, timeout)
+
+    def _request(self, path: str, params: Optional[Dict[str, Any]], timeout: Optional[Any]) -> Any:
+        query = {"apiKey": self.api_key}
+        query.update(params or {})
+        scheduler = get_default_scheduler()
+        cost = endpoint_cost(path, params)
+        for attempt in range(MAX_THROTTLE_RETRIES + 1):
+            scheduler.acquire(cost)
+            # Neither phase may outlive the current deadline
+            connect_timeout, read_timeout = timeout or self.timeout
+            response = self._get_session().get(
+                f"{self.base_url}{path}",
+                params=query,
+                timeout=(deadline_timeout(connect_timeout), deadline_timeout(read_timeout)),
+            )
+            # A throttled call queues again behind the pause instead of failing
+            if not scheduler.observe(response.status_code, response.headers) or attempt == MAX_THROTTLE_RETRIES:
+                break
+        response.raise_for_status()
+        get_default_tracer().current_span().add("bytes_in", len(response.content))
+        return response.json()
+
+    def find_by_ingredients(self, ingredients: str, number: int = 1, ranking: int = 1) -> Any:
+        """
+        Search recipes that use the given comma separated ingredients.
+
+        Args:
+            ingredients (str): Comma separated ingredient list.
+            number (int): Number of recipes to return.
+            ranking (int): 1 maximizes used ingredients, 2 minimizes missing ones.
+
+        Returns:
+            list: A list of dictionaries representing the matching recipes.
+        """
+        params = {"ingredients": ingredients, "ranking": ranking, "number": number}
+        return self.get("/recipes/findByIngredients", params)
+
+    def get_recipe_information(self, recipe_id: int, include_nutrition: bool = True) -> Any:
+        """
+        Fetch detailed information for a single recipe.
+
+        Args:
+            recipe_id (int): Spoonacular recipe id.
+            include_nutrition (bool): Whether to include nutrition data.
+
+        Returns:
+            dict: A dictionary representing the detailed recipe information.
+        """
+        params = {"includeNutrition": include_nutrition}
+        return self.get(f"/recipes/{recipe_id}/information", params)
+
+    def get_recipe_information_bulk(self, recipe_ids: List[int], include_nutrition: bool = True) -> Any:
+        """
+        Fetch detailed information for several recipes in one call.
+
+        Args:
+            recipe_ids (list): Spoonacular recipe ids.
+            include_nutrition (bool): Whether to include nutrition data.
+
+        Returns:
+            list: A list of dictionaries, one per recipe found.
+        """
+        params = {"ids": ",".join(str(i) for i in recipe_ids), "includeNutrition": include_nutrition}
+        return self.get("/recipes/informationBulk", params)
+
+    def connection_stats(self) -> Dict[str, int]:
+        """
+        Report how many requests were served over how many connections.
+
+        Returns:
+            dict: ``requests``, ``connections`` and ``reused`` counts summed over all host pools.
+        """
+        if self._adapter is None:
+            return {"requests": 0, "connections": 0, "reused": 0}
+        pools = self._adapter.poolmanager.pools
+        num_requests = 0
+        num_connections = 0
+        for key in list(pools.keys()):
+            pool = pools.get(key)
+            if pool is None:
+                continue
+            num_requests += pool.num_requests
+            num_connections += pool.num_connections
+        return {
+            "requests": num_requests,
+            "connections": num_connections,
+            "reused": max(num_requests - num_connections, 0),
+        }
+
+    def close(self) -> None:
+        """Close all pooled connections."""
+        if self._session is not None:
+            self._session.close()
+
+
+class AsyncSpoonacularClient:
+    """
+    Asyncio HTTP client for the Spoonacular API built on ``httpx.AsyncClient``.
+
+    Mirrors ``SpoonacularClient`` so the async pipeline can share one
+    keep-alive pool among hundreds of concurrent requests.
+    """
+
+    def __init__(
+        self,
+        api_key: Optional[str] = None,
+        base_url: Optional[str] = None,
+        max_connections: int = 100,
+        max_keepalive_connections: int = 20,
+        connect_timeout: float = 3.05,
+        read_timeout: float = 15.0,
+    ):
+        """
+        Args:
+            api_key (str): Spoonacular API key, defaults to the ``spoonacular_API`` env variable.
+            base_url (str): API root, override to point at a local stub server.
+            max_connections (int): Maximum concurrent connections.
+            max_keepalive_connections (int): Maximum idle keep-alive connections kept.
+            connect_timeout (float): Seconds to wait for a connection.
+            read_timeout (float): Seconds to wait for a response.
+        """
+        import httpx
+
+        self.api_key = api_key if api_key is not None else os.getenv("spoonacular_API")
+        self.base_url = (base_url or os.getenv("SPOONACULAR_BASE_URL") or SPOONACULAR_BASE_URL).rstrip("/")
+        self.timeout = httpx.Timeout(read_timeout, connect=connect_timeout)
+        self._client = httpx.AsyncClient(
+            limits=httpx.Limits(
+                max_connections=max_connections,
+                max_keepalive_connections=max_keepalive_connections,
+            ),
+            timeout=self.timeout,
+        )
+
+    async def get(self, path: str, params: Optional[Dict[str, Any]] = None) -> Any:
+        """
+        Send a GET request to the Spoonacular API and decode the JSON body.
+
+        Args:
+            path (str): Endpoint path, e.g. "/recipes/findByIngredients".
+            params (dict): Query parameters; the API key is added automatically.
+
+        Returns:
+            The decoded JSON response.
+
+        Raises:
+            httpx.HTTPError: On connection errors or non-2xx responses.
+            spoonacular_quota.QuotaExhausted: When the daily point quota can't cover the request.
+            cassette.CassetteMiss: When replaying a cassette that didn't record this request.
+            deadline.DeadlineExceeded: When the current deadline passes before the request is sent.
+        """
+        cassette = get_default_cassette()
+        if cassette is not None:
+            return await cassette.athrough("spoonacular", [path, params], lambda: self._request(path, params))
+        return await self._request(path, params)
+
+    async def _request(self, path: str, params: Optional[Dict[str, Any]]) -> Any:
+        query = {"apiKey": self.api_key}
+        query.update(params or {})
+        scheduler = get_default_scheduler()
+        cost = endpoint_cost(path, params)
+        for attempt in range(MAX_THROTTLE_RETRIES + 1):
+            await scheduler.aacquire(cost)
+            response = await self._client.get(f"{self.base_url}{path}", params=query, timeout=self._timeout())
+            if not scheduler.observe(response.status_code, response.headers) or attempt == MAX_THROTTLE_RETRIES:
+                break
+        response.raise_for_status()
+        get_default_tracer().current_span().add("bytes_in", len(response.content))
+        return response.json()
+
+    def _timeout(self) -> Any:
+        """The client timeout, clamped to the current deadline."""
+        import httpx
+
+        return httpx.Timeout(
+            deadline_timeout(self.timeout.read),
+            connect=deadline_timeout(self.timeout.connect),
+            write=deadline_timeout(self.timeout.write),
+            pool=deadline_timeout(self.timeout.pool),
+        )
+
+    async def find_by_ingredients(self, ingredients: str, number: int = 1, ranking: int = 1) -> Any:
+        """Async version of ``SpoonacularClient.find_by_ingredients``."""
+        params = {"ingredients": ingredients, "ranking": ranking, "number": number}
+        return await self.get("/recipes/findByIngredients", params)
+
+    async def get_recipe_information(self, recipe_id: int, include_nutrition: bool = True) -> Any:
+        """Async version of ``SpoonacularClient.get_recipe_information``."""
+        params = {"includeNutrition": include_nutrition}
+        return await self.get(f"/recipes/{recipe_id}/information", params)
+
+    async def aclose(self) -> None:
+        """Close all pooled connections."""
+        await self._client.aclose()
+
+
+_default_client: Optional[SpoonacularClient] = None
+_default_client_lock = threading.Lock()
+
+
+def get_default_client() -> SpoonacularClient:
+    """
+    Return the process-wide Spoonacular client, creating it on first use.
+
+    Returns:
+        SpoonacularClient: The shared client.
+    """
+    global _default_client
+    if _default_client is None:
+        with _default_client_lock:
+            if _default_client is None:
+                logger.info("Creating shared Spoonacular client.")
+                _default_client = SpoonacularClient()
+    return _default_client
+
+
+_default_async_clients: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, AsyncSpoonacularClient]" = weakref.WeakKeyDictionary()
+
+
+def get_default_async_client() -> AsyncSpoonacularClient:
+    """
+    Return the async Spoonacular client shared by the running event loop.
+
+    ``httpx.AsyncClient`` connections are bound to the loop that opened them,
+    so one client is kept per loop rather than per process.
+
+    Returns:
+        AsyncSpoonacularClient: The shared client for the current loop.
+    """
+    loop = asyncio.get_running_loop()
+    client = _default_async_clients.get(loop)
+    if client is None:
+        logger.info("Creating shared async Spoonacular client.")
+        client = AsyncSpoonacularClient()
+        _default_async_clients[loop] = client
+    return client
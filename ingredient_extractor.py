@@ -0,0 +1,209 @@
+import os
+import re
+import json
+import logging
+import threading
+from collections import deque
+from typing import Optional, Dict, List, Iterable, Tuple
+from html import escape
+from ingredient_lexicon import INGREDIENTS, SYNONYMS
+from recipe_index import singularize
+
+# Configure logging
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+logger = logging.getLogger(__name__)
+
+# Words that carry no ingredient information and don't count against confidence
+STOPWORDS = frozenset("""
+a an the and or but with m s t ll ve d of for to in on at from by some any few little lot lots bit
+i im i'm me my we our you your have has had got get want wanna would like love make making cook cooking
+can could should please help need use using left over leftover leftovers fridge pantry there here
+is are was be just also only too very fresh frozen dried chopped sliced diced whole large small
+cup cups tbsp tsp tablespoon tablespoons teaspoon teaspoons pound pounds lb lbs oz ounce ounces gram grams
+kg g ml liter liters piece pieces clove can cans jar jars bunch handful pinch dash
+what something dish recipe recipes meal dinner lunch breakfast tonight today
+""".split())
+
+# Words that exclude what follows them, which an ingredient list can't express
+NEGATIONS = frozenset(singularize(word) for word in """
+without no not except excluding exclude minus avoid don dont
+""".split())
+
+TOKEN_RE = re.compile(r"[a-z]+")
+
+
+def tokenize(text: str) -> List[str]:
+    """
+    Split text into lowercase, singularized word tokens.
+
+    Args:
+        text (str): Free text.
+
+    Returns:
+        list: The tokens in order.
+    """
+    return [singularize(token) for token in TOKEN_RE.findall(text.lower())]
+
+
+class IngredientExtractor:
+    """
+    Lexicon-driven ingredient extractor built on a token-level Aho-Corasick automaton.
+
+    Every lexicon entry and synonym is tokenized (and singularized) into a
+    trie; failure links let a single left-to-right pass over the query find
+    all multi-word matches. Overlapping matches are resolved leftmost-longest,
+    so "chocolate chips" wins over "chocolate". Confidence is the share of
+    non-stopword tokens covered by a match, and zero when the query negates
+    something ("chicken without garlic") so the LLM handles the exclusion.
+    """
+
+    def __init__(self, entries: Optional[Dict[str, Iterable[str]]] = None, min_confidence: float = 0.75):
+        """
+        Args:
+            entries (dict): Canonical ingredient name to its synonyms. Defaults to the
+                built-in lexicon, extended by the JSON file in ``INGREDIENT_LEXICON_PATH``.
+            min_confidence (float): Confidence at or above which the local result is trusted.
+        """
+        self.min_confidence = min_confidence
+        self._goto: List[Dict[str, int]] = [{}]
+        self._fail: List[int] = [0]
+        self._output: List[List[Tuple[int, str]]] = [[]]
+        for canonical, synonyms in (entries or default_entries()).items():
+            self._add(canonical, canonical)
+            for synonym in synonyms:
+                self._add(synonym, canonical)
+        self._build_failure_links()
+
+    def _add(self, phrase: str, canonical: str) -> None:
+        tokens = tokenize(phrase)
+        if not tokens:
+            return
+        state = 0
+        for token in tokens:
+            next_state = self._goto[state].get(token)
+            if next_state is None:
+                next_state = len(self._goto)
+                self._goto[state][token] = next_state
+                self._goto.append({})
+                self._fail.append(0)
+                self._output.append([])
+            state = next_state
+        if not any(length == len(tokens) for length, _ in self._output[state]):
+            self._output[state].append((len(tokens), canonical))
+
+    def _build_failure_links(self) -> None:
+        queue = deque(self._goto[0].values())
+        while queue:
+            state = queue.popleft()
+            for token, child in self._goto[state].items():
+                queue.append(child)
+                fallback = self._fail[state]
+                while fallback and token not in self._goto[fallback]:
+                    fallback = self._fail[fallback]
+                self._fail[child] = self._goto[fallback].get(token, 0)
+                self._output[child] = self._output[child] + self._output[self._fail[child]]
+
+    def extract(self, text: str) -> Tuple[List[str], float]:
+        """
+        Extract canonical ingredient names from free text.
+
+        Args:
+            text (str): The user query.
+
+        Returns:
+            tuple: The ingredient names in order of appearance and the confidence in [0, 1].
+        """
+        tokens = tokenize(text)
+        matches = []
+        state = 0
+        for end, token in enumerate(tokens):
+            while state and token not in self._goto[state]:
+                state = self._fail[state]
+            state = self._goto[state].get(token, 0)
+            for length, canonical in self._output[state]:
+                matches.append((end - length + 1, end, canonical))
+
+        # Leftmost-longest, non-overlapping
+        matches.sort(key=lambda match: (match[0], match[0] - match[1]))
+        ingredients, covered, last_end = [], set(), -1
+        for start, end, canonical in matches:
+            if start <= last_end:
+                continue
+            last_end = end
+            covered.update(range(start, end + 1))
+            if canonical not in ingredients:
+                ingredients.append(canonical)
+
+        content = [i for i, token in enumerate(tokens) if token not in STOPWORDS]
+        if not ingredients or not content or NEGATIONS.intersection(tokens):
+            return ingredients, 0.0
+        confidence = sum(1 for i in content if i in covered) / len(content)
+        return ingredients, confidence
+
+    def extract_xml(self, text: str) -> Tuple[str, float]:
+        """
+        Extract ingredients and format them like the LLM extraction prompt's output.
+
+        Args:
+            text (str): The user query.
+
+        Returns:
+            tuple: The ``<ingredient_extraction>`` document and the confidence.
+        """
+        ingredients, confidence = self.extract(text)
+        return to_extraction_xml(ingredients), confidence
+
+
+def to_extraction_xml(ingredients: List[str]) -> str:
+    """
+    Format ingredient names as an ``<ingredient_extraction>`` document.
+
+    Args:
+        ingredients (list): Ingredient names.
+
+    Returns:
+        str: XML readable by ``xml_extract_ingredients``.
+    """
+    items = "".join(
+        f"<ingredient>{escape(name.title(), quote=False)}</ingredient>" for name in ingredients
+    )
+    return f"<ingredient_extraction><ingredients>{items}</ingredients></ingredient_extraction>"
+
+
+def default_entries() -> Dict[str, List[str]]:
+    """
+    Return the built-in lexicon merged with the optional ``INGREDIENT_LEXICON_PATH`` file.
+
+    The file maps canonical names to lists of synonyms, in the same shape as ``SYNONYMS``.
+
+    Returns:
+        dict: Canonical ingredient name to its synonyms.
+    """
+    entries: Dict[str, List[str]] = {name: [] for name in INGREDIENTS}
+    for canonical, synonyms in SYNONYMS.items():
+        entries.setdefault(canonical, []).extend(synonyms)
+    path = os.getenv("INGREDIENT_LEXICON_PATH")
+    if path:
+        with open(path, encoding="utf-8") as f:
+            for canonical, synonyms in json.load(f).items():
+                entries.setdefault(canonical, []).extend(synonyms)
+    return entries
+
+
+_default_extractor: Optional[IngredientExtractor] = None
+_default_extractor_lock = threading.Lock()
+
+
+def get_default_extractor() -> IngredientExtractor:
+    """
+    Return the process-wide ingredient extractor, building the automaton on first use.
+
+    Returns:
+        IngredientExtractor: The shared extractor.
+    """
+    global _default_extractor
+    if _default_extractor is None:
+        with _default_extractor_lock:
+            if _default_extractor is None:
+                _default_extractor = IngredientExtractor()
+    return _default_extractor
@@ -0,0 +1,107 @@
+INGREDIENTS = [
+    # Proteins
+    "chicken", "chicken breast", "chicken thighs", "chicken wings", "ground chicken",
+    "beef", "ground beef", "steak", "beef brisket", "short ribs", "veal",
+    "pork", "ground pork", "pork chops", "pork belly", "pork tenderloin", "bacon", "ham",
+    "sausage", "chorizo", "pancetta", "prosciutto", "salami", "pepperoni",
+    "lamb", "ground lamb", "turkey", "ground turkey", "duck",
+    "salmon", "tuna", "cod", "tilapia", "halibut", "trout", "sardines", "anchovies",
+    "shrimp", "prawns", "scallops", "crab", "lobster", "mussels", "clams", "squid",
+    "eggs", "egg whites", "egg yolks", "tofu", "tempeh", "seitan",
+    # Dairy
+    "milk", "whole milk", "buttermilk", "cream", "heavy cream", "sour cream", "half and half",
+    "butter", "unsalted butter", "ghee", "yogurt", "greek yogurt",
+    "cheese", "cheddar cheese", "mozzarella", "parmesan", "feta", "ricotta", "goat cheese",
+    "cream cheese", "blue cheese", "gruyere", "swiss cheese", "monterey jack", "mascarpone",
+    "cottage cheese", "brie", "halloumi", "paneer",
+    # Grains and starches
+    "rice", "white rice", "brown rice", "basmati rice", "jasmine rice", "arborio rice", "wild rice",
+    "quinoa", "couscous", "bulgur", "barley", "farro", "oats", "rolled oats", "polenta", "cornmeal",
+    "pasta", "spaghetti", "penne", "fusilli", "linguine", "fettuccine", "macaroni", "lasagna noodles",
+    "egg noodles", "rice noodles", "ramen noodles", "udon noodles", "soba noodles",
+    "bread", "bread crumbs", "panko", "tortillas", "corn tortillas", "flour tortillas", "pita bread",
+    "baguette", "buns", "croutons",
+    "flour", "all purpose flour", "whole wheat flour", "bread flour", "almond flour", "cornstarch",
+    "potatoes", "sweet potatoes", "yukon gold potatoes", "red potatoes",
+    # Vegetables
+    "onions", "red onion", "yellow onion", "white onion", "green onions", "shallots", "leeks",
+    "garlic", "ginger", "carrots", "celery", "bell peppers", "red bell pepper", "green bell pepper",
+    "jalapenos", "chili peppers", "serrano peppers", "poblano peppers", "habanero",
+    "tomatoes", "cherry tomatoes", "roma tomatoes", "sun dried tomatoes", "tomato paste", "tomato sauce",
+    "canned tomatoes", "crushed tomatoes", "diced tomatoes",
+    "spinach", "kale", "lettuce", "romaine lettuce", "arugula", "cabbage", "red cabbage", "bok choy",
+    "swiss chard", "collard greens", "broccoli", "cauliflower", "brussels sprouts",
+    "zucchini", "yellow squash", "butternut squash", "acorn squash", "pumpkin", "eggplant",
+    "cucumber", "asparagus", "green beans", "peas", "snow peas", "snap peas", "corn",
+    "mushrooms", "cremini mushrooms", "shiitake mushrooms", "portobello mushrooms",
+    "beets", "radishes", "turnips", "parsnips", "fennel", "artichokes", "artichoke hearts",
+    "avocado", "okra", "sweet corn", "watercress", "bean sprouts", "water chestnuts",
+    # Legumes, nuts and seeds
+    "black beans", "kidney beans", "pinto beans", "cannellini beans", "navy beans", "chickpeas",
+    "lentils", "red lentils", "green lentils", "edamame", "refried beans",
+    "almonds", "walnuts", "pecans", "cashews", "peanuts", "pistachios", "hazelnuts", "pine nuts",
+    "macadamia nuts", "peanut butter", "almond butter", "tahini",
+    "sesame seeds", "sunflower seeds", "pumpkin seeds", "chia seeds", "flax seeds", "poppy seeds",
+    # Fruits
+    "apples", "bananas", "oranges", "lemons", "limes", "lemon juice", "lime juice", "lemon zest",
+    "orange juice", "grapefruit", "strawberries", "blueberries", "raspberries", "blackberries",
+    "cranberries", "cherries", "grapes", "raisins", "dates", "figs", "prunes", "apricots",
+    "peaches", "pears", "plums", "mango", "pineapple", "papaya", "kiwi", "coconut",
+    "shredded coconut", "watermelon", "cantaloupe", "pomegranate",
+    # Herbs and spices
+    "basil", "parsley", "cilantro", "mint", "dill", "thyme", "rosemary", "oregano", "sage",
+    "tarragon", "chives", "bay leaves", "lemongrass", "curry leaves",
+    "salt", "sea salt", "kosher salt", "black pepper", "white pepper", "red pepper flakes",
+    "cayenne pepper", "paprika", "smoked paprika", "chili powder", "cumin", "ground cumin",
+    "coriander", "turmeric", "cinnamon", "nutmeg", "cloves", "allspice", "cardamom",
+    "star anise", "garam masala", "curry powder", "five spice powder", "italian seasoning",
+    "garlic powder", "onion powder", "mustard seeds", "fennel seeds", "saffron", "vanilla extract",
+    "vanilla bean",
+    # Pantry
+    "olive oil", "extra virgin olive oil", "vegetable oil", "canola oil", "coconut oil", "sesame oil",
+    "avocado oil", "vinegar", "balsamic vinegar", "red wine vinegar", "white wine vinegar",
+    "apple cider vinegar", "rice vinegar", "soy sauce", "tamari", "fish sauce", "oyster sauce",
+    "hoisin sauce", "worcestershire sauce", "hot sauce", "sriracha", "ketchup", "mustard",
+    "dijon mustard", "mayonnaise", "salsa", "pesto", "barbecue sauce", "teriyaki sauce",
+    "chicken broth", "beef broth", "vegetable broth", "stock", "coconut milk", "almond milk",
+    "sugar", "brown sugar", "powdered sugar", "honey", "maple syrup", "molasses", "agave",
+    "baking soda", "baking powder", "yeast", "cocoa powder", "chocolate", "dark chocolate",
+    "chocolate chips", "white chocolate", "gelatin",
+    "white wine", "red wine", "beer", "capers", "olives", "kalamata olives", "pickles",
+    "miso", "kimchi", "nutritional yeast",
+]
+
+SYNONYMS = {
+    "green onions": ["scallions", "spring onions"],
+    "cilantro": ["coriander leaves", "chinese parsley"],
+    "eggplant": ["aubergine", "brinjal"],
+    "zucchini": ["courgette"],
+    "chickpeas": ["garbanzo beans", "garbanzos"],
+    "bell peppers": ["capsicum", "sweet peppers"],
+    "shrimp": ["shrimps"],
+    "prawns": ["king prawns"],
+    "arugula": ["rocket"],
+    "powdered sugar": ["icing sugar", "confectioners sugar"],
+    "cornstarch": ["corn starch", "cornflour"],
+    "heavy cream": ["double cream", "whipping cream"],
+    "ground beef": ["minced beef", "beef mince", "hamburger meat"],
+    "ground pork": ["minced pork", "pork mince"],
+    "ground lamb": ["minced lamb", "lamb mince"],
+    "ground turkey": ["minced turkey", "turkey mince"],
+    "ground chicken": ["minced chicken", "chicken mince"],
+    "all purpose flour": ["plain flour", "ap flour"],
+    "baking soda": ["bicarbonate of soda", "bicarb"],
+    "beets": ["beetroot"],
+    "swiss chard": ["chard", "silverbeet"],
+    "green beans": ["string beans", "french beans"],
+    "snow peas": ["mangetout"],
+    "chili peppers": ["chilies", "chillies", "chilli", "chile peppers"],
+    "cremini mushrooms": ["baby bella mushrooms"],
+    "romaine lettuce": ["cos lettuce"],
+    "sweet potatoes": ["yams"],
+    "bread crumbs": ["breadcrumbs"],
+    "canola oil": ["rapeseed oil"],
+    "eggs": ["egg"],
+    "potatoes": ["spuds"],
+    "pasta": ["noodles"],
+}
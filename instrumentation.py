@@ -0,0 +1,490 @@
+import os
+import json
+import time
+import bisect
+import asyncio
+import logging
+import threading
+import functools
+import contextvars
+from collections import deque
+from typing import Optional, Dict, Any, List, Tuple, Callable
+
+# Configure logging
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+logger = logging.getLogger(__name__)
+
+# Histogram bucket upper bounds
+DURATION_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 120.0)
+SIZE_BUCKETS = (256, 1024, 4096, 16384, 65536, 262144, 1048576, 4194304, 16777216)
+
+# Span attributes observed into the payload size histogram when a span ends
+PAYLOAD_ATTRIBUTES = ("bytes_in", "bytes_out")
+
+
+class Span:
+    """
+    One timed operation within a request trace.
+
+    Spans nest: a span opened while another is current becomes its child
+    and shares its ``trace_id``. Numeric attributes such as ``bytes_in``,
+    ``prompt_tokens``, ``retries`` or ``cache_hit`` are attached with
+    ``set`` and ``add``.
+    """
+
+    __slots__ = ("name", "trace_id", "span_id", "parent_id", "start", "duration", "attributes", "error", "_children")
+
+    def __init__(self, name: str, parent: Optional["Span"] = None, attributes: Optional[Dict[str, Any]] = None):
+        """
+        Args:
+            name (str): Stage or operation name.
+            parent (Span): The enclosing span, None for the root of a trace.
+            attributes (dict): Initial attributes.
+        """
+        self.name = name
+        self.span_id = os.urandom(8).hex()
+        self.trace_id = parent.trace_id if parent is not None else os.urandom(16).hex()
+        self.parent_id = parent.span_id if parent is not None else None
+        self.start = time.time()
+        self.duration: Optional[float] = None
+        self.attributes: Dict[str, Any] = dict(attributes or {})
+        self.error: Optional[str] = None
+        # Finished descendants, collected on the root so the whole trace is exported together
+        self._children: List["Span"] = []
+
+    def set(self, key: str, value: Any) -> None:
+        """Set an attribute."""
+        self.attributes[key] = value
+
+    def add(self, key: str, amount: float = 1) -> None:
+        """Increment a numeric attribute."""
+        self.attributes[key] = self.attributes.get(key, 0) + amount
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "name": self.name,
+            "trace_id": self.trace_id,
+            "span_id": self.span_id,
+            "parent_id": self.parent_id,
+            "start": self.start,
+            "duration": self.duration,
+            "attributes": self.attributes,
+            "error": self.error,
+        }
+
+
+class _NoopSpan:
+    """Stand-in returned while tracing is disabled; every method does nothing."""
+
+    __slots__ = ()
+
+    def set(self, key: str, value: Any) -> None:
+        pass
+
+    def add(self, key: str, amount: float = 1) -> None:
+        pass
+
+    def __enter__(self) -> "_NoopSpan":
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        pass
+
+
+NOOP_SPAN = _NoopSpan()
+
+
+class Histogram:
+    """Cumulative histogram with fixed bucket bounds, one series per label set."""
+
+    def __init__(self, name: str, help_text: str, buckets: Tuple[float, ...], labels: Tuple[str, ...]):
+        self.name = name
+        self.help_text = help_text
+        self.buckets = tuple(sorted(buckets))
+        self.labels = labels
+        self._series: Dict[Tuple[str, ...], List[float]] = {}
+
+    def observe(self, label_values: Tuple[str, ...], value: float) -> None:
+        # Series layout: one count per bucket, then +Inf count, then sum; the caller holds the registry lock
+        series = self._series.get(label_values)
+        if series is None:
+            series = self._series[label_values] = [0] * (len(self.buckets) + 1) + [0.0]
+        series[bisect.bisect_left(self.buckets, value)] += 1
+        series[-1] += value
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.help_text}", f"# TYPE {self.name} histogram"]
+        for label_values, series in sorted(self._series.items()):
+            labels = ",".join(f'{key}="{_escape_label(value)}"' for key, value in zip(self.labels, label_values))
+            prefix = labels + "," if labels else ""
+            cumulative = 0
+            for bound, count in zip(self.buckets + (float("inf"),), series):
+                cumulative += count
+                le = "+Inf" if bound == float("inf") else repr(float(bound))
+                lines.append(f'{self.name}_bucket{{{prefix}le="{le}"}} {cumulative}')
+            lines.append(f"{self.name}_sum{{{labels}}} {series[-1]}")
+            lines.append(f"{self.name}_count{{{labels}}} {cumulative}")
+        return lines
+
+
+class Counter:
+    """Monotonic counter, one series per label set."""
+
+    def __init__(self, name: str, help_text: str, labels: Tuple[str, ...]):
+        self.name = name
+        self.help_text = help_text
+        self.labels = labels
+        self._series: Dict[Tuple[str, ...], float] = {}
+
+    def inc(self, label_values: Tuple[str, ...], amount: float = 1) -> None:
+        self._series[label_values] = self._series.get(label_values, 0) + amount
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.help_text}", f"# TYPE {self.name} counter"]
+        for label_values, value in sorted(self._series.items()):
+            labels = ",".join(f'{key}="{_escape_label(v)}"' for key, v in zip(self.labels, label_values))
+            lines.append(f"{self.name}{{{labels}}} {value}")
+        return lines
+
+
+def _escape_label(value: str) -> str:
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+class MetricsRegistry:
+    """
+    Aggregated pipeline metrics rendered in the Prometheus text exposition format.
+
+    Holds the stage duration and payload size histograms and the cache,
+    token and retry counters. Updates are serialized by one lock; they are
+    a few dict operations each, so contention stays low.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.stage_seconds = Histogram(
+            "recipe_stage_duration_seconds", "Duration of recipe pipeline stages.", DURATION_BUCKETS, ("stage",)
+        )
+        self.payload_bytes = Histogram(
+            "recipe_stage_payload_bytes", "Payload sizes read and written by pipeline stages.",
+            SIZE_BUCKETS, ("stage", "direction"),
+        )
+        self.stage_errors = Counter("recipe_stage_errors_total", "Pipeline stages that raised.", ("stage",))
+        self.cache_lookups = Counter("recipe_cache_lookups_total", "Cache lookups by cache and result.", ("cache", "result"))
+        self.llm_tokens = Counter("recipe_llm_tokens_total", "LLM tokens used per stage.", ("stage", "kind"))
+        self.retries = Counter("recipe_retries_total", "Retried attempts per operation.", ("operation",))
+
+    def observe_span(self, span: Span) -> None:
+        with self._lock:
+            self.stage_seconds.observe((span.name,), span.duration)
+            for attribute in PAYLOAD_ATTRIBUTES:
+                size = span.attributes.get(attribute)
+                if size is not None:
+                    self.payload_bytes.observe((span.name, attribute[len("bytes_"):]), size)
+            if span.error is not None:
+                self.stage_errors.inc((span.name,))
+
+    def inc(self, counter: Counter, label_values: Tuple[str, ...], amount: float = 1) -> None:
+        with self._lock:
+            counter.inc(label_values, amount)
+
+    def render_prometheus(self) -> str:
+        """
+        Render every metric in the Prometheus text format.
+
+        Returns:
+            str: The exposition text, ending with a newline.
+        """
+        with self._lock:
+            lines = []
+            for metric in (self.stage_seconds, self.payload_bytes, self.stage_errors,
+                           self.cache_lookups, self.llm_tokens, self.retries):
+                lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+
+class SpanExporter:
+    """Receives every finished trace; subclasses implement ``export``."""
+
+    def export(self, spans: List[Span]) -> None:
+        """
+        Handle a finished trace.
+
+        Args:
+            spans (list): Every span of the trace, the root last.
+        """
+        raise NotImplementedError
+
+    def close(self) -> None:
+        pass
+
+
+class LoggingExporter(SpanExporter):
+    """Logs a one-line timing summary per trace."""
+
+    def export(self, spans: List[Span]) -> None:
+        root = spans[-1]
+        stages = ", ".join(f"{span.name}={span.duration * 1000:.1f}ms" for span in spans[:-1])
+        logger.info(f"Trace {root.trace_id} {root.name} took {root.duration * 1000:.1f} ms: {stages}")
+
+
+class JSONLinesExporter(SpanExporter):
+    """Appends each trace as one JSON line holding its spans."""
+
+    def __init__(self, path: str):
+        """
+        Args:
+            path (str): File to append traces to.
+        """
+        self.path = path
+        self._lock = threading.Lock()
+        self._file = open(path, "a", encoding="utf-8")
+
+    def export(self, spans: List[Span]) -> None:
+        line = json.dumps({"trace_id": spans[-1].trace_id, "spans": [span.to_dict() for span in spans]}, default=str)
+        with self._lock:
+            self._file.write(line + "\n")
+            self._file.flush()
+
+    def close(self) -> None:
+        with self._lock:
+            self._file.close()
+
+
+class InMemoryExporter(SpanExporter):
+    """Keeps the most recent traces in memory, e.g. for a debug endpoint or a benchmark."""
+
+    def __init__(self, max_traces: int = 1000):
+        """
+        Args:
+            max_traces (int): Number of traces to keep.
+        """
+        self.traces: "deque[List[Span]]" = deque(maxlen=max_traces)
+
+    def export(self, spans: List[Span]) -> None:
+        self.traces.append(spans)
+
+
+class Tracer:
+    """
+    Per-request trace spans and aggregated metrics for the recipe pipeline.
+
+    The current span lives in a ``ContextVar``, so nesting follows the call
+    stack in threads and asyncio tasks alike. When a root span ends, the
+    finished trace is handed to every exporter. While the tracer is
+    disabled ``span`` returns a shared no-op object and the ``record_*``
+    helpers return immediately, so instrumented code pays one attribute
+    check per call.
+    """
+
+    def __init__(self, enabled: bool = False, exporters: Optional[List[SpanExporter]] = None):
+        """
+        Args:
+            enabled (bool): Whether spans and metrics are recorded.
+            exporters (list): Receivers of finished traces.
+        """
+        self.enabled = enabled
+        self.exporters: List[SpanExporter] = list(exporters or [])
+        self.metrics = MetricsRegistry()
+        self._current: contextvars.ContextVar[Optional[Span]] = contextvars.ContextVar("recipe_span", default=None)
+
+    def add_exporter(self, exporter: SpanExporter) -> None:
+        """Register a receiver of finished traces."""
+        self.exporters.append(exporter)
+
+    def current_span(self):
+        """
+        Return the innermost open span.
+
+        Returns:
+            Span: The current span, or a no-op span when disabled or outside any span.
+        """
+        if not self.enabled:
+            return NOOP_SPAN
+        return self._current.get() or NOOP_SPAN
+
+    def span(self, name: str, **attributes):
+        """
+        Open a span as a context manager.
+
+        Args:
+            name (str): Stage or operation name.
+            **attributes: Initial span attributes.
+
+        Returns:
+            A context manager yielding the span.
+        """
+        if not self.enabled:
+            return NOOP_SPAN
+        return _SpanScope(self, name, attributes)
+
+    def _start(self, name: str, attributes: Dict[str, Any]) -> Tuple[Span, contextvars.Token]:
+        span = Span(name, self._current.get(), attributes)
+        return span, self._current.set(span)
+
+    def _finish(self, span: Span, token: contextvars.Token, started: float, error: Optional[BaseException]) -> None:
+        span.duration = time.perf_counter() - started
+        if error is not None:
+            span.error = f"{type(error).__name__}: {error}"
+        self._current.reset(token)
+        self.metrics.observe_span(span)
+
+        parent = self._current.get()
+        if parent is not None and parent.trace_id == span.trace_id:
+            parent._children.extend(span._children)
+            parent._children.append(span)
+            span._children = []
+            return
+        spans = span._children + [span]
+        span._children = []
+        for exporter in self.exporters:
+            try:
+                exporter.export(spans)
+            except Exception as e:
+                logger.error(f"Trace exporter {type(exporter).__name__} failed: {e}")
+
+    def record_cache(self, cache: str, hit: bool) -> None:
+        """
+        Count a cache lookup and mark the current span.
+
+        Args:
+            cache (str): Cache name, e.g. "completion", "result" or "artifact".
+            hit (bool): Whether the lookup was served from the cache.
+        """
+        if not self.enabled:
+            return
+        self.metrics.inc(self.metrics.cache_lookups, (cache, "hit" if hit else "miss"))
+        self.current_span().set(f"{cache}_cache_hit", hit)
+
+    def record_tokens(self, stage: str, prompt_tokens: Optional[int], completion_tokens: Optional[int]) -> None:
+        """
+        Count LLM tokens and add them to the current span.
+
+        Args:
+            stage (str): Pipeline stage of the request.
+            prompt_tokens (int): Input tokens, None if the provider didn't report them.
+            completion_tokens (int): Output tokens, None if the provider didn't report them.
+        """
+        if not self.enabled:
+            return
+        span = self.current_span()
+        for kind, count in (("prompt", prompt_tokens), ("completion", completion_tokens)):
+            if count:
+                self.metrics.inc(self.metrics.llm_tokens, (stage, kind), count)
+                span.add(f"{kind}_tokens", count)
+
+    def record_retry(self, operation: str) -> None:
+        """
+        Count a retried attempt and add it to the current span.
+
+        Args:
+            operation (str): The retried operation.
+        """
+        if not self.enabled:
+            return
+        self.metrics.inc(self.metrics.retries, (operation,))
+        self.current_span().add("retries")
+
+    def render_prometheus(self) -> str:
+        """Render the aggregated metrics in the Prometheus text format."""
+        return self.metrics.render_prometheus()
+
+    def close(self) -> None:
+        """Close every exporter."""
+        for exporter in self.exporters:
+            exporter.close()
+
+
+class _SpanScope:
+    """Context manager that opens a span on enter and finishes it on exit."""
+
+    __slots__ = ("tracer", "name", "attributes", "span", "token", "started")
+
+    def __init__(self, tracer: Tracer, name: str, attributes: Dict[str, Any]):
+        self.tracer = tracer
+        self.name = name
+        self.attributes = attributes
+
+    def __enter__(self) -> Span:
+        self.span, self.token = self.tracer._start(self.name, self.attributes)
+        self.started = time.perf_counter()
+        return self.span
+
+    def __exit__(self, exc_type, exc, tb) -> None:
+        self.tracer._finish(self.span, self.token, self.started, exc)
+
+
+_default_tracer: Optional[Tracer] = None
+_default_tracer_lock = threading.Lock()
+
+
+def get_default_tracer() -> Tracer:
+    """
+    Return the process-wide tracer, creating it on first use.
+
+    Tracing is off unless the ``PIPELINE_TRACING`` env variable is set. Its
+    value selects the exporter: "log" logs a summary per trace, any other
+    value is a file path that traces are appended to as JSON lines.
+
+    Returns:
+        Tracer: The shared tracer.
+    """
+    global _default_tracer
+    if _default_tracer is None:
+        with _default_tracer_lock:
+            if _default_tracer is None:
+                setting = os.environ.get("PIPELINE_TRACING")
+                tracer = Tracer(enabled=bool(setting))
+                if setting == "log":
+                    tracer.add_exporter(LoggingExporter())
+                elif setting:
+                    tracer.add_exporter(JSONLinesExporter(setting))
+                _default_tracer = tracer
+    return _default_tracer
+
+
+def traced(name: str) -> Callable:
+    """
+    Decorate a function or coroutine function to run inside a span of the default tracer.
+
+    Args:
+        name (str): Span name, usually the pipeline stage.
+
+    Returns:
+        Callable: The decorator.
+    """
+    def decorator(func: Callable) -> Callable:
+        if asyncio.iscoroutinefunction(func):
+            @functools.wraps(func)
+            async def async_wrapper(*args, **kwargs):
+                tracer = get_default_tracer()
+                if not tracer.enabled:
+                    return await func(*args, **kwargs)
+                with tracer.span(name):
+                    return await func(*args, **kwargs)
+            return async_wrapper
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            tracer = get_default_tracer()
+            if not tracer.enabled:
+                return func(*args, **kwargs)
+            with tracer.span(name):
+                return func(*args, **kwargs)
+        return wrapper
+    return decorator
+
+
+def retry_hook(operation: str) -> Callable:
+    """
+    Build a tenacity ``before_sleep`` callback that records each retry.
+
+    Args:
+        operation (str): Name the retries are counted under.
+
+    Returns:
+        Callable: The callback.
+    """
+    def before_sleep(retry_state) -> None:
+        get_default_tracer().record_retry(operation)
+    return before_sleep
@@ -0,0 +1,574 @@
+import os
+import time
+import asyncio
+import logging
+import threading
+import weakref
+import contextvars
+from collections import deque
+from concurrent.futures import Future, FIRST_COMPLETED, wait
+from typing import Optional, Dict, Any, List, Deque, Tuple
+from instrumentation import get_default_tracer
+from deadline import deadline_timeout
+
+# Configure logging
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+logger = logging.getLogger(__name__)
+
+DEFAULT_MODEL = "openai:gpt-4o"
+DEFAULT_TEMPERATURE = 0.75
+DEFAULT_TIMEOUT = 60.0
+
+# Pipeline stages and their default request timeouts in seconds
+STAGE_TIMEOUTS = {
+    "default": DEFAULT_TIMEOUT,
+    "extraction": 30.0,
+    "rewrite": 120.0,
+}
+
+# Providers whose SDK accepts a per-request ``timeout`` argument
+TIMEOUT_PROVIDERS = {"openai", "anthropic"}
+
+# Hedging: delay used until a model has enough latency samples, and the floor of the adaptive delay
+DEFAULT_HEDGE_DELAY = 10.0
+MIN_HEDGE_DELAY = 0.5
+MIN_HEDGE_SAMPLES = 20
+LATENCY_WINDOW = 200
+
+
+class StageConfig:
+    """Model, sampling temperature, request timeout and hedging policy used by one pipeline stage."""
+
+    def __init__(self, model: str = DEFAULT_MODEL, temperature: float = DEFAULT_TEMPERATURE,
+                 timeout: Optional[float] = DEFAULT_TIMEOUT, hedge_percentile: Optional[float] = None,
+                 hedge_models: Optional[List[str]] = None):
+        """
+        Args:
+            model (str): Model identifier in aisuite's "provider:model" form.
+            temperature (float): Sampling temperature.
+            timeout (float): Seconds to wait for a response, None for the provider default.
+            hedge_percentile (float): Send a second request once the first has taken longer than
+                this percentile of recent latencies, None to never hedge.
+            hedge_models (list): Other "provider:model" ids that may answer instead; the hedge
+                goes to the same model when empty.
+        """
+        self.model = model
+        self.temperature = temperature
+        self.timeout = timeout
+        self.hedge_percentile = hedge_percentile
+        self.hedge_models = [m for m in (hedge_models or []) if m != model]
+
+    @property
+    def provider(self) -> str:
+        return self.model.split(":", 1)[0]
+
+    @classmethod
+    def from_env(cls, stage: str) -> "StageConfig":
+        """
+        Read a stage's settings from the environment.
+
+        ``LLM_<STAGE>_MODEL``, ``LLM_<STAGE>_TEMPERATURE`` and ``LLM_<STAGE>_TIMEOUT``
+        override ``LLM_MODEL``, ``LLM_TEMPERATURE`` and ``LLM_TIMEOUT``, which
+        override the built-in defaults. Hedging is enabled by
+        ``LLM_<STAGE>_HEDGE_PERCENTILE`` (e.g. 95), and ``LLM_<STAGE>_HEDGE_MODELS``
+        lists comma separated models the hedge may go to; both also fall back
+        to their ``LLM_`` forms.
+
+        Args:
+            stage (str): Stage name, e.g. "extraction" or "rewrite".
+
+        Returns:
+            StageConfig: The stage settings.
+        """
+        prefix = f"LLM_{stage.upper()}_"
+
+        def setting(name: str) -> Optional[str]:
+            return os.getenv(prefix + name) or os.getenv("LLM_" + name)
+
+        timeout = setting("TIMEOUT")
+        percentile = setting("HEDGE_PERCENTILE")
+        return cls(
+            model=setting("MODEL") or DEFAULT_MODEL,
+            temperature=float(setting("TEMPERATURE") or DEFAULT_TEMPERATURE),
+            timeout=float(timeout) if timeout else STAGE_TIMEOUTS.get(stage, DEFAULT_TIMEOUT),
+            hedge_percentile=float(percentile) if percentile else None,
+            hedge_models=[m.strip() for m in (setting("HEDGE_MODELS") or "").split(",") if m.strip()],
+        )
+
+    def __repr__(self) -> str:
+        return (f"StageConfig(model={self.model!r}, temperature={self.temperature}, timeout={self.timeout}, "
+                f"hedge_percentile={self.hedge_percentile}, hedge_models={self.hedge_models})")
+
+
+class LatencyTracker:
+    """
+    Sliding window of recent completion latencies per stage and model.
+
+    Failed attempts count with the time they took, so a model that times
+    out looks as slow as it is.
+    """
+
+    def __init__(self, window: int = LATENCY_WINDOW):
+        """
+        Args:
+            window (int): Latencies kept per stage and model.
+        """
+        self.window = window
+        self._lock = threading.Lock()
+        self._samples: Dict[Tuple[str, str], Deque[float]] = {}
+
+    def record(self, stage: str, model: str, seconds: float) -> None:
+        with self._lock:
+            samples = self._samples.get((stage, model))
+            if samples is None:
+                samples = self._samples[(stage, model)] = deque(maxlen=self.window)
+            samples.append(seconds)
+
+    def percentile(self, stage: str, model: str, percentile: float) -> Optional[float]:
+        """
+        Return a latency percentile.
+
+        Args:
+            stage (str): Pipeline stage.
+            model (str): "provider:model" id.
+            percentile (float): 0 to 100.
+
+        Returns:
+            Optional[float]: Seconds, or None with fewer than ``MIN_HEDGE_SAMPLES`` samples.
+        """
+        with self._lock:
+            samples = sorted(self._samples.get((stage, model), ()))
+        if len(samples) < MIN_HEDGE_SAMPLES:
+            return None
+        return samples[min(len(samples) - 1, int(len(samples) * percentile / 100))]
+
+    def stats(self) -> Dict[str, Dict[str, Dict[str, float]]]:
+        """
+        Report latency percentiles.
+
+        Returns:
+            dict: Stage to model to ``samples``, ``p50`` and ``p95`` seconds.
+        """
+        with self._lock:
+            snapshot = {key: sorted(samples) for key, samples in self._samples.items()}
+        stats: Dict[str, Dict[str, Dict[str, float]]] = {}
+        for (stage, model), samples in snapshot.items():
+            stats.setdefault(stage, {})[model] = {
+                "samples": len(samples),
+                "p50": samples[len(samples) // 2],
+                "p95": samples[min(len(samples) - 1, int(len(samples) * 0.95))],
+            }
+        return stats
+
+
+class LLMClientManager:
+    """
+    Long-lived holder of configured LLM provider clients.
+
+    The blocking aisuite client is built once and keeps its provider SDK
+    clients, and with them their HTTP connection pools, for the life of the
+    process. Async callers get a native ``AsyncOpenAI`` client per event
+    loop, because async connection pools are bound to the loop that opened
+    them. Each pipeline stage has its own model, temperature and timeout.
+    Retrying is left to the callers; the methods here make a single attempt.
+
+    A stage with a hedge percentile races slow requests: when the first
+    request has run longer than that percentile of the model's recent
+    latencies, a second one goes to the next model, or the same one, and
+    the first answer wins. Models are tried fastest first by recent
+    median latency. Streams are never hedged.
+    """
+
+    def __init__(self, stages: Optional[Dict[str, StageConfig]] = None, api_key: Optional[str] = None):
+        """
+        Args:
+            stages (dict): Stage name to settings; missing stages are read with
+                ``StageConfig.from_env``.
+            api_key (str): OpenAI API key, defaults to the ``API_KEY`` env variable.
+        """
+        self.api_key = api_key if api_key is not None else os.environ.get("API_KEY")
+        self._stages: Dict[str, StageConfig] = dict(stages or {})
+        self._client = None
+        self._async_clients: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, Any]" = weakref.WeakKeyDictionary()
+        self._lock = threading.Lock()
+        self._metrics: Dict[str, float] = {
+            "clients_created": 0,
+            "clients_reused": 0,
+            "construction_seconds": 0.0,
+        }
+        self._requests: Dict[str, Dict[str, float]] = {}
+        self.latency = LatencyTracker()
+
+    def stage(self, name: str = "default") -> StageConfig:
+        """
+        Return the settings of a pipeline stage.
+
+        Args:
+            name (str): Stage name.
+
+        Returns:
+            StageConfig: The stage settings.
+        """
+        config = self._stages.get(name)
+        if config is None:
+            with self._lock:
+                config = self._stages.setdefault(name, StageConfig.from_env(name))
+        return config
+
+    def _count_client(self, created: bool, seconds: float = 0.0) -> None:
+        with self._lock:
+            if created:
+                self._metrics["clients_created"] += 1
+                self._metrics["construction_seconds"] += seconds
+            else:
+                self._metrics["clients_reused"] += 1
+
+    def client(self):
+        """
+        Return the shared blocking aisuite client, building it on first use.
+
+        Returns:
+            aisuite.Client: The configured client.
+        """
+        if self._client is not None:
+            self._count_client(False)
+            return self._client
+        with self._lock:
+            if self._client is None:
+                started = time.perf_counter()
+                import aisuite as ai  # loads the provider SDKs, so only on the LLM path
+
+                # The SDK retries on its own by default, which would overrun stage timeouts and deadlines
+                self._client = ai.Client({"openai": {"api_key": self.api_key, "max_retries": 0}})
+                self._metrics["clients_created"] += 1
+                self._metrics["construction_seconds"] += time.perf_counter() - started
+                logger.info("Created the shared LLM client.")
+                return self._client
+        self._count_client(False)
+        return self._client
+
+    def async_client(self):
+        """
+        Return the ``AsyncOpenAI`` client for the running event loop.
+
+        Returns:
+            openai.AsyncOpenAI: The client bound to this loop.
+        """
+        loop = asyncio.get_running_loop()
+        client = self._async_clients.get(loop)
+        if client is not None:
+            self._count_client(False)
+            return client
+        started = time.perf_counter()
+        import openai
+
+        client = openai.AsyncOpenAI(api_key=self.api_key, max_retries=0)
+        self._async_clients[loop] = client
+        self._count_client(True, time.perf_counter() - started)
+        return client
+
+    def _request_kwargs(self, config: StageConfig, model: Optional[str] = None) -> Dict[str, Any]:
+        kwargs: Dict[str, Any] = {"temperature": config.temperature}
+        if (model or config.model).split(":", 1)[0] in TIMEOUT_PROVIDERS:
+            # The stage timeout, cut short by the current deadline
+            timeout = deadline_timeout(config.timeout)
+            if timeout is not None:
+                kwargs["timeout"] = timeout
+        return kwargs
+
+    def _record(self, stage: str, started: float, ok: bool) -> None:
+        with self._lock:
+            metrics = self._requests.setdefault(stage, {"requests": 0, "failures": 0, "seconds": 0.0})
+            metrics["requests"] += 1
+            metrics["seconds"] += time.perf_counter() - started
+            if not ok:
+                metrics["failures"] += 1
+
+    def _record_hedge(self, stage: str, won: bool) -> None:
+        with self._lock:
+            metrics = self._requests.setdefault(stage, {"requests": 0, "failures": 0, "seconds": 0.0})
+            metrics["hedged"] = metrics.get("hedged", 0) + 1
+            metrics["hedge_wins"] = metrics.get("hedge_wins", 0) + int(won)
+
+    def _record_usage(self, stage: str, response: Any) -> None:
+        usage = getattr(response, "usage", None)
+        if usage is not None:
+            get_default_tracer().record_tokens(
+                stage, getattr(usage, "prompt_tokens", None), getattr(usage, "completion_tokens", None)
+            )
+
+    def _hedge_plan(self, stage: str, config: StageConfig) -> Tuple[List[str], float]:
+        """
+        Order the models that may answer and pick the hedge delay.
+
+        Models with enough samples go by median latency, fastest first; the
+        others keep their configured order behind them. Without hedge models
+        the hedge repeats the request to the same model.
+
+        Returns:
+            tuple: The models to try in order, and seconds to wait before each hedge.
+        """
+        models = [config.model] + config.hedge_models
+
+        def median(model: str) -> float:
+            p50 = self.latency.percentile(stage, model, 50)
+            return float("inf") if p50 is None else p50
+
+        models.sort(key=median)
+        if len(models) == 1:
+            models.append(config.model)
+        delay = self.latency.percentile(stage, models[0], config.hedge_percentile)
+        if delay is None:
+            delay = DEFAULT_HEDGE_DELAY
+        delay = max(MIN_HEDGE_DELAY, delay)
+        if config.timeout is not None:
+            delay = min(delay, config.timeout)
+        return models, delay
+
+    def _complete_once(self, model: str, messages: List[Dict[str, str]], config: StageConfig, stage: str,
+                       race_over: Optional[threading.Event] = None) -> str:
+        started = time.perf_counter()
+        try:
+            response = self.client().chat.completions.create(
+                model=model, messages=messages, **self._request_kwargs(config, model)
+            )
+        except Exception:
+            # A failure takes as long as it took; requests that lost a hedge race are left out
+            if race_over is None or not race_over.is_set():
+                self.latency.record(stage, model, time.perf_counter() - started)
+            raise
+        if race_over is None or not race_over.is_set():
+            self.latency.record(stage, model, time.perf_counter() - started)
+        self._record_usage(stage, response)
+        return response.choices[0].message.content
+
+    def complete(self, messages: List[Dict[str, str]], stage: str = "default") -> str:
+        """
+        Request one completion with the stage's settings, hedged if the stage enables it.
+
+        Args:
+            messages (list): The chat messages.
+            stage (str): Pipeline stage whose model, temperature, timeout and hedging apply.
+
+        Returns:
+            str: The generated completion.
+        """
+        config = self.stage(stage)
+        started = time.perf_counter()
+        try:
+            if config.hedge_percentile is None:
+                content = self._complete_once(config.model, messages, config, stage)
+            else:
+                content = self._complete_hedged(messages, config, stage)
+        except Exception:
+            self._record(stage, started, False)
+            raise
+        self._record(stage, started, True)
+        return content
+
+    def _complete_hedged(self, messages: List[Dict[str, str]], config: StageConfig, stage: str) -> str:
+        """
+        Race the stage's models: each hedge starts once the requests in flight
+        have taken the hedge delay, or right away when one fails. The first
+        answer wins. Blocking requests can't be interrupted, so the losers are
+        abandoned: at most one thread per model finishes in the background,
+        within the stage timeout, and records no latency once the race is over.
+        """
+        models, delay = self._hedge_plan(stage, config)
+        attempts: Dict[Future, str] = {}
+        race_over = threading.Event()
+
+        def launch(model: str) -> None:
+            future: Future = Future()
+            # Each attempt runs in a copy of the caller's context, so it keeps the trace span and deadline
+            context = contextvars.copy_context()
+
+            def run() -> None:
+                try:
+                    future.set_result(context.run(self._complete_once, model, messages, config, stage, race_over))
+                except BaseException as e:
+                    future.set_exception(e)
+
+            threading.Thread(target=run, name=f"llm-{stage}-{len(attempts)}", daemon=True).start()
+            attempts[future] = model
+
+        launch(models[0])
+        error: Optional[BaseException] = None
+        pending = set(attempts)
+        try:
+            while pending:
+                can_hedge = len(attempts) < len(models)
+                done, pending = wait(pending, timeout=delay if can_hedge else None, return_when=FIRST_COMPLETED)
+                if not done:
+                    logger.info(f"No {stage} completion after {delay:.1f} s, hedging with {models[len(attempts)]}.")
+                    launch(models[len(attempts)])
+                    pending = {future for future in attempts if not future.done()}
+                    continue
+                for future in done:
+                    try:
+                        content = future.result()
+                    except Exception as e:
+                        logger.error(f"{attempts[future]} failed for {stage}: {e}")
+                        error = e
+                        continue
+                    return self._hedge_won(stage, attempts, future, content)
+                if len(attempts) < len(models):
+                    launch(models[len(attempts)])
+                    pending = {future for future in attempts if not future.done()}
+            raise error
+        finally:
+            race_over.set()
+
+    def _hedge_won(self, stage: str, attempts: Dict[Any, str], winner: Any, content: str) -> str:
+        hedged = len(attempts) > 1
+        if hedged:
+            # The hedge paid off when the answer didn't come from the first request
+            self._record_hedge(stage, won=winner is not next(iter(attempts)))
+        span = get_default_tracer().current_span()
+        span.set("model", attempts[winner])
+        span.set("hedged", hedged)
+        return content
+
+    def stream(self, messages: List[Dict[str, str]], stage: str = "default"):
+        """
+        Open a streaming completion with the stage's settings.
+
+        Args:
+            messages (list): The chat messages.
+            stage (str): Pipeline stage whose model, temperature and timeout apply.
+
+        Returns:
+            An iterator of completion chunks from the provider.
+        """
+        config = self.stage(stage)
+        started = time.perf_counter()
+        try:
+            response = self.client().chat.completions.create(
+                model=config.model, messages=messages, stream=True, **self._request_kwargs(config)
+            )
+        except Exception:
+            self._record(stage, started, False)
+            raise
+        self._record(stage, started, True)
+        return response
+
+    async def _acomplete_once(self, model: str, messages: List[Dict[str, str]], config: StageConfig, stage: str,
+                              race_over: Optional[threading.Event] = None) -> str:
+        provider, model_name = model.split(":", 1)
+        if provider != "openai":
+            # Cancelling the task doesn't stop the thread, so it checks race_over itself
+            return await asyncio.to_thread(self._complete_once, model, messages, config, stage, race_over)
+        started = time.perf_counter()
+        try:
+            response = await self.async_client().chat.completions.create(
+                model=model_name, messages=messages, **self._request_kwargs(config, model)
+            )
+        except Exception:
+            # A failure takes as long as it took; cancelled hedges raise CancelledError and are left out
+            self.latency.record(stage, model, time.perf_counter() - started)
+            raise
+        self.latency.record(stage, model, time.perf_counter() - started)
+        self._record_usage(stage, response)
+        return response.choices[0].message.content
+
+    async def acomplete(self, messages: List[Dict[str, str]], stage: str = "default") -> str:
+        """
+        Request one completion without blocking the event loop, hedged if the stage enables it.
+
+        OpenAI models go through the loop's native async client; other
+        providers run the blocking client in a worker thread.
+
+        Args:
+            messages (list): The chat messages.
+            stage (str): Pipeline stage whose model, temperature, timeout and hedging apply.
+
+        Returns:
+            str: The generated completion.
+        """
+        config = self.stage(stage)
+        started = time.perf_counter()
+        try:
+            if config.hedge_percentile is None:
+                content = await self._acomplete_once(config.model, messages, config, stage)
+            else:
+                content = await self._acomplete_hedged(messages, config, stage)
+        except Exception:
+            self._record(stage, started, False)
+            raise
+        self._record(stage, started, True)
+        return content
+
+    async def _acomplete_hedged(self, messages: List[Dict[str, str]], config: StageConfig, stage: str) -> str:
+        """Asynchronous counterpart of ``_complete_hedged``; the losing requests are cancelled."""
+        models, delay = self._hedge_plan(stage, config)
+        attempts: Dict[asyncio.Task, str] = {}
+        race_over = threading.Event()
+
+        def launch(model: str) -> None:
+            attempts[asyncio.create_task(self._acomplete_once(model, messages, config, stage, race_over))] = model
+
+        launch(models[0])
+        error: Optional[BaseException] = None
+        pending = set(attempts)
+        try:
+            while pending:
+                can_hedge = len(attempts) < len(models)
+                done, pending = await asyncio.wait(
+                    pending, timeout=delay if can_hedge else None, return_when=asyncio.FIRST_COMPLETED
+                )
+                if not done:
+                    logger.info(f"No {stage} completion after {delay:.1f} s, hedging with {models[len(attempts)]}.")
+                    launch(models[len(attempts)])
+                    pending = {task for task in attempts if not task.done()}
+                    continue
+                for task in done:
+                    try:
+                        content = task.result()
+                    except Exception as e:
+                        logger.error(f"{attempts[task]} failed for {stage}: {e}")
+                        error = e
+                        continue
+                    return self._hedge_won(stage, attempts, task, content)
+                if len(attempts) < len(models):
+                    launch(models[len(attempts)])
+                    pending = {task for task in attempts if not task.done()}
+            raise error
+        finally:
+            race_over.set()
+            for task in attempts:
+                task.cancel()
+
+    def stats(self) -> Dict[str, Any]:
+        """
+        Report client construction and reuse, and per-stage request metrics.
+
+        Returns:
+            dict: ``clients_created``, ``clients_reused``, ``construction_seconds``,
+                a ``stages`` dict of ``requests``, ``failures``, ``seconds`` and, for
+                hedged stages, ``hedged`` and ``hedge_wins``, and the ``latency``
+                percentiles per stage and model.
+        """
+        with self._lock:
+            stats: Dict[str, Any] = dict(self._metrics)
+            stats["stages"] = {name: dict(metrics) for name, metrics in self._requests.items()}
+        stats["latency"] = self.latency.stats()
+        return stats
+
+
+_default_manager: Optional[LLMClientManager] = None
+_default_manager_lock = threading.Lock()
+
+
+def get_default_llm_manager() -> LLMClientManager:
+    """
+    Return the process-wide LLM client manager, creating it on first use.
+
+    Returns:
+        LLMClientManager: The shared manager.
+    """
+    global _default_manager
+    if _default_manager is None:
+        with _default_manager_lock:
+            if _default_manager is None:
+                _default_manager = LLMClientManager()
+    return _default_manager
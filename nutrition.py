@@ -0,0 +1,41 @@
+from typing import Dict, Any, List, Tuple
+
+# Comprehensive color palette with distinct colors
+NUTRIENT_COLORS = {
+    'Protein': '#FF6B6B',      # Vibrant Red
+    'Calcium': '#4ECDC4',       # Teal
+    'Iron': '#45B7D1',          # Sky Blue
+    'Vitamin A': '#FDCB6E',     # Golden Yellow
+    'Vitamin C': '#6C5CE7',     # Purple
+    'Vitamin D': '#FFA726',     # Orange
+    'Vitamin B6': '#2ECC71',    # Bright Green
+    'Magnesium': '#9C27B0',     # Deep Purple
+    'Zinc': '#FF5722',          # Deep Orange
+    'Potassium': '#795548'      # Brown
+}
+
+# Used for nutrients missing from NUTRIENT_COLORS
+DEFAULT_COLORS = ['#3498DB', '#E74C3C', '#2ECC71', '#F39C12', '#9B59B6']
+
+
+def get_chart_data(nutrients: List[Dict[Any, Any]]) -> Tuple[List[str], List[float], List[str]]:
+    """
+    Select the nutrients worth charting and assign their colors.
+    
+    Args:
+        nutrients (List[Dict]): List of nutrient dictionaries
+    
+    Returns:
+        Tuple: Labels, percentages of daily needs and hex colors of the top nutrients
+    """
+    # Filter top nutrient contributors
+    top_nutrients = [n for n in nutrients if n['percentOfDailyNeeds'] > 10]
+
+    # Extract names and percentages
+    labels = [n['name'] for n in top_nutrients]
+    sizes = [n['percentOfDailyNeeds'] for n in top_nutrients]
+
+    # Map colors to nutrients, use a default color if not in dictionary
+    chart_colors = [NUTRIENT_COLORS.get(label, DEFAULT_COLORS[i % len(DEFAULT_COLORS)])
+                    for i, label in enumerate(labels)]
+    return labels, sizes, chart_colors
@@ -9,17 +9,17 @@ from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
 from reportlab.lib.units import inch
 from reportlab.pdfbase import pdfmetrics
 from reportlab.pdfbase.ttfonts import TTFont
-from typing import Dict, Any, List, Optional
-from reportlab.pdfbase import pdfmetrics
-from reportlab.pdfbase.ttfonts import TTFont
-from reportlab.lib.styles import ParagraphStyle, getSampleStyleSheet
-from reportlab.lib import colors
+from typing import Dict, Any, List, Optional, Union, BinaryIO
+from reportlab.graphics.shapes import Drawing, String
+from reportlab.graphics.charts.piecharts import Pie
+from reportlab.graphics.charts.legends import Legend
+from artifact_cache import artifact_key, get_default_artifact_cache
+from nutrition import NUTRIENT_COLORS, DEFAULT_COLORS, get_chart_data
+from instrumentation import get_default_tracer, traced
 
 import logging
-import matplotlib.pyplot as plt
 import io
-import requests
-import numpy as np
+import functools
 
 # Logging configuration
 logging.basicConfig(
@@ -82,65 +82,150 @@ def get_advanced_styles():
     }
 
 
-def create_nutritional_pie_chart(nutrients: List[Dict[Any, Any]]) -> Optional[str]:
+def create_nutritional_pie_chart(nutrients: List[Dict[Any, Any]], output: Optional[Union[str, BinaryIO]] = None) -> Optional[Union[str, BinaryIO]]:
     """
     Create a pie chart for nutritional information with unique colors.
     
+    The figure is built with matplotlib's object API on its own Agg canvas
+    rather than pyplot's global state, so concurrent calls don't interfere.
+    
     Args:
         nutrients (List[Dict]): List of nutrient dictionaries
+        output (str or BinaryIO): Path or binary stream to write the PNG to;
+            defaults to a new in-memory buffer
     
     Returns:
-        Optional[str]: Path to pie chart image
+        Optional: The path or stream holding the PNG, rewound if it's a stream
     """
     try:
-        # Filter top nutrient contributors
-        top_nutrients = [n for n in nutrients if n['percentOfDailyNeeds'] > 10]
-        
-        # Extract names and percentages
-        labels = [n['name'] for n in top_nutrients]
-        sizes = [n['percentOfDailyNeeds'] for n in top_nutrients]
-
-        # Comprehensive color palette with distinct colors
-        nutrient_colors = {
-            'Protein': '#FF6B6B',      # Vibrant Red
-            'Calcium': '#4ECDC4',       # Teal
-            'Iron': '#45B7D1',          # Sky Blue
-            'Vitamin A': '#FDCB6E',     # Golden Yellow
-            'Vitamin C': '#6C5CE7',     # Purple
-            'Vitamin D': '#FFA726',     # Orange
-            'Vitamin B6': '#2ECC71',    # Bright Green
-            'Magnesium': '#9C27B0',     # Deep Purple
-            'Zinc': '#FF5722',          # Deep Orange
-            'Potassium': '#795548'      # Brown
-        }
-
-        # Map colors to nutrients, use a default color if not in dictionary
-        default_colors = ['#3498DB', '#E74C3C', '#2ECC71', '#F39C12', '#9B59B6']
-        colors = [nutrient_colors.get(label, default_colors[i % len(default_colors)]) 
-                  for i, label in enumerate(labels)]
-
-        plt.figure(figsize=(10, 6))
+        from matplotlib.figure import Figure
+        from matplotlib.patches import Rectangle
+        from matplotlib.backends.backend_agg import FigureCanvasAgg
+
+        labels, sizes, colors = get_chart_data(nutrients)
+
+        figure = Figure(figsize=(10, 6))
+        FigureCanvasAgg(figure)
         
         # Pie chart on the left side
-        plt.subplot(121)
-        plt.pie(sizes, colors=colors, startangle=90, wedgeprops={'edgecolor': 'white', 'linewidth': 1})
-        plt.title('Nutritional Breakdown', fontsize=12)
-        plt.axis('equal')
+        pie_axes = figure.add_subplot(121)
+        pie_axes.pie(sizes, colors=colors, startangle=90, wedgeprops={'edgecolor': 'white', 'linewidth': 1})
+        pie_axes.set_title('Nutritional Breakdown', fontsize=12)
+        pie_axes.axis('equal')
 
         # Legend on the right side
-        plt.subplot(122)
-        plt.axis('off')
+        legend_axes = figure.add_subplot(122)
+        legend_axes.axis('off')
         legend_labels = [f'{label}: {size:.1f}%' for label, size in zip(labels, sizes)]
-        legend_colors = [plt.Rectangle((0,0),1,1, color=color) for color in colors]
-        plt.legend(legend_colors, legend_labels, loc='center left', bbox_to_anchor=(0, 0.5))
+        legend_colors = [Rectangle((0,0),1,1, color=color) for color in colors]
+        legend_axes.legend(legend_colors, legend_labels, loc='center left', bbox_to_anchor=(0, 0.5))
 
         # Adjust layout and save
-        plt.tight_layout()
-        chart_filename = 'nutritional_chart.png'
-        plt.savefig(chart_filename, dpi=300, bbox_inches='tight')
-        plt.close()
+        figure.tight_layout()
+        if output is None:
+            output = io.BytesIO()
+        figure.savefig(output, format='png', dpi=300, bbox_inches='tight')
+        if hasattr(output, 'seek'):
+            output.seek(0)
         
-        return chart_filename
+        return output
+    except Exception as e:
+        logger.error(f"Pie chart creation failed: {e}")
+        return None
+
+
+@traced("chart")
+def get_chart_png(nutrients: List[Dict[Any, Any]], use_cache: bool = True) -> Optional[io.BytesIO]:
+    """
+    Return the raster nutrition chart, reusing a cached PNG for identical nutrient data.
+    
+    Args:
+        nutrients (List[Dict]): List of nutrient dictionaries
+        use_cache (bool): Set to False to bypass the artifact cache. The cache is also
+            bypassed when the ARTIFACT_CACHE_DISABLED env variable is set.
+    
+    Returns:
+        Optional[io.BytesIO]: The PNG in a rewound buffer, or None if the chart failed
+    """
+    if not use_cache or os.environ.get("ARTIFACT_CACHE_DISABLED"):
+        return create_nutritional_pie_chart(nutrients)
+
+    cache = get_default_artifact_cache()
+    key = artifact_key("chart", nutrients, dpi=300)
+    cached = cache.get(key, "png")
+    if cached is not None:
+        return io.BytesIO(cached)
+
+    chart_buffer = create_nutritional_pie_chart(nutrients)
+    if chart_buffer is not None:
+        get_default_tracer().current_span().set("bytes_out", chart_buffer.getbuffer().nbytes)
+        cache.set(key, "png", chart_buffer.getvalue())
+    return chart_buffer
+
+
+@traced("chart")
+def create_nutritional_pie_drawing(nutrients: List[Dict[Any, Any]], width: float = 6*inch) -> Optional[Drawing]:
+    """
+    Draw the nutritional pie chart and legend as PDF vector graphics.
+    
+    Produces the same layout and palette as create_nutritional_pie_chart,
+    but as a ReportLab Drawing that is embedded directly in the document,
+    with no raster image or temporary file.
+    
+    Args:
+        nutrients (List[Dict]): List of nutrient dictionaries
+        width (float): Width of the drawing in points; height keeps the 10:6 aspect
+    
+    Returns:
+        Optional[Drawing]: The chart drawing, or None if there is nothing to chart
+    """
+    try:
+        labels, sizes, chart_colors = get_chart_data(nutrients)
+        if not sizes:
+            return None
+
+        height = width * 0.6
+        drawing = Drawing(width, height)
+
+        # Pie chart on the left half
+        diameter = min(width / 2, height) * 0.75
+        pie = Pie()
+        pie.x = (width / 2 - diameter) / 2
+        pie.y = (height - diameter) / 2 - 6
+        pie.width = pie.height = diameter
+        pie.data = sizes
+        pie.startAngle = 90
+        pie.direction = 'anticlockwise'
+        pie.sideLabels = False
+        pie.slices.strokeColor = colors.white
+        pie.slices.strokeWidth = 1
+        for i, color in enumerate(chart_colors):
+            pie.slices[i].fillColor = colors.HexColor(color)
+        drawing.add(pie)
+        drawing.add(String(
+            width / 4, pie.y + diameter + 10, 'Nutritional Breakdown',
+            fontName='Helvetica', fontSize=12, textAnchor='middle'
+        ))
+
+        # Legend on the right half
+        legend = Legend()
+        legend.x = width / 2 + 10
+        legend.y = height / 2
+        legend.alignment = 'right'
+        legend.boxAnchor = 'w'
+        legend.fontName = 'Helvetica'
+        legend.fontSize = 9
+        legend.columnMaximum = len(labels)
+        legend.dx = legend.dy = 8
+        legend.deltay = 12
+        legend.colorNamePairs = [
+            (colors.HexColor(color), f'{label}: {size:.1f}%')
+            for label, size, color in zip(labels, sizes, chart_colors)
+        ]
+        drawing.add(legend)
+
+        drawing.hAlign = 'CENTER'
+        return drawing
     except Exception as e:
         logger.error(f"Pie chart creation failed: {e}")
         return None
@@ -212,30 +297,19 @@ def create_ingredients_table(ingredients: Dict[str, List[str]], styles: Dict) ->
     ]
       
 
-def create_recipe_pdf(recipe_data: Dict[str, Any], output_filename: str ):
+def build_recipe_elements(recipe_data: Dict[str, Any], styles: Dict, chart_backend: str = "vector") -> List:
     """
-    Generate a comprehensive PDF for the Bruschetta Pork Pasta recipe.
+    Build the flowables for one recipe.
     
     Args:
         recipe_data (Dict): Complete recipe information
-        output_filename (str): Filename for the PDF
-    """
-    # Register fonts
-    # register_fonts()
-    
-    # Prepare styles
-    styles = get_advanced_styles()
-    
-    # PDF Document Setup
-    doc = SimpleDocTemplate(
-        output_filename, 
-        pagesize=letter, 
-        rightMargin=72, 
-        leftMargin=72, 
-        topMargin=72, 
-        bottomMargin=18
-    )
+        styles (Dict): Dictionary of paragraph styles
+        chart_backend (str): "vector" draws the nutrition chart natively in the PDF,
+            "raster" embeds the 300-dpi matplotlib PNG from an in-memory buffer
     
+    Returns:
+        List of flowables for the recipe
+    """
     elements = []
     
     
@@ -276,11 +350,16 @@ def create_recipe_pdf(recipe_data: Dict[str, Any], output_filename: str ):
     elements.append(Paragraph("Nutritional Insights", styles["heading"]))
     
     # Create and add nutritional pie chart
-    chart_path = create_nutritional_pie_chart(recipe_data['nutrients'])
-    if chart_path:
-        chart_image = Image(chart_path, width=6*inch, height=4.5*inch)
-        chart_image.hAlign = 'CENTER'
-        elements.append(chart_image)
+    if chart_backend == "raster":
+        chart_buffer = get_chart_png(recipe_data['nutrients'])
+        if chart_buffer:
+            chart_image = Image(chart_buffer, width=6*inch, height=4.5*inch)
+            chart_image.hAlign = 'CENTER'
+            elements.append(chart_image)
+    else:
+        chart_drawing = create_nutritional_pie_drawing(recipe_data['nutrients'])
+        if chart_drawing:
+            elements.append(chart_drawing)
     
     # Dietary Information
     if recipe_data.get('diet'):
@@ -305,7 +384,139 @@ def create_recipe_pdf(recipe_data: Dict[str, Any], output_filename: str ):
             ('BACKGROUND', (0, 1), (0, -1), colors.beige),
         ]))
         elements.append(diet_table)
+
+    return elements
+
+
+@traced("pdf_build")
+def render_recipe_pdf(recipe_data: Dict[str, Any], output: BinaryIO, chart_backend: str = "vector",
+                      styles: Optional[Dict] = None) -> None:
+    """
+    Render a recipe PDF into a binary stream.
+    
+    Every intermediate asset stays in memory and each call uses its own
+    document, styles and chart objects, so this is safe to call from many
+    threads or processes at once. The stream can be a file, a BytesIO or a
+    web response body.
+    
+    Args:
+        recipe_data (Dict): Complete recipe information
+        output (BinaryIO): Writable binary stream receiving the PDF
+        chart_backend (str): "vector" or "raster", see build_recipe_elements
+        styles (Dict): Prebuilt paragraph styles, defaults to get_advanced_styles()
+    """
+    # Register fonts
+    # register_fonts()
+    
+    # Prepare styles
+    styles = styles or get_advanced_styles()
+    
+    # PDF Document Setup
+    doc = SimpleDocTemplate(
+        output, 
+        pagesize=letter, 
+        rightMargin=72, 
+        leftMargin=72, 
+        topMargin=72, 
+        bottomMargin=18
+    )
     
     # Build PDF
-    doc.build(elements)
+    doc.build(build_recipe_elements(recipe_data, styles, chart_backend))
+
+
+def render_recipe_pdf_bytes(recipe_data: Dict[str, Any], chart_backend: str = "vector",
+                            styles: Optional[Dict] = None) -> bytes:
+    """
+    Render a recipe PDF entirely in memory.
+    
+    Args:
+        recipe_data (Dict): Complete recipe information
+        chart_backend (str): "vector" or "raster", see build_recipe_elements
+        styles (Dict): Prebuilt paragraph styles, defaults to get_advanced_styles()
+    
+    Returns:
+        bytes: The PDF document
+    """
+    buffer = io.BytesIO()
+    render_recipe_pdf(recipe_data, buffer, chart_backend, styles)
+    return buffer.getvalue()
+
+
+def styles_fingerprint(styles: Optional[Dict] = None) -> Dict[str, Dict[str, str]]:
+    """
+    Describe paragraph styles by their resolved attributes, for artifact cache keys.
+
+    Args:
+        styles (Dict): Paragraph styles by name, defaults to get_advanced_styles()
+
+    Returns:
+        Dict: Each style's attributes, inherited ones included, as reprs
+    """
+    if styles is None:
+        return _default_styles_fingerprint()
+    return {
+        name: {attribute: repr(getattr(style, attribute, None)) for attribute in sorted(style.defaults)}
+        for name, style in styles.items()
+    }
+
+
+@functools.lru_cache(maxsize=1)
+def _default_styles_fingerprint() -> Dict[str, Dict[str, str]]:
+    return styles_fingerprint(get_advanced_styles())
+
+
+@traced("pdf")
+def get_recipe_pdf(recipe_data: Dict[str, Any], chart_backend: str = "vector",
+                   styles: Optional[Dict] = None, use_cache: bool = True) -> bytes:
+    """
+    Return the PDF for a recipe, served from the artifact cache when the same recipe was rendered before.
+    
+    The cache key covers the canonicalized recipe, the chart backend, the
+    paragraph styles and the renderer version, so changing this module or
+    upgrading ReportLab or matplotlib invalidates earlier entries.
+    
+    Args:
+        recipe_data (Dict): Complete recipe information
+        chart_backend (str): "vector" or "raster", see build_recipe_elements
+        styles (Dict): Prebuilt paragraph styles, defaults to get_advanced_styles()
+        use_cache (bool): Set to False to bypass the artifact cache. The cache is also
+            bypassed when the ARTIFACT_CACHE_DISABLED env variable is set.
+    
+    Returns:
+        bytes: The PDF document
+    """
+    span = get_default_tracer().current_span()
+    if not use_cache or os.environ.get("ARTIFACT_CACHE_DISABLED"):
+        pdf = render_recipe_pdf_bytes(recipe_data, chart_backend, styles)
+        span.set("bytes_out", len(pdf))
+        return pdf
+
+    cache = get_default_artifact_cache()
+    key = artifact_key("pdf", recipe_data, chart_backend=chart_backend, styles=styles_fingerprint(styles))
+    cached = cache.get(key, "pdf")
+    if cached is not None:
+        logger.info("Rendered PDF cache hit")
+        span.set("bytes_out", len(cached))
+        return cached
+
+    pdf = render_recipe_pdf_bytes(recipe_data, chart_backend, styles)
+    span.set("bytes_out", len(pdf))
+    cache.set(key, "pdf", pdf)
+    return pdf
+
+
+def create_recipe_pdf(recipe_data: Dict[str, Any], output_filename: str, chart_backend: str = "vector"):
+    """
+    Generate a comprehensive PDF for the Bruschetta Pork Pasta recipe.
+    
+    Args:
+        recipe_data (Dict): Complete recipe information
+        output_filename (str): Filename for the PDF
+        chart_backend (str): "vector" draws the nutrition chart natively in the PDF,
+            "raster" embeds the 300-dpi matplotlib PNG
+    """
+    pdf = get_recipe_pdf(recipe_data, chart_backend)
+    with open(output_filename, 'wb') as f:
+        f.write(pdf)
     logger.info(f"PDF generated successfully: {output_filename}")
@@ -1,19 +1,41 @@
 import os
 import logging
-import requests
-from dotenv import load_dotenv
-from functools import lru_cache
-from typing import Optional, List, Dict, Any
+from typing import Optional, List, Dict, Any, Callable, Union
+from concurrent.futures import TimeoutError as FutureTimeout
 from prompt import (
     extract_user_prompt,
     extract_system_prompt,
     recipe_user_prompt,
     recipe_system_prompt,
 )
-from utility import get_completion, xml_extract_ingredients, parse_recipe
-
-# Load environment variables
-load_dotenv()
+from utility import (
+    get_completion,
+    get_completion_stream,
+    completion_request,
+    xml_extract_ingredients,
+    parse_recipe,
+    recipe_from_info,
+    RecipeStreamParser,
+)
+from http_client import SpoonacularClient, get_default_client
+from result_cache import ResultCache, default_result_cache, normalize_query
+from bulk_resolver import BulkInfoResolver
+from recipe_index import RecipeIndex, get_default_index
+from ingredient_extractor import IngredientExtractor, get_default_extractor
+from instrumentation import get_default_tracer, traced
+from completion_cache import completion_key
+from single_flight import coalesce
+from spoonacular_quota import QuotaExhausted
+from cassette import CassetteMiss
+from deadline import (
+    Deadline,
+    DeadlineExceeded,
+    current_deadline,
+    deadline_scope,
+    stage_deadline,
+    check_deadline,
+    deadline_timeout,
+)
 
 # Configure logging
 logging.basicConfig(
@@ -25,8 +47,25 @@ logger = logging.getLogger(__name__)
 RECIPE_API = os.getenv("spoonacular_API")
 
 class RecipeFinder:
-    def __init__(self, user_query: str):
+    def __init__(
+        self,
+        user_query: str,
+        client: Optional[SpoonacularClient] = None,
+        cache: Optional[ResultCache] = None,
+        info_resolver: Optional[BulkInfoResolver] = None,
+        recipe_index: Optional[RecipeIndex] = None,
+        extractor: Optional[IngredientExtractor] = None,
+        on_section: Optional[Callable[[str, Any], None]] = None,
+        deadline: Optional[Union[float, Deadline]] = None,
+    ):
         self.user_query = user_query
+        self.deadline = deadline
+        self.client = client or self._default_client()
+        self.cache = cache if cache is not None else default_result_cache
+        self.info_resolver = info_resolver
+        self.recipe_index = recipe_index if recipe_index is not None else get_default_index()
+        self.extractor = extractor or get_default_extractor()
+        self.on_section = on_section
         self.diet: Optional[Dict[str, Any]] = None
         self.title: Optional[str] = None
         self.image: Optional[str] = None
@@ -34,12 +73,40 @@ class RecipeFinder:
         self.ingredients: Optional[str] = None
         self.recipe_id: Optional[int] = None
         self.nutrients: Optional[List[Dict[str, Any]]] = None
+        self.recipe_info: Optional[Dict[str, Any]] = None
+        self.ingredients_info: Optional[Dict[str, List[str]]] = None
+
+    def _default_client(self) -> Optional[SpoonacularClient]:
+        return get_default_client()
+
+    def _request_deadline(self) -> Optional[Deadline]:
+        """The finder's own deadline, started now, or the caller's current one."""
+        if self.deadline is None:
+            return current_deadline()
+        if isinstance(self.deadline, Deadline):
+            return self.deadline
+        return Deadline(self.deadline)
 
-    @lru_cache(maxsize=1000)
+    @traced("recipe")
     def __call__(self) -> Optional[Dict[str, Any]]:
-        self.extract_ingredients()
-        recipe = self.extract_recipe()
-        print(recipe)
+        get_default_tracer().current_span().set("query", self.user_query)
+        with deadline_scope(self._request_deadline()):
+            try:
+                return self._run()
+            except DeadlineExceeded as e:
+                get_default_tracer().current_span().set("deadline_exceeded", e.stage)
+                logger.error(f"{e}, falling back to a partial recipe.")
+                return self.partial_result()
+
+    def _run(self) -> Optional[Dict[str, Any]]:
+        cache_key = normalize_query(self.user_query)
+        if self.load_cached(cache_key):
+            return self.recipe_data
+
+        with stage_deadline("extraction"):
+            self.extract_ingredients()
+        with stage_deadline("search"):
+            recipe = self.extract_recipe()
         if not recipe:
             logger.error("No recipe found.")
             return None
@@ -48,7 +115,8 @@ class RecipeFinder:
         self.title = recipe[0].get("title")
         self.image = recipe[0].get("image")
 
-        recipe_info = self.extract_recipe_info()
+        with stage_deadline("info"):
+            recipe_info = self.recipe_info = self.extract_recipe_info()
         if not recipe_info:
             logger.error("Failed to fetch recipe info.")
             return None
@@ -59,15 +127,59 @@ class RecipeFinder:
         
         summary = recipe_info.get("summary", "")
         instructions = recipe_info.get("instructions", "")
-        self.recipe_data = parse_recipe(
-            self.generate_full_instruction(summary, self.ingredients_info, instructions)
-        )
+        with stage_deadline("rewrite"):
+            self.recipe_data = parse_recipe(
+                self.generate_full_instruction(summary, self.ingredients_info, instructions)
+            )
 
         self.enrich_recipe()
 
+        if self.recipe_data:
+            self.cache.set(cache_key, self.recipe_data)
+        return self.recipe_data
+
+    def load_cached(self, cache_key: str) -> bool:
+        """
+        Populate the finder from the result cache.
+
+        Args:
+            cache_key (str): The normalized user query.
+
+        Returns:
+            bool: True if a cached result was found.
+        """
+        cached = self.cache.get(cache_key)
+        if cached is None:
+            return False
+        logger.info("Serving recipe from the result cache.")
+        self.recipe_data = cached
+        self.title = cached.get("title")
+        self.image = cached.get("image")
+        self.diet = cached.get("diet")
+        self.nutrients = cached.get("nutrients")
+        return True
+
+    def partial_result(self) -> Optional[Dict[str, Any]]:
+        """
+        Build the best recipe available when the deadline cuts the pipeline short.
+
+        The recipe information, if it was fetched, stands in for the LLM
+        rewrite. Partial results are flagged with ``"partial": True`` and
+        never cached.
+
+        Returns:
+            dict: The partial recipe data, or None if no recipe was found in time.
+        """
+        if not self.recipe_info:
+            logger.error("Deadline exceeded before a recipe was found.")
+            return None
+        self.recipe_data = recipe_from_info(self.recipe_info, self.ingredients_info)
+        self.nutrients = self.extract_recipe_nutrients(self.recipe_info)
+        self.diet = self.get_diet_info(self.recipe_info)
+        self.enrich_recipe()
+        self.recipe_data["partial"] = True
         return self.recipe_data
 
-    @lru_cache(maxsize=1000)
     def construct_messages(self, user_prompt: str, system_prompt: str) -> List[Dict[str, str]]:
         """
         Construct the system and user prompts for the OpenAI API.
@@ -87,21 +199,45 @@ class RecipeFinder:
             {"role": "user", "content": user_prompt},
         ]
 
+    @traced("extract_ingredients")
     def extract_ingredients(self) -> None:
         """
         Extract ingredients from the user query.
 
         """
         logger.info("Extracting ingredients from the user query.")
+        if self.extract_ingredients_locally():
+            return
         user_prompt = extract_user_prompt.format(user_query=self.user_query)
         messages = self.construct_messages(extract_system_prompt, user_prompt)
         try:
-            self.ingredients = get_completion(messages)
+            self.ingredients = coalesce(
+                "extraction", normalize_query(self.user_query), lambda: get_completion(messages, stage="extraction")
+            )
             logger.info("Successfully extracted ingredients.")
+        except DeadlineExceeded:
+            raise
         except Exception as e:
+            check_deadline()
             logger.error(f"Error extracting ingredients: {e}")
 
+    def extract_ingredients_locally(self) -> bool:
+        """
+        Extract ingredients with the local lexicon, skipping the LLM when confident.
 
+        Returns:
+            bool: True if the local result was confident enough to use.
+        """
+        xml, confidence = self.extractor.extract_xml(self.user_query)
+        if confidence < self.extractor.min_confidence:
+            logger.info(f"Local extraction confidence {confidence:.2f} too low, using the LLM.")
+            return False
+        self.ingredients = xml
+        logger.info("Successfully extracted ingredients locally.")
+        return True
+
+
+    @traced("extract_recipe")
     def extract_recipe(self) -> Optional[List[Dict[str, Any]]]:
         """
         Fetch recipe based on extracted ingredients.
@@ -115,17 +251,27 @@ class RecipeFinder:
             return None
 
         ingredients = xml_extract_ingredients(self.ingredients)
-        url = "https://api.spoonacular.com/recipes/findByIngredients"
-        params = {"apiKey": RECIPE_API,"ingredients": ingredients, "ranking": 1, "number": 1}
+
+        if self.recipe_index is not None:
+            local = self.recipe_index.find_by_ingredients(ingredients, number=1)
+            if local:
+                logger.info("Found recipe in the local index.")
+                return local
+            logger.info("No local match, falling back to Spoonacular.")
+
+        import requests
 
         try:
-            response = requests.get(url, params=params)
-            response.raise_for_status()
-            return response.json()
-        except requests.RequestException as e:
+            return coalesce(
+                "search", normalize_query(ingredients),
+                lambda: self.client.find_by_ingredients(ingredients, number=1, ranking=1),
+            )
+        except (requests.RequestException, QuotaExhausted, CassetteMiss) as e:
+            check_deadline()
             logger.error(f"Failed to fetch recipe: {e}")
             return None
 
+    @traced("extract_recipe_info")
     def extract_recipe_info(self) -> Optional[Dict[str, Any]]:
         """
         Fetch detailed recipe information.
@@ -138,14 +284,25 @@ class RecipeFinder:
             logger.error("Recipe ID is missing.")
             return None
 
-        url = f"https://api.spoonacular.com/recipes/{self.recipe_id}/information"
-        params = {"apiKey": RECIPE_API, "includeNutrition": True}
+        if self.recipe_index is not None:
+            local = self.recipe_index.get_information(self.recipe_id)
+            if local is not None:
+                return local
+
+        import requests
 
         try:
-            response = requests.get(url, params=params)
-            response.raise_for_status()
-            return response.json()
-        except requests.RequestException as e:
+            if self.info_resolver is not None:
+                return coalesce(
+                    "info", self.recipe_id, lambda: self.info_resolver.resolve(self.recipe_id, deadline_timeout())
+                )
+            return coalesce(
+                "info", self.recipe_id, lambda: self.client.get_recipe_information(self.recipe_id, include_nutrition=True)
+            )
+        except DeadlineExceeded:
+            raise
+        except (requests.RequestException, QuotaExhausted, CassetteMiss, FutureTimeout) as e:
+            check_deadline()
             logger.error(f"Failed to fetch recipe info: {e}")
             return None
 
@@ -207,6 +364,7 @@ class RecipeFinder:
             },
         }
 
+    @traced("generate_full_instruction")
     def generate_full_instruction(self, summary: str, ingredients: Dict[str, List[str]], instructions: str) -> str:
         """
         Generate complete recipe instructions.
@@ -229,11 +387,34 @@ class RecipeFinder:
         )
         messages = self.construct_messages(recipe_system_prompt, user_prompt)
         try:
-            return get_completion(messages)
+            if self.on_section is not None:
+                return self.stream_full_instruction(messages)
+            prompt_hash = completion_key(*completion_request(messages, "rewrite"))
+            return coalesce("rewrite", prompt_hash, lambda: get_completion(messages, stage="rewrite"))
+        except DeadlineExceeded:
+            raise
         except Exception as e:
+            check_deadline()
             logger.error(f"Error generating instructions: {e}")
             return ""
 
+    def stream_full_instruction(self, messages: List[Dict[str, str]]) -> str:
+        """
+        Stream the recipe rewrite, passing each completed section to ``on_section``.
+
+        Args:
+            messages (list): The rewrite prompt messages.
+
+        Returns:
+            str: The full completion text.
+        """
+        parser = RecipeStreamParser()
+        for chunk in get_completion_stream(messages, stage="rewrite"):
+            check_deadline()
+            for kind, value in parser.feed(chunk):
+                self.on_section(kind, value)
+        return parser.text
+
     def enrich_recipe(self) -> None:
         """
         Enrich the recipe data with additional information.
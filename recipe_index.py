@@ -0,0 +1,340 @@
+import os
+import re
+import json
+import math
+import heapq
+import bisect
+import threading
+import logging
+from array import array
+from collections import Counter
+from itertools import chain, compress, repeat
+from operator import eq, ge
+from typing import Optional, Dict, Any, List, Iterable, Tuple
+
+# Configure logging
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+logger = logging.getLogger(__name__)
+
+# Share of the query's ingredients a local recipe must use to be trusted over Spoonacular
+DEFAULT_MIN_SHARE = 0.5
+# Candidate recipes scored per query before the best match found so far is returned
+DEFAULT_MAX_CANDIDATES = 512
+# Candidates taken from the posting lists at first; the chunk doubles after every miss
+FIRST_CHUNK = 64
+# Posting lists up to this many times max_candidates long in total are counted in full instead
+COUNT_FACTOR = 8
+
+
+def normalize_ingredient(name: str) -> str:
+    """
+    Normalize an ingredient name for lookups.
+
+    Lowercases, drops punctuation and reduces simple English plurals, so
+    "Tomatoes", "tomato" and "tomato," all map to the same key.
+
+    Args:
+        name (str): The ingredient name.
+
+    Returns:
+        str: The normalized name.
+    """
+    words = re.sub(r"[^a-z0-9 ]+", " ", name.lower()).split()
+    if words:
+        words[-1] = singularize(words[-1])
+    return " ".join(words)
+
+
+def singularize(word: str) -> str:
+    """
+    Reduce a simple English plural to its singular form.
+
+    Args:
+        word (str): A lowercase word.
+
+    Returns:
+        str: The singular form, or the word unchanged.
+    """
+    if len(word) <= 3 or word.endswith("ss"):
+        return word
+    if word.endswith("ies"):
+        return word[:-3] + "y"
+    if word.endswith(("oes", "ches", "shes", "xes")):
+        return word[:-2]
+    if word.endswith("s"):
+        return word[:-1]
+    return word
+
+
+class RecipeIndex:
+    """
+    In-process recipe store with an inverted ingredient index.
+
+    Recipes are ranked once by how many ingredients they need, and each
+    normalized ingredient name maps to a sorted array of the ranks of the
+    recipes using it. All posting lists therefore share one order, in
+    which an earlier recipe using as many query ingredients as a later one
+    misses no more others. Queries rank like Spoonacular's
+    ``findByIngredients`` with ``ranking=1``: most used ingredients first,
+    then fewest missed ones.
+    """
+
+    def __init__(self, min_share: float = DEFAULT_MIN_SHARE, max_candidates: int = DEFAULT_MAX_CANDIDATES):
+        """
+        Args:
+            min_share (float): Share of the query's ingredients a recipe must use to be returned.
+            max_candidates (int): Recipes scored per query before settling for the best match so far.
+        """
+        self.min_share = min_share
+        self.max_candidates = max_candidates
+        self._recipes: List[Dict[str, Any]] = []
+        self._positions: Dict[int, int] = {}
+        self._terms: Dict[str, int] = {}
+        self._recipe_terms: List[Tuple[int, ...]] = []
+        self._postings: Dict[int, array] = {}
+        self._order = array("I")
+        self._rank_terms: List[Tuple[int, ...]] = []
+        self._rank_sizes = array("I")
+
+    def __len__(self) -> int:
+        return len(self._recipes)
+
+    @classmethod
+    def load(cls, path: str, **kwargs) -> "RecipeIndex":
+        """
+        Build an index from a JSON dump of Spoonacular recipe information.
+
+        The dump is either a JSON array of recipes or JSON Lines with one
+        recipe per line, each carrying ``id`` and ``extendedIngredients``.
+
+        Args:
+            path (str): Path of the dump.
+
+        Returns:
+            RecipeIndex: The populated index.
+        """
+        index = cls(**kwargs)
+        with open(path, encoding="utf-8") as f:
+            if path.endswith(".jsonl"):
+                index.add_all(json.loads(line) for line in f if line.strip())
+            else:
+                index.add_all(json.load(f))
+        logger.info(f"Loaded {len(index)} recipes into the local index.")
+        return index
+
+    def add_all(self, recipes: Iterable[Dict[str, Any]]) -> None:
+        """
+        Add recipes and rebuild the posting lists.
+
+        Args:
+            recipes (iterable): Recipe information dictionaries.
+        """
+        for recipe in recipes:
+            recipe_id = recipe.get("id")
+            if recipe_id is None or recipe_id in self._positions:
+                continue
+            terms = []
+            for name in self._ingredient_names(recipe):
+                terms.append(self._terms.setdefault(name, len(self._terms)))
+            self._positions[recipe_id] = len(self._recipes)
+            self._recipes.append(recipe)
+            self._recipe_terms.append(tuple(terms))
+        self._build_postings()
+
+    def _build_postings(self) -> None:
+        self._order = array("I", sorted(range(len(self._recipe_terms)), key=lambda position: len(self._recipe_terms[position])))
+        postings: Dict[int, array] = {}
+        for rank, position in enumerate(self._order):
+            for term in self._recipe_terms[position]:
+                posting = postings.get(term)
+                if posting is None:
+                    posting = postings[term] = array("I")
+                posting.append(rank)
+        self._postings = postings
+        self._rank_terms = [self._recipe_terms[position] for position in self._order]
+        self._rank_sizes = array("I", map(len, self._rank_terms))
+
+    @staticmethod
+    def _ingredient_names(recipe: Dict[str, Any]) -> List[str]:
+        names = []
+        for ingredient in recipe.get("extendedIngredients", []):
+            name = normalize_ingredient(ingredient.get("nameClean") or ingredient.get("name") or "")
+            if name and name not in names:
+                names.append(name)
+        return names
+
+    def find_by_ingredients(self, ingredients: str, number: int = 1) -> List[Dict[str, Any]]:
+        """
+        Find recipes using the given ingredients, in ``findByIngredients`` format.
+
+        Recipes must use at least ``min_share`` of the query ingredients;
+        a query no recipe covers that well returns nothing, so the caller
+        asks Spoonacular instead. Short posting lists are counted in full.
+        Otherwise candidates are searched level by level, from recipes
+        using every query ingredient down to the minimum share, after a
+        probe of the largest recipes, which use the most ingredients,
+        shows which levels are worth the budget. A recipe using ``level``
+        of ``n`` ingredients is in one of the ``n - level + 1`` shortest
+        posting lists and has at least ``level`` ingredients, so each level
+        scores only those lists, from the first recipe that large on, and
+        stops at the first ``number`` matches. The search gives up after
+        ``max_candidates`` recipes, returning the best matches found so far.
+
+        Args:
+            ingredients (str): Comma separated ingredient list.
+            number (int): Maximum number of recipes to return.
+
+        Returns:
+            list: Matching recipes with used, missed and unused ingredient breakdowns,
+                empty if no recipe uses enough of the ingredients.
+        """
+        wanted = {}
+        for raw in ingredients.split(","):
+            name = normalize_ingredient(raw)
+            if name:
+                wanted.setdefault(name, raw.strip())
+
+        term_ids = [self._terms[name] for name in wanted if name in self._terms]
+        required = max(1, math.ceil(self.min_share * len(wanted)))
+        if len(term_ids) < required:
+            return []
+        best = self._rank(term_ids, required, number)
+        return [self._match(self._recipes[self._order[rank]], wanted) for rank in best]
+
+    def _rank(self, term_ids: List[int], required: int, number: int) -> List[int]:
+        """Return the ranks of the ``number`` best recipes using at least ``required`` of the terms."""
+        postings = sorted((self._postings[term] for term in term_ids), key=len)
+        if sum(map(len, postings)) <= self.max_candidates * COUNT_FACTOR:
+            return self._count(postings, required, number)
+        query = set(term_ids)
+        score = self._rank_terms.__getitem__
+        held: Dict[int, int] = {}
+
+        lists = postings[:len(postings) - required + 1]
+        probe = set(chain.from_iterable(posting[-(FIRST_CHUNK // len(lists) + 1):] for posting in lists))
+        for rank in probe:
+            used = len(query.intersection(score(rank)))
+            if used >= required:
+                held[rank] = used
+        top = max(held.values(), default=required)
+        budget = self.max_candidates - len(probe)
+        # Levels above the probe's best rarely match, so they share at most half the budget
+        reserve = budget // 2
+        truncated = False
+
+        for level in range(len(postings), required - 1, -1):
+            if level > top:
+                allowance = (budget - reserve) // (level - top)
+            else:
+                allowance = budget // (level - required + 1)
+            lists = postings[:len(postings) - level + 1]
+            # A recipe can't use more ingredients than it has
+            first = bisect.bisect_left(self._rank_sizes, level)
+            cursors = [bisect.bisect_left(posting, first) for posting in lists]
+            spent, found, chunk = 0, 0, FIRST_CHUNK
+            while found < number:
+                live = [i for i, posting in enumerate(lists) if cursors[i] < len(posting)]
+                if not live:
+                    break
+                if spent >= allowance:
+                    truncated = True
+                    break
+                # Every list contributes its ranks below the end of the shortest chunk
+                take = min(chunk, allowance - spent)
+                end = min(lists[i][min(cursors[i] + take, len(lists[i])) - 1] for i in live) + 1
+                slices = []
+                for i in live:
+                    stop = bisect.bisect_left(lists[i], end, cursors[i])
+                    slices.append(lists[i][cursors[i]:stop])
+                    cursors[i] = stop
+                candidates = slices[0] if len(slices) == 1 else sorted(set(chain.from_iterable(slices)))
+                spent += len(candidates)
+                chunk *= 2
+                used = map(len, map(query.intersection, map(score, candidates)))
+                for rank in compress(candidates, map(ge, used, repeat(level))):
+                    held[rank] = len(query.intersection(score(rank)))
+                    found += 1
+                    if found == number:
+                        break
+            budget -= spent
+            if found == number:
+                break
+        if truncated:
+            logger.info(f"Stopped the local index search after {self.max_candidates - budget} candidates, the match may not be the best.")
+        # Within one used count a lower rank misses no more ingredients
+        return sorted(held, key=lambda rank: (-held[rank], rank))[:number]
+
+    def _count(self, postings: List[array], required: int, number: int) -> List[int]:
+        """Rank exactly by counting every posting; cheap when the lists are short."""
+        used = Counter(chain.from_iterable(postings))
+        best: List[int] = []
+        level = len(postings)
+        while level >= required and len(best) < number:
+            ranks = compress(used.keys(), map(eq, used.values(), repeat(level)))
+            best.extend(heapq.nsmallest(number - len(best), ranks))
+            level -= 1
+        return best
+
+    def _match(self, recipe: Dict[str, Any], wanted: Dict[str, str]) -> Dict[str, Any]:
+        used, missed, matched = [], [], set()
+        for ingredient in recipe.get("extendedIngredients", []):
+            name = normalize_ingredient(ingredient.get("nameClean") or ingredient.get("name") or "")
+            entry = {"name": ingredient.get("name", name), "original": ingredient.get("original", name)}
+            if name in wanted:
+                used.append(entry)
+                matched.add(name)
+            else:
+                missed.append(entry)
+        unused = [{"name": raw, "original": raw} for name, raw in wanted.items() if name not in matched]
+        return {
+            "id": recipe.get("id"),
+            "title": recipe.get("title"),
+            "image": recipe.get("image"),
+            "usedIngredientCount": len(used),
+            "missedIngredientCount": len(missed),
+            "usedIngredients": used,
+            "missedIngredients": missed,
+            "unusedIngredients": unused,
+        }
+
+    def get_information(self, recipe_id: int) -> Optional[Dict[str, Any]]:
+        """
+        Return the stored recipe information for an id.
+
+        Args:
+            recipe_id (int): Spoonacular recipe id.
+
+        Returns:
+            Optional[dict]: The recipe information, or None if the id is not indexed.
+        """
+        position = self._positions.get(recipe_id)
+        return None if position is None else self._recipes[position]
+
+
+_default_index: Optional[RecipeIndex] = None
+_default_index_loaded = False
+_default_index_lock = threading.Lock()
+
+
+def get_default_index() -> Optional[RecipeIndex]:
+    """
+    Return the process-wide recipe index loaded from ``RECIPE_INDEX_PATH``.
+
+    ``RECIPE_INDEX_MIN_SHARE`` and ``RECIPE_INDEX_MAX_CANDIDATES`` override
+    the index's ``min_share`` and ``max_candidates``.
+
+    Returns:
+        Optional[RecipeIndex]: The shared index, or None when no dump is configured.
+    """
+    global _default_index, _default_index_loaded
+    if not _default_index_loaded:
+        with _default_index_lock:
+            if not _default_index_loaded:
+                path = os.getenv("RECIPE_INDEX_PATH")
+                _default_index = RecipeIndex.load(
+                    path,
+                    min_share=float(os.getenv("RECIPE_INDEX_MIN_SHARE", DEFAULT_MIN_SHARE)),
+                    max_candidates=int(os.getenv("RECIPE_INDEX_MAX_CANDIDATES", DEFAULT_MAX_CANDIDATES)),
+                ) if path else None
+                _default_index_loaded = True
+    return _default_index
@@ -0,0 +1,296 @@
+import os
+import time
+import logging
+import threading
+import multiprocessing
+from collections import deque
+from concurrent.futures import Future
+from multiprocessing.connection import wait
+from typing import Optional, Dict, Any, List, Iterable, Union
+
+# Configure logging
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+logger = logging.getLogger(__name__)
+
+
+class RenderError(Exception):
+    """Raised when a render worker fails a job or dies while running it."""
+
+
+def _worker_main(conn, chart_backend: str) -> None:
+    """
+    Render loop run in each worker process.
+
+    Imports, paragraph styles and the chart backend are set up once, then
+    jobs are read from the pipe until the parent sends None or goes away.
+    """
+    from para2pdf import get_advanced_styles, get_recipe_pdf
+
+    logging.disable(logging.INFO)
+    styles = get_advanced_styles()
+    if chart_backend == "raster":
+        from matplotlib.figure import Figure  # noqa: F401
+        from matplotlib.backends.backend_agg import FigureCanvasAgg  # noqa: F401
+
+    while True:
+        try:
+            job = conn.recv()
+        except (EOFError, KeyboardInterrupt):
+            return
+        if job is None:
+            return
+        job_id, recipe_data, output_path = job
+        try:
+            result = get_recipe_pdf(recipe_data, chart_backend, styles)
+            if output_path:
+                with open(output_path, "wb") as f:
+                    f.write(result)
+                result = output_path
+            conn.send((job_id, True, result))
+        except Exception as e:
+            conn.send((job_id, False, f"{type(e).__name__}: {e}"))
+
+
+class _Worker:
+    """Parent-side handle of one render process and the job it is running."""
+
+    def __init__(self, context, chart_backend: str):
+        self.conn, child_conn = context.Pipe()
+        self.process = context.Process(target=_worker_main, args=(child_conn, chart_backend), daemon=True)
+        self.process.start()
+        child_conn.close()
+        self.job_id: Optional[int] = None
+        self.deadline = 0.0
+
+    def stop(self, timeout: float = 1.0) -> None:
+        try:
+            self.conn.send(None)
+        except (OSError, ValueError):
+            pass
+        self.process.join(timeout)
+        if self.process.is_alive():
+            self.process.kill()
+            self.process.join()
+        self.conn.close()
+
+    def kill(self) -> None:
+        self.process.kill()
+        self.process.join()
+        self.conn.close()
+
+
+class RenderPool:
+    """
+    Pool of long-lived processes rendering recipe PDFs off the GIL.
+
+    Each worker imports ReportLab, builds the paragraph styles and loads the
+    chart backend once, then renders recipe dicts sent to it over a pipe. A
+    dispatcher thread hands queued jobs to idle workers, so jobs never pile
+    up behind a slow one. ``submit`` blocks once ``max_pending`` jobs are
+    queued or running. A job that exceeds its timeout has its worker killed,
+    and a worker that crashes fails only the job it was running; in both
+    cases a fresh worker takes its place.
+    """
+
+    def __init__(
+        self,
+        workers: Optional[int] = None,
+        max_pending: Optional[int] = None,
+        timeout: Optional[float] = 60.0,
+        chart_backend: str = "vector",
+        start_method: str = "spawn",
+    ):
+        """
+        Args:
+            workers (int): Number of render processes, defaults to the CPU count.
+            max_pending (int): Jobs queued or running before ``submit`` blocks,
+                defaults to twice the number of workers.
+            timeout (float): Default seconds a job may run before its worker is killed, None for no limit.
+            chart_backend (str): "vector" or "raster", see ``para2pdf.build_recipe_elements``.
+            start_method (str): multiprocessing start method for the workers.
+        """
+        self.workers = workers or os.cpu_count() or 1
+        self.timeout = timeout
+        self.chart_backend = chart_backend
+        self.completed = 0
+        self.failed = 0
+        self.restarts = 0
+        self._context = multiprocessing.get_context(start_method)
+        self._slots = threading.BoundedSemaphore(max_pending or 2 * self.workers)
+        self._queue: deque = deque()
+        self._futures: Dict[int, Future] = {}
+        self._timeouts: Dict[int, Optional[float]] = {}
+        self._next_id = 0
+        self._lock = threading.Lock()
+        self._wakeup = threading.Event()
+        self._closed = False
+        self._pool: List[_Worker] = [_Worker(self._context, chart_backend) for _ in range(self.workers)]
+        self._dispatcher = threading.Thread(target=self._dispatch, name="render-pool", daemon=True)
+        self._dispatcher.start()
+
+    def submit(
+        self,
+        recipe_data: Dict[str, Any],
+        output_path: Optional[str] = None,
+        timeout: Union[float, None, bool] = False,
+    ) -> Future:
+        """
+        Queue a recipe for rendering, blocking while the pool is at capacity.
+
+        Args:
+            recipe_data (Dict): Complete recipe information, sent to the worker by pickling.
+            output_path (str): File the worker writes the PDF to; when omitted the
+                PDF bytes are sent back instead.
+            timeout (float): Seconds this job may run, overriding the pool default.
+
+        Returns:
+            Future: Resolves to the PDF bytes, or to ``output_path`` when given.
+
+        Raises:
+            RuntimeError: If the pool has been closed.
+        """
+        if self._closed:
+            raise RuntimeError("RenderPool is closed")
+        self._slots.acquire()
+        future: Future = Future()
+        future.add_done_callback(lambda _: self._slots.release())
+        with self._lock:
+            job_id = self._next_id
+            self._next_id += 1
+            self._futures[job_id] = future
+            self._timeouts[job_id] = self.timeout if timeout is False else timeout
+            self._queue.append((job_id, recipe_data, output_path))
+        self._wakeup.set()
+        return future
+
+    def map(self, recipes: Iterable[Dict[str, Any]]) -> Iterable[bytes]:
+        """
+        Render recipes and yield their PDF bytes in input order.
+
+        Args:
+            recipes (iterable): Recipe dictionaries, consumed lazily as capacity frees up.
+
+        Yields:
+            bytes: One PDF per recipe.
+        """
+        window: deque = deque()
+        for recipe_data in recipes:
+            if len(window) >= 2 * self.workers:
+                yield window.popleft().result()
+            window.append(self.submit(recipe_data))
+        while window:
+            yield window.popleft().result()
+
+    def _dispatch(self) -> None:
+        while True:
+            # Only this thread changes the pool, so it can be read without the lock
+            for worker in self._pool:
+                if worker.job_id is None and not worker.process.is_alive():
+                    logger.error(f"Idle render worker exited with code {worker.process.exitcode}, restarting it.")
+                    worker.kill()
+                    self._swap(worker)
+            with self._lock:
+                if self._closed and not self._queue and all(w.job_id is None for w in self._pool):
+                    return
+                for worker in self._pool:
+                    if worker.job_id is None and self._queue:
+                        self._start(worker, self._queue.popleft())
+
+            busy = [worker for worker in self._pool if worker.job_id is not None]
+            if not busy:
+                self._wakeup.wait(0.1)
+                self._wakeup.clear()
+                continue
+
+            handles = [worker.conn for worker in busy] + [worker.process.sentinel for worker in busy]
+            for handle in wait(handles, timeout=0.05):
+                worker = next((w for w in busy if handle in (w.conn, w.process.sentinel)), None)
+                if worker is None or worker.job_id is None:
+                    # Already handled through its other handle
+                    continue
+                try:
+                    job_id, ok, payload = worker.conn.recv()
+                except (EOFError, OSError):
+                    worker.process.join(1)
+                    self._replace(worker, RenderError(f"Render worker exited with code {worker.process.exitcode}"))
+                    continue
+                worker.job_id = None
+                self._finish(job_id, payload if ok else RenderError(payload), ok)
+
+            now = time.monotonic()
+            for worker in busy:
+                if worker.job_id is not None and worker.deadline and now > worker.deadline:
+                    self._replace(worker, TimeoutError("Render job timed out"))
+
+    def _start(self, worker: _Worker, job) -> None:
+        job_id = job[0]
+        timeout = self._timeouts.pop(job_id, None)
+        future = self._futures.get(job_id)
+        if future is not None and not future.set_running_or_notify_cancel():
+            self._futures.pop(job_id, None)
+            return
+        try:
+            worker.conn.send(job)
+        except (OSError, ValueError) as e:
+            self._futures.pop(job_id, None)
+            self.failed += 1
+            future.set_exception(RenderError(f"Could not send job to render worker: {e}"))
+            return
+        worker.job_id = job_id
+        worker.deadline = time.monotonic() + timeout if timeout else 0.0
+
+    def _finish(self, job_id: int, result: Any, ok: bool) -> None:
+        with self._lock:
+            future = self._futures.pop(job_id, None)
+            if ok:
+                self.completed += 1
+            else:
+                self.failed += 1
+        if future is None:
+            return
+        if ok:
+            future.set_result(result)
+        else:
+            future.set_exception(result)
+
+    def _replace(self, worker: _Worker, error: Exception) -> None:
+        """Kill a crashed or hung worker, fail its job and start a fresh one in its place."""
+        job_id = worker.job_id
+        worker.job_id = None
+        logger.error(f"Render job {job_id} failed, restarting its worker: {error}")
+        worker.kill()
+        self._swap(worker)
+        self._finish(job_id, error, False)
+
+    def _swap(self, worker: _Worker) -> None:
+        """Put a fresh worker in place of a dead one."""
+        # Spawning takes hundreds of milliseconds; only the swap itself holds the lock
+        fresh = _Worker(self._context, self.chart_backend)
+        with self._lock:
+            self._pool[self._pool.index(worker)] = fresh
+            self.restarts += 1
+
+    def stats(self) -> Dict[str, int]:
+        """
+        Report job and worker counters.
+
+        Returns:
+            dict: ``completed``, ``failed``, ``restarts`` and currently ``queued`` jobs.
+        """
+        with self._lock:
+            queued = len(self._queue)
+        return {"completed": self.completed, "failed": self.failed, "restarts": self.restarts, "queued": queued}
+
+    def close(self) -> None:
+        """Finish the queued jobs and stop the worker processes."""
+        self._closed = True
+        self._wakeup.set()
+        self._dispatcher.join()
+        for worker in self._pool:
+            worker.stop()
+
+    def __enter__(self) -> "RenderPool":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
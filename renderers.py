@@ -0,0 +1,182 @@
+import json
+import logging
+from html import escape
+from typing import Dict, Any, List
+from nutrition import get_chart_data
+
+# Configure logging
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+logger = logging.getLogger(__name__)
+
+
+class Renderer:
+    """
+    Turns a recipe dict produced by ``RecipeFinder`` into an output document.
+
+    Subclasses set ``name``, ``extension`` and ``content_type`` and implement
+    ``render``. Importing this module loads only the standard library; a
+    renderer that needs a heavy dependency imports it inside ``render``.
+    """
+
+    name = ""
+    extension = ""
+    content_type = "application/octet-stream"
+
+    def render(self, recipe_data: Dict[str, Any]) -> bytes:
+        """
+        Render a recipe.
+
+        Args:
+            recipe_data (dict): Complete recipe information.
+
+        Returns:
+            bytes: The rendered document.
+        """
+        raise NotImplementedError
+
+    def write(self, recipe_data: Dict[str, Any], output_filename: str) -> None:
+        """
+        Render a recipe into a file.
+
+        Args:
+            recipe_data (dict): Complete recipe information.
+            output_filename (str): Path of the file to write.
+        """
+        data = self.render(recipe_data)
+        with open(output_filename, "wb") as f:
+            f.write(data)
+
+
+class JSONRenderer(Renderer):
+    """Structured recipe data, unchanged."""
+
+    name = "json"
+    extension = "json"
+    content_type = "application/json"
+
+    def render(self, recipe_data: Dict[str, Any]) -> bytes:
+        return json.dumps(recipe_data, ensure_ascii=False).encode("utf-8")
+
+
+class HTMLRenderer(Renderer):
+    """Self-contained HTML recipe card with inline styles and CSS nutrition bars."""
+
+    name = "html"
+    extension = "html"
+    content_type = "text/html; charset=utf-8"
+
+    STYLE = (
+        "body{font-family:Georgia,'Times New Roman',serif;color:#2C3E50;max-width:720px;margin:2em auto;padding:0 1em}"
+        "h1{font-size:1.8em;margin-bottom:.3em}h2{color:#2980B9;font-size:1.25em;margin-top:1.5em}"
+        "h3{color:#34495E;font-size:1.05em;margin-bottom:.2em}img{max-width:100%;border-radius:6px}"
+        ".bar{display:flex;align-items:center;margin:.2em 0;font-family:Helvetica,Arial,sans-serif;font-size:.9em}"
+        ".bar span{width:9em}.bar div{height:.9em;border-radius:2px}"
+        "table{border-collapse:collapse}td{padding:.25em 1em .25em 0}th{text-align:left;padding-top:.5em}"
+    )
+
+    def render(self, recipe_data: Dict[str, Any]) -> bytes:
+        parts = [
+            "<!DOCTYPE html>",
+            '<html lang="en"><head><meta charset="utf-8">',
+            f"<title>{escape(recipe_data.get('title') or 'Recipe')}</title>",
+            f"<style>{self.STYLE}</style></head><body><article>",
+            f"<h1>{escape(recipe_data.get('title') or '')}</h1>",
+        ]
+        if recipe_data.get("image"):
+            parts.append(f'<img src="{escape(recipe_data["image"])}" alt="">')
+        if recipe_data.get("summary"):
+            parts.append(f"<p>{escape(recipe_data['summary'])}</p>")
+
+        parts.append("<h2>Ingredients</h2>")
+        for category, items in (recipe_data.get("ingredients") or {}).items():
+            parts.append(f"<h3>{escape(category)}</h3>")
+            parts.append(self._list(items))
+
+        parts.append("<h2>Cooking Instructions</h2>")
+        parts.append(self._list(recipe_data.get("instructions") or [], ordered=True))
+
+        if recipe_data.get("cooking_notes"):
+            parts.append("<h2>Cooking Tips</h2>")
+            parts.append(self._list(recipe_data["cooking_notes"]))
+
+        labels, sizes, colors = get_chart_data(recipe_data.get("nutrients") or [])
+        if labels:
+            parts.append("<h2>Nutritional Insights</h2>")
+            widest = max(sizes)
+            for label, size, color in zip(labels, sizes, colors):
+                parts.append(
+                    f'<div class="bar"><span>{escape(label)}: {size:.1f}%</span>'
+                    f'<div style="width:{60 * size / widest:.1f}%;background:{color}"></div></div>'
+                )
+
+        if recipe_data.get("diet"):
+            parts.append("<h2>Dietary Information</h2><table>")
+            for section_name, section_data in recipe_data["diet"].items():
+                parts.append(f'<tr><th colspan="2">{escape(section_name)}</th></tr>')
+                for key, value in section_data.items():
+                    parts.append(f"<tr><td>{escape(str(key))}</td><td>{escape(str(value))}</td></tr>")
+            parts.append("</table>")
+
+        parts.append("</article></body></html>")
+        return "\n".join(parts).encode("utf-8")
+
+    @staticmethod
+    def _list(items: List[str], ordered: bool = False) -> str:
+        tag = "ol" if ordered else "ul"
+        return f"<{tag}>" + "".join(f"<li>{escape(item)}</li>" for item in items) + f"</{tag}>"
+
+
+class PDFRenderer(Renderer):
+    """The ReportLab recipe PDF; ReportLab and the chart backend load on first use."""
+
+    name = "pdf"
+    extension = "pdf"
+    content_type = "application/pdf"
+
+    def __init__(self, chart_backend: str = "vector"):
+        """
+        Args:
+            chart_backend (str): "vector" or "raster", see ``para2pdf.build_recipe_elements``.
+        """
+        self.chart_backend = chart_backend
+
+    def render(self, recipe_data: Dict[str, Any]) -> bytes:
+        from para2pdf import get_recipe_pdf
+
+        return get_recipe_pdf(recipe_data, self.chart_backend)
+
+
+RENDERERS: Dict[str, Renderer] = {}
+
+
+def register_renderer(renderer: Renderer) -> None:
+    """
+    Make a renderer available by its name.
+
+    Args:
+        renderer (Renderer): The renderer, replacing any registered under the same name.
+    """
+    RENDERERS[renderer.name] = renderer
+
+
+def get_renderer(fmt: str) -> Renderer:
+    """
+    Look up a renderer by format name.
+
+    Args:
+        fmt (str): Format name, e.g. "json", "html" or "pdf".
+
+    Returns:
+        Renderer: The registered renderer.
+
+    Raises:
+        ValueError: If no renderer is registered for the format.
+    """
+    try:
+        return RENDERERS[fmt]
+    except KeyError:
+        raise ValueError(f"Unknown output format {fmt!r}, expected one of {sorted(RENDERERS)}") from None
+
+
+for _renderer in (JSONRenderer(), HTMLRenderer(), PDFRenderer()):
+    register_renderer(_renderer)
@@ -0,0 +1,130 @@
+import re
+import copy
+import json
+import time
+import logging
+import threading
+from collections import OrderedDict
+from typing import Optional, Dict, Any, Tuple
+from instrumentation import get_default_tracer
+
+# Configure logging
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+logger = logging.getLogger(__name__)
+
+
+def normalize_query(user_query: str) -> str:
+    """
+    Normalize a user query so equivalent requests share a cache key.
+
+    Case and whitespace are folded, and comma separated ingredient lists are
+    sorted, so "Chicken, rice,  garlic" and "garlic, chicken, rice" match.
+
+    Args:
+        user_query (str): The raw user query.
+
+    Returns:
+        str: The normalized query.
+    """
+    query = re.sub(r"\s+", " ", user_query.strip().lower())
+    if "," in query:
+        parts = sorted(part.strip() for part in query.split(","))
+        query = ",".join(part for part in parts if part)
+    return query
+
+
+class ResultCache:
+    """
+    Thread-safe in-memory LRU cache for finished recipe results.
+
+    The cache is bounded both by number of entries and by the approximate
+    serialized size of the stored values, and entries expire after ``ttl``
+    seconds. Values are deep-copied in and out so callers can't mutate
+    what other requests will receive.
+    """
+
+    def __init__(self, max_entries: int = 1000, max_bytes: int = 32 * 1024 * 1024, ttl: Optional[float] = 3600):
+        """
+        Args:
+            max_entries (int): Maximum number of cached results.
+            max_bytes (int): Maximum total approximate size of cached results.
+            ttl (float): Seconds a result stays valid, None to never expire.
+        """
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self._bytes = 0
+        self._entries: "OrderedDict[str, Tuple[Dict[str, Any], int, float]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: str) -> Optional[Dict[str, Any]]:
+        """
+        Look up a cached result.
+
+        Args:
+            key (str): The normalized query.
+
+        Returns:
+            Optional[dict]: A copy of the cached result, or None on a miss or expired entry.
+        """
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or (self.ttl is not None and time.monotonic() - entry[2] > self.ttl):
+                if entry is not None:
+                    self._remove(key)
+                self.misses += 1
+                hit = False
+            else:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                hit = True
+                value = entry[0]
+        get_default_tracer().record_cache("result", hit)
+        return copy.deepcopy(value) if hit else None
+
+    def set(self, key: str, value: Dict[str, Any]) -> None:
+        """
+        Store a result, evicting least recently used entries when over budget.
+
+        Args:
+            key (str): The normalized query.
+            value (dict): The recipe data to cache.
+        """
+        size = len(json.dumps(value, default=str))
+        if size > self.max_bytes:
+            logger.info("Result too large to cache.")
+            return
+        value = copy.deepcopy(value)
+        with self._lock:
+            if key in self._entries:
+                self._remove(key)
+            self._entries[key] = (value, size, time.monotonic())
+            self._bytes += size
+            while len(self._entries) > self.max_entries or self._bytes > self.max_bytes:
+                self._remove(next(iter(self._entries)))
+
+    def _remove(self, key: str) -> None:
+        """Drop an entry; the caller must hold the lock."""
+        _, size, _ = self._entries.pop(key)
+        self._bytes -= size
+
+    def clear(self) -> None:
+        """Remove every cached result."""
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+
+    def stats(self) -> Dict[str, int]:
+        """
+        Report cache metrics.
+
+        Returns:
+            dict: Hit and miss counters, entry count and approximate stored bytes.
+        """
+        with self._lock:
+            return {"hits": self.hits, "misses": self.misses, "entries": len(self._entries), "bytes": self._bytes}
+
+
+default_result_cache = ResultCache()
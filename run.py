@@ -1,8 +1,24 @@
 import os
+import re
+import sys
+import csv
+import json
+import time
+import hashlib
 import logging
+import argparse
+import threading
+import uuid
 from pathlib import Path
-from para2pdf import create_recipe_pdf
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, as_completed, wait
+from typing import Iterator, Dict, Any, Optional, TextIO
+from renderers import RENDERERS, get_renderer
 from recipe_finder import RecipeFinder
+from result_cache import normalize_query
+from bulk_resolver import BulkInfoResolver
+from render_pool import RenderPool
+from instrumentation import get_default_tracer
+from spoonacular_quota import request_priority, get_default_scheduler, BATCH
 
 
 
@@ -10,7 +26,6 @@ from recipe_finder import RecipeFinder
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
 logger = logging.getLogger(__name__) 
 
-
 def main():
 
     ingredients = os.environ.get('ingredients', 'default_value')
@@ -20,7 +35,7 @@ def main():
         return f"Can't generate recipe, please provide ingredients"
     
     
-    recipe = RecipeFinder(ingredients)
+    recipe = RecipeFinder(ingredients, deadline=float(os.environ.get('RECIPE_DEADLINE', 0)) or None)
     recipe_data = recipe()
     print(recipe_data)
 
@@ -38,10 +53,245 @@ def main():
     # Define the file path within the 'output' directory
     output_file = str(output_dir / 'result.pdf')
 
-    create_recipe_pdf(recipe_data, output_file)
+    get_renderer("pdf").write(recipe_data, output_file)
 
-    
 
-if __name__ == "__main__":
-    main()    
+class RateLimiter:
+    """Space out calls so no more than ``rate`` start per second across all threads."""
+
+    def __init__(self, rate: Optional[float]):
+        self.interval = 1.0 / rate if rate else 0.0
+        self._next = time.monotonic()
+        self._lock = threading.Lock()
+
+    def acquire(self) -> None:
+        if not self.interval:
+            return
+        with self._lock:
+            now = time.monotonic()
+            start = max(now, self._next)
+            self._next = start + self.interval
+        if start > now:
+            time.sleep(start - now)
+
+
+def read_queries(stream: TextIO, fmt: str) -> Iterator[Dict[str, str]]:
+    """
+    Lazily read batch queries from a JSONL or CSV stream.
+
+    JSONL lines are either an object with an "ingredients" (and optional "id")
+    field or a bare JSON string. CSV input needs an "ingredients" column and
+    may carry an "id" column.
+
+    Args:
+        stream (TextIO): The input stream.
+        fmt (str): "jsonl" or "csv".
+
+    Yields:
+        dict: A query with "id" and "ingredients" keys.
+    """
+    if fmt == "csv":
+        rows = csv.DictReader(stream)
+    else:
+        rows = (line for line in stream if line.strip())
+
+    for row in rows:
+        if fmt != "csv":
+            try:
+                row = json.loads(row)
+            except json.JSONDecodeError as e:
+                logger.error(f"Skipping unreadable batch row: {e}: {row.strip()[:200]}")
+                continue
+        if isinstance(row, str):
+            row = {"ingredients": row}
+        if not isinstance(row, dict):
+            logger.error(f"Skipping batch row that is neither an object nor a string: {row!r}")
+            continue
+        ingredients = row.get("ingredients")
+        ingredients = ingredients.strip() if isinstance(ingredients, str) else ""
+        if not ingredients:
+            logger.error(f"Skipping batch row without ingredients: {row}")
+            continue
+        query_id = row.get("id") or hashlib.sha1(normalize_query(ingredients).encode("utf-8")).hexdigest()[:16]
+        # Ids become file names, so keep them to a safe character set
+        yield {"id": re.sub(r"[^A-Za-z0-9_.-]", "_", str(query_id)), "ingredients": ingredients}
+
+
+def generate_one(
+    query: Dict[str, str],
+    output_path: Path,
+    fmt: str,
+    limiter: RateLimiter,
+    resolver: Optional[BulkInfoResolver] = None,
+    render_pool: Optional[RenderPool] = None,
+    deadline: Optional[float] = None,
+) -> Dict[str, Any]:
+    """
+    Run the pipeline for one batch query and write its output file.
+
+    Args:
+        query (dict): The query with "id" and "ingredients" keys.
+        output_path (Path): Where to write the output.
+        fmt (str): Output format, one of the registered renderers such as "pdf", "html" or "json".
+        limiter (RateLimiter): Shared limiter for pipeline starts.
+        resolver (BulkInfoResolver): Shared resolver batching recipe info lookups.
+        render_pool (RenderPool): Worker processes to render PDFs in, None to render in this thread.
+        deadline (float): Seconds the pipeline may take before it falls back to a partial recipe, None for no limit.
+
+    Returns:
+        dict: The manifest record for this query.
+    """
+    limiter.acquire()
+    started = time.monotonic()
+    record = {"id": query["id"], "ingredients": query["ingredients"], "output": str(output_path)}
+    # Unique per call, so concurrent writers of one output never share a temp file
+    tmp_path = output_path.with_name(f"{output_path.name}.{uuid.uuid4().hex}.tmp")
+    try:
+        with request_priority(BATCH), get_default_tracer().span("query", query_id=query["id"], format=fmt):
+            recipe_data = RecipeFinder(query["ingredients"], info_resolver=resolver, deadline=deadline)()
+            if recipe_data is None:
+                raise ValueError("Can't generate recipe")
+            if recipe_data.get("partial"):
+                record["partial"] = True
+
+            # Write to a temp file first so an interrupted run never leaves a partial output to be skipped
+            if fmt == "pdf" and render_pool is not None:
+                render_pool.submit(recipe_data, str(tmp_path)).result()
+            else:
+                get_renderer(fmt).write(recipe_data, str(tmp_path))
+            os.replace(tmp_path, output_path)
+        record.update(status="ok")
+    except Exception as e:
+        logger.error(f"Batch query {query['id']} failed: {e}")
+        record.update(status="failed", error=str(e))
+        tmp_path.unlink(missing_ok=True)
+    record["seconds"] = round(time.monotonic() - started, 3)
+    return record
 
+
+def run_batch(
+    input_path: str,
+    output_dir: Path,
+    input_format: str = "jsonl",
+    output_format: str = "pdf",
+    workers: int = 4,
+    rate: Optional[float] = None,
+    manifest_path: Optional[Path] = None,
+    render_processes: int = 0,
+    metrics_path: Optional[Path] = None,
+    deadline: Optional[float] = None,
+) -> Dict[str, int]:
+    """
+    Generate one recipe output per query in a JSONL/CSV file or stdin.
+
+    Queries are streamed and at most ``2 * workers`` are in flight, so memory
+    stays flat regardless of input size. Queries whose output file already
+    exists are skipped, which makes reruns resume where they stopped, and so
+    are repeats of a query still in flight. A manifest line is appended as each query finishes.
+
+    Args:
+        input_path (str): Input file path, or "-" for stdin.
+        output_dir (Path): Directory for the generated files.
+        input_format (str): "jsonl" or "csv".
+        output_format (str): Output format, one of the registered renderers.
+        workers (int): Number of concurrent pipelines.
+        rate (float): Maximum pipeline starts per second, None for unlimited.
+        manifest_path (Path): Manifest file, defaults to ``output_dir/manifest.jsonl``.
+        render_processes (int): Render PDFs in this many worker processes, 0 to render in the pipeline threads.
+        metrics_path (Path): Write the aggregated stage metrics here in the Prometheus text format
+            when the batch finishes; enables instrumentation for the run.
+        deadline (float): Per-query pipeline deadline in seconds, None for no limit.
+
+    Returns:
+        dict: Counts of "ok", "failed" and "skipped" queries.
+    """
+    output_dir.mkdir(parents=True, exist_ok=True)
+    manifest_path = manifest_path or output_dir / "manifest.jsonl"
+    limiter = RateLimiter(rate)
+    resolver = BulkInfoResolver()
+    counts = {"ok": 0, "failed": 0, "skipped": 0}
+    render_pool = RenderPool(render_processes) if render_processes and output_format == "pdf" else None
+    tracer = get_default_tracer()
+    if metrics_path is not None:
+        tracer.enabled = True
+
+    stream = sys.stdin if input_path == "-" else open(input_path, newline="", encoding="utf-8")
+    try:
+        with open(manifest_path, "a", encoding="utf-8") as manifest, ThreadPoolExecutor(max_workers=workers) as pool:
+
+            in_flight = set()
+
+            def record(result: Dict[str, Any]) -> None:
+                if result["status"] != "skipped":
+                    in_flight.discard(result["id"])
+                counts[result["status"]] += 1
+                manifest.write(json.dumps(result, ensure_ascii=False) + "\n")
+                manifest.flush()
+
+            pending = set()
+            for query in read_queries(stream, input_format):
+                output_path = output_dir / f"{query['id']}.{get_renderer(output_format).extension}"
+                # A repeated query has the same id; it is only generated once
+                if output_path.exists() or query["id"] in in_flight:
+                    record({"id": query["id"], "ingredients": query["ingredients"],
+                            "output": str(output_path), "status": "skipped"})
+                    continue
+
+                in_flight.add(query["id"])
+                pending.add(pool.submit(
+                    generate_one, query, output_path, output_format, limiter, resolver, render_pool, deadline
+                ))
+                if len(pending) >= 2 * workers:
+                    done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                    for future in done:
+                        record(future.result())
+
+            for future in as_completed(pending):
+                record(future.result())
+    finally:
+        if stream is not sys.stdin:
+            stream.close()
+        if render_pool is not None:
+            render_pool.close()
+
+    logger.info(f"Batch finished: {counts}, info requests: {resolver.stats()}, quota: {get_default_scheduler().stats()}")
+    if metrics_path is not None:
+        metrics_path.write_text(tracer.render_prometheus(), encoding="utf-8")
+        logger.info(f"Stage metrics written to {metrics_path}")
+    return counts
+
+
+def parse_args(argv=None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Generate recipe cards from ingredients.")
+    parser.add_argument("--batch", metavar="PATH", help="Run in batch mode over a JSONL/CSV file, or '-' for stdin.")
+    parser.add_argument("--input-format", choices=["jsonl", "csv"], help="Input format, inferred from the file extension by default.")
+    parser.add_argument("--format", choices=sorted(RENDERERS), default="pdf", help="Output format per query.")
+    parser.add_argument("--output-dir", default=str(Path(__file__).parent / "output"), help="Directory for generated files.")
+    parser.add_argument("--workers", type=int, default=4, help="Number of concurrent pipelines.")
+    parser.add_argument("--rate", type=float, help="Maximum pipeline starts per second.")
+    parser.add_argument("--manifest", help="Manifest path, defaults to OUTPUT_DIR/manifest.jsonl.")
+    parser.add_argument("--render-processes", type=int, default=0, help="Render PDFs in this many worker processes.")
+    parser.add_argument("--metrics-file", help="Write aggregated stage metrics in the Prometheus text format to this path.")
+    parser.add_argument("--deadline", type=float, default=float(os.getenv("RECIPE_DEADLINE", 0)) or None,
+                        help="Seconds per query before falling back to a partial recipe, defaults to RECIPE_DEADLINE.")
+    return parser.parse_args(argv)
+
+
+if __name__ == "__main__":
+    args = parse_args()
+    if args.batch:
+        input_format = args.input_format or ("csv" if args.batch.endswith(".csv") else "jsonl")
+        run_batch(
+            args.batch,
+            Path(args.output_dir),
+            input_format=input_format,
+            output_format=args.format,
+            workers=args.workers,
+            rate=args.rate,
+            manifest_path=Path(args.manifest) if args.manifest else None,
+            render_processes=args.render_processes,
+            metrics_path=Path(args.metrics_file) if args.metrics_file else None,
+            deadline=args.deadline,
+        )
+    else:
+        main()
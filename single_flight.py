@@ -0,0 +1,217 @@
+import os
+import copy
+import asyncio
+import logging
+import threading
+import weakref
+from concurrent.futures import Future, TimeoutError as FutureTimeout
+from typing import Dict, Any, Callable, Awaitable, Hashable
+from instrumentation import get_default_tracer
+from deadline import DeadlineExceeded, current_deadline, check_deadline, deadline_timeout
+
+# Configure logging
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+logger = logging.getLogger(__name__)
+
+
+class SingleFlight:
+    """
+    Collapse concurrent identical calls into one.
+
+    The first caller for a key runs the call; callers that arrive with the
+    same key while it is in flight wait for it and receive its result, or
+    its exception, instead of issuing their own. Nothing is kept once the
+    call finishes, so this deduplicates only overlapping work; finished
+    results are the caches' job. Followers get deep copies so no caller can
+    mutate another's result.
+
+    Threaded and asyncio callers are tracked separately. Async calls are
+    shared per event loop, and a follower that is cancelled doesn't cancel
+    the shared call.
+    """
+
+    def __init__(self, name: str, copy_results: bool = True):
+        """
+        Args:
+            name (str): Name used in logs, stats and trace spans.
+            copy_results (bool): Give followers deep copies of the result.
+        """
+        self.name = name
+        self.copy_results = copy_results
+        self.calls = 0
+        self.shared = 0
+        self._lock = threading.Lock()
+        self._calls: Dict[Hashable, Future] = {}
+        self._tasks: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, Dict[Hashable, asyncio.Task]]" = (
+            weakref.WeakKeyDictionary()
+        )
+
+    def _share(self, result: Any) -> Any:
+        get_default_tracer().current_span().set("coalesced", True)
+        return copy.deepcopy(result) if self.copy_results else result
+
+    def do(self, key: Hashable, fn: Callable[[], Any]) -> Any:
+        """
+        Run ``fn`` unless an identical call is already in flight, then return its result.
+
+        Args:
+            key (Hashable): Identity of the call.
+            fn (Callable): The call to make.
+
+        Returns:
+            The result of ``fn``, from this caller's run or the shared one.
+
+        Raises:
+            DeadlineExceeded: If the current deadline passes while waiting for the shared call.
+        """
+        while True:
+            with self._lock:
+                future = self._calls.get(key)
+                leader = future is None
+                if leader:
+                    future = self._calls[key] = Future()
+                    self.calls += 1
+                else:
+                    self.shared += 1
+
+            if leader:
+                break
+            logger.info(f"Joining in-flight {self.name} call.")
+            try:
+                # Only this follower gives up; the leader keeps its own deadline
+                return self._share(future.result(deadline_timeout()))
+            except DeadlineExceeded:
+                # The leader ran out of its time, not necessarily ours; go again under our own deadline
+                check_deadline()
+            except FutureTimeout:
+                raise DeadlineExceeded(getattr(current_deadline(), "stage", None)) from None
+
+        try:
+            result = fn()
+        except BaseException as e:
+            self._forget(key)
+            future.set_exception(e)
+            raise
+        self._forget(key)
+        future.set_result(result)
+        return result
+
+    def _forget(self, key: Hashable) -> None:
+        # Before the result is published, so a retrying follower can't rejoin the finished call
+        with self._lock:
+            del self._calls[key]
+
+    async def ado(self, key: Hashable, fn: Callable[[], Awaitable[Any]]) -> Any:
+        """
+        Asynchronous counterpart of ``do``; ``fn`` returns an awaitable.
+
+        Args:
+            key (Hashable): Identity of the call.
+            fn (Callable): Returns the awaitable to run.
+
+        Returns:
+            The result of the awaitable, from this caller's run or the shared one.
+        """
+        loop = asyncio.get_running_loop()
+        # Only this loop's thread touches its task map, so no lock is needed beyond the counters
+        tasks = self._tasks.get(loop)
+        if tasks is None:
+            with self._lock:
+                tasks = self._tasks.setdefault(loop, {})
+
+        task = tasks.get(key)
+        while task is not None and not task.done():
+            with self._lock:
+                self.shared += 1
+            logger.info(f"Joining in-flight {self.name} call.")
+            try:
+                return self._share(await asyncio.shield(task))
+            except DeadlineExceeded:
+                check_deadline()
+            task = tasks.get(key)
+
+        task = loop.create_task(fn())
+        tasks[key] = task
+        task.add_done_callback(lambda done: self._task_done(tasks, key, done))
+        with self._lock:
+            self.calls += 1
+        return await asyncio.shield(task)
+
+    @staticmethod
+    def _task_done(tasks: Dict[Hashable, asyncio.Task], key: Hashable, task: asyncio.Task) -> None:
+        # A finished task that a retrying follower skipped must not evict its successor
+        if tasks.get(key) is task:
+            del tasks[key]
+        # Every caller may have stopped waiting, e.g. on a deadline; don't warn about an unretrieved error
+        if not task.cancelled():
+            task.exception()
+
+    def stats(self) -> Dict[str, int]:
+        """
+        Report deduplication metrics.
+
+        Returns:
+            dict: Calls made, calls that joined an in-flight one instead, and calls in flight.
+        """
+        with self._lock:
+            in_flight = len(self._calls) + sum(len(tasks) for tasks in self._tasks.values())
+            return {"calls": self.calls, "shared": self.shared, "in_flight": in_flight}
+
+
+_groups: Dict[str, SingleFlight] = {}
+_groups_lock = threading.Lock()
+
+
+def get_flight_group(name: str) -> SingleFlight:
+    """
+    Return the process-wide single-flight group for a pipeline stage, creating it on first use.
+
+    Args:
+        name (str): Stage name, e.g. "extraction", "search", "info" or "rewrite".
+
+    Returns:
+        SingleFlight: The shared group.
+    """
+    group = _groups.get(name)
+    if group is None:
+        with _groups_lock:
+            group = _groups.setdefault(name, SingleFlight(name))
+    return group
+
+
+def coalesce(name: str, key: Hashable, fn: Callable[[], Any]) -> Any:
+    """
+    Run ``fn`` through the stage's single-flight group.
+
+    Deduplication is bypassed when the ``SINGLE_FLIGHT_DISABLED`` env variable is set.
+
+    Args:
+        name (str): Stage name.
+        key (Hashable): Identity of the call within the stage.
+        fn (Callable): The call to make.
+
+    Returns:
+        The result of ``fn``.
+    """
+    if os.environ.get("SINGLE_FLIGHT_DISABLED"):
+        return fn()
+    return get_flight_group(name).do(key, fn)
+
+
+async def acoalesce(name: str, key: Hashable, fn: Callable[[], Awaitable[Any]]) -> Any:
+    """Asynchronous counterpart of ``coalesce``; ``fn`` returns an awaitable."""
+    if os.environ.get("SINGLE_FLIGHT_DISABLED"):
+        return await fn()
+    return await get_flight_group(name).ado(key, fn)
+
+
+def flight_stats() -> Dict[str, Dict[str, int]]:
+    """
+    Report the metrics of every single-flight group.
+
+    Returns:
+        dict: Group name to its ``stats()``.
+    """
+    with _groups_lock:
+        groups = dict(_groups)
+    return {name: group.stats() for name, group in groups.items()}
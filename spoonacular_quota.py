@@ -0,0 +1,363 @@
+import os
+import time
+import heapq
+import asyncio
+import logging
+import datetime
+import itertools
+import threading
+import contextvars
+from contextlib import contextmanager
+from typing import Optional, Dict, Any, List, Mapping
+from instrumentation import get_default_tracer
+from deadline import DeadlineExceeded, current_deadline, deadline_timeout
+
+# Configure logging
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+logger = logging.getLogger(__name__)
+
+# Request priorities; lower values are served first
+INTERACTIVE = 0
+BATCH = 10
+
+DEFAULT_RATE = 5.0
+MAX_THROTTLE_RETRIES = 3
+
+_priority: contextvars.ContextVar[int] = contextvars.ContextVar("spoonacular_priority", default=INTERACTIVE)
+
+
+class QuotaExhausted(Exception):
+    """Raised when the daily point quota can't cover a request."""
+
+
+@contextmanager
+def request_priority(priority: int):
+    """
+    Set the priority of the Spoonacular calls made in this context.
+
+    Args:
+        priority (int): ``INTERACTIVE``, ``BATCH`` or any int; lower is served first.
+    """
+    token = _priority.set(priority)
+    try:
+        yield
+    finally:
+        _priority.reset(token)
+
+
+def endpoint_cost(path: str, params: Optional[Dict[str, Any]] = None) -> float:
+    """
+    Estimate the quota points a Spoonacular request will cost.
+
+    Args:
+        path (str): Endpoint path.
+        params (dict): Query parameters.
+
+    Returns:
+        float: Points per Spoonacular's pricing: one per call, plus 0.01 per
+            search result and 0.5 per additional recipe in a bulk lookup.
+    """
+    params = params or {}
+    if path == "/recipes/findByIngredients":
+        return 1 + 0.01 * int(params.get("number", 10))
+    if path == "/recipes/informationBulk":
+        ids = [i for i in str(params.get("ids", "")).split(",") if i]
+        return 1 + 0.5 * max(0, len(ids) - 1)
+    return 1.0
+
+
+class _Waiter:
+    __slots__ = ("priority", "cost", "enqueued", "wake", "error", "cancelled", "granted")
+
+    def __init__(self, priority: int, cost: float, wake):
+        self.priority = priority
+        self.cost = cost
+        self.enqueued = time.monotonic()
+        self.wake = wake
+        self.error: Optional[BaseException] = None
+        self.cancelled = False
+        self.granted = False
+
+
+class QuotaScheduler:
+    """
+    Token-bucket rate limiter and daily point budget shared by all Spoonacular calls.
+
+    Each call takes one token from a bucket refilled at ``rate`` per second,
+    and its estimated point cost from the daily budget. The budget is
+    corrected by the ``X-API-Quota-*`` headers of every response. Calls
+    that can't go immediately queue by priority, then arrival order, and
+    a dispatcher thread releases them as tokens become available. A 429
+    response pauses the bucket for the server's ``Retry-After``, and the
+    caller queues again instead of failing. Threads block in ``acquire``
+    and coroutines await ``aacquire``; both share one queue.
+    """
+
+    def __init__(self, rate: float = DEFAULT_RATE, burst: Optional[float] = None,
+                 daily_points: Optional[float] = None):
+        """
+        Args:
+            rate (float): Requests per second, 0 or less for no rate limit.
+            burst (float): Bucket capacity, defaults to ``max(1, rate)``.
+            daily_points (float): Daily point quota, None to rely on the quota headers.
+        """
+        self.rate = rate
+        self.burst = burst if burst is not None else max(1.0, rate)
+        self.daily_points = daily_points
+        self._tokens = self.burst
+        self._refilled = time.monotonic()
+        self._paused_until = 0.0
+        self._points_left = daily_points
+        self._points_used = 0.0
+        self._day = datetime.datetime.now(datetime.timezone.utc).date()
+        self._queue: List = []
+        self._sequence = itertools.count()
+        self._cond = threading.Condition()
+        self._dispatcher: Optional[threading.Thread] = None
+        self._metrics: Dict[str, float] = {
+            "granted": 0,
+            "queued": 0,
+            "throttled": 0,
+            "max_queue_depth": 0,
+            "wait_seconds": 0.0,
+            "max_wait_seconds": 0.0,
+        }
+        self._waits_by_priority: Dict[int, List[float]] = {}
+
+    # Must be called with the condition held
+    def _roll_day(self) -> None:
+        today = datetime.datetime.now(datetime.timezone.utc).date()
+        if today != self._day:
+            # Spoonacular resets quotas at midnight UTC
+            self._day = today
+            self._points_used = 0.0
+            self._points_left = self.daily_points
+
+    def _refill(self, now: float) -> None:
+        if self.rate > 0:
+            self._tokens = min(self.burst, self._tokens + (now - self._refilled) * self.rate)
+        self._refilled = now
+
+    def _delay(self, now: float) -> float:
+        """Seconds until a token is available."""
+        if now < self._paused_until:
+            return self._paused_until - now
+        if self.rate <= 0:
+            return 0.0
+        self._refill(now)
+        return 0.0 if self._tokens >= 1 else (1 - self._tokens) / self.rate
+
+    def _take(self, cost: float) -> None:
+        self._roll_day()
+        if self._points_left is not None and self._points_left < cost:
+            raise QuotaExhausted(f"Daily Spoonacular quota exhausted: {self._points_left:.2f} points left, {cost:.2f} needed")
+        if self.rate > 0:
+            self._tokens -= 1
+        if self._points_left is not None:
+            self._points_left -= cost
+        self._points_used += cost
+
+    def _refund(self, cost: float) -> None:
+        """Give back a token and points taken for a call that was never sent."""
+        if self.rate > 0:
+            self._tokens = min(self.burst, self._tokens + 1)
+        if self._points_left is not None:
+            self._points_left += cost
+        self._points_used -= cost
+        self._cond.notify()
+
+    def _record_wait(self, priority: int, waited: float) -> None:
+        self._metrics["granted"] += 1
+        self._metrics["wait_seconds"] += waited
+        self._metrics["max_wait_seconds"] = max(self._metrics["max_wait_seconds"], waited)
+        stats = self._waits_by_priority.setdefault(priority, [0, 0.0])
+        stats[0] += 1
+        stats[1] += waited
+
+    def _enqueue(self, waiter: _Waiter) -> None:
+        heapq.heappush(self._queue, (waiter.priority, next(self._sequence), waiter))
+        self._metrics["queued"] += 1
+        self._metrics["max_queue_depth"] = max(self._metrics["max_queue_depth"], len(self._queue))
+        if self._dispatcher is None:
+            self._dispatcher = threading.Thread(target=self._dispatch, name="spoonacular-quota", daemon=True)
+            self._dispatcher.start()
+        self._cond.notify()
+
+    def _dispatch(self) -> None:
+        with self._cond:
+            while True:
+                while self._queue and self._queue[0][2].cancelled:
+                    heapq.heappop(self._queue)
+                if not self._queue:
+                    self._cond.wait()
+                    continue
+                delay = self._delay(time.monotonic())
+                if delay > 0:
+                    self._cond.wait(delay)
+                    continue
+                _, _, waiter = heapq.heappop(self._queue)
+                try:
+                    self._take(waiter.cost)
+                except QuotaExhausted as e:
+                    waiter.error = e
+                else:
+                    waiter.granted = True
+                    self._record_wait(waiter.priority, time.monotonic() - waiter.enqueued)
+                waiter.wake()
+
+    def _try_now(self, cost: float, priority: int) -> bool:
+        """Grant immediately when nothing is queued and a token is free; the caller holds the condition."""
+        if self._queue or self._delay(time.monotonic()) > 0:
+            return False
+        self._take(cost)
+        self._record_wait(priority, 0.0)
+        return True
+
+    def acquire(self, cost: float = 1.0, priority: Optional[int] = None) -> float:
+        """
+        Block until the call may be sent.
+
+        Args:
+            cost (float): Estimated quota points of the call.
+            priority (int): Queue priority, defaults to the context's ``request_priority``.
+
+        Returns:
+            float: Seconds spent waiting.
+
+        Raises:
+            QuotaExhausted: If the daily point budget can't cover the call.
+            DeadlineExceeded: If the current deadline passes while the call is queued.
+        """
+        priority = _priority.get() if priority is None else priority
+        started = time.monotonic()
+        with self._cond:
+            if self._try_now(cost, priority):
+                return 0.0
+            event = threading.Event()
+            waiter = _Waiter(priority, cost, event.set)
+            self._enqueue(waiter)
+        if not event.wait(deadline_timeout()):
+            with self._cond:
+                # The dispatcher may have granted the call while the wait timed out
+                if not event.is_set():
+                    waiter.cancelled = True
+            if waiter.cancelled:
+                raise DeadlineExceeded(getattr(current_deadline(), "stage", None))
+        return self._finish(waiter, started)
+
+    async def aacquire(self, cost: float = 1.0, priority: Optional[int] = None) -> float:
+        """Asynchronous counterpart of ``acquire``; waits without blocking the event loop."""
+        priority = _priority.get() if priority is None else priority
+        started = time.monotonic()
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+
+        def wake() -> None:
+            loop.call_soon_threadsafe(lambda: future.done() or future.set_result(None))
+
+        with self._cond:
+            if self._try_now(cost, priority):
+                return 0.0
+            waiter = _Waiter(priority, cost, wake)
+            self._enqueue(waiter)
+        try:
+            await future
+        except asyncio.CancelledError:
+            with self._cond:
+                # The dispatcher may have granted the call just as the task was cancelled
+                if waiter.granted:
+                    self._refund(cost)
+                else:
+                    waiter.cancelled = True
+            raise
+        return self._finish(waiter, started)
+
+    def _finish(self, waiter: _Waiter, started: float) -> float:
+        if waiter.error is not None:
+            raise waiter.error
+        waited = time.monotonic() - started
+        get_default_tracer().current_span().add("quota_wait_seconds", waited)
+        return waited
+
+    def observe(self, status_code: int, headers: Mapping[str, str]) -> bool:
+        """
+        Update the quota state from a Spoonacular response.
+
+        Args:
+            status_code (int): HTTP status of the response.
+            headers (Mapping): Response headers.
+
+        Returns:
+            bool: True if the call was throttled (429) and should be queued again.
+        """
+        with self._cond:
+            self._roll_day()
+            left = headers.get("X-API-Quota-Left")
+            used = headers.get("X-API-Quota-Used")
+            try:
+                if left is not None:
+                    self._points_left = float(left)
+                if used is not None:
+                    self._points_used = float(used)
+            except ValueError:
+                logger.error(f"Unreadable Spoonacular quota headers: left={left!r}, used={used!r}")
+            if status_code != 429:
+                return False
+            try:
+                retry_after = float(headers.get("Retry-After") or 1.0)
+            except ValueError:
+                retry_after = 1.0
+            self._paused_until = max(self._paused_until, time.monotonic() + retry_after)
+            self._tokens = 0.0
+            self._metrics["throttled"] += 1
+            self._cond.notify()
+        logger.info(f"Spoonacular throttled the request, pausing for {retry_after:.1f} s.")
+        return True
+
+    def stats(self) -> Dict[str, Any]:
+        """
+        Report queue and quota metrics.
+
+        Returns:
+            dict: ``queue_depth``, ``max_queue_depth``, ``granted``, ``queued``,
+                ``throttled``, ``wait_seconds``, ``max_wait_seconds``,
+                ``mean_wait_seconds`` per priority, ``points_used`` and ``points_left``.
+        """
+        with self._cond:
+            stats: Dict[str, Any] = dict(self._metrics)
+            stats["queue_depth"] = sum(1 for _, _, waiter in self._queue if not waiter.cancelled)
+            stats["mean_wait_seconds"] = {
+                priority: total / count for priority, (count, total) in sorted(self._waits_by_priority.items())
+            }
+            stats["points_used"] = self._points_used
+            stats["points_left"] = self._points_left
+        return stats
+
+
+_default_scheduler: Optional[QuotaScheduler] = None
+_default_scheduler_lock = threading.Lock()
+
+
+def get_default_scheduler() -> QuotaScheduler:
+    """
+    Return the process-wide Spoonacular quota scheduler, creating it on first use.
+
+    ``SPOONACULAR_RATE`` sets requests per second (0 disables the rate limit),
+    ``SPOONACULAR_BURST`` the bucket capacity and ``SPOONACULAR_DAILY_POINTS``
+    the daily point quota before the first response reports it.
+
+    Returns:
+        QuotaScheduler: The shared scheduler.
+    """
+    global _default_scheduler
+    if _default_scheduler is None:
+        with _default_scheduler_lock:
+            if _default_scheduler is None:
+                burst = os.getenv("SPOONACULAR_BURST")
+                points = os.getenv("SPOONACULAR_DAILY_POINTS")
+                _default_scheduler = QuotaScheduler(
+                    rate=float(os.getenv("SPOONACULAR_RATE", DEFAULT_RATE)),
+                    burst=float(burst) if burst else None,
+                    daily_points=float(points) if points else None,
+                )
+    return _default_scheduler
@@ -0,0 +1,92 @@
+import os
+
+import pytest
+
+from cassette import Cassette, CassetteMiss, FOOTER, RECORD_HEADER
+
+
+def record(path, responses):
+    with Cassette(path, "record") as cassette:
+        for query, value in responses.items():
+            cassette.record("spoonacular", {"query": query}, value, seconds=0.5)
+
+
+def strip_index(path):
+    """Cut the index and footer off an archive, as if the recording was interrupted."""
+    with open(path, "r+b") as f:
+        f.seek(-FOOTER.size, os.SEEK_END)
+        index_offset, _, _ = FOOTER.unpack(f.read(FOOTER.size))
+        f.truncate(index_offset)
+
+
+def test_replays_recorded_responses(tmp_path):
+    path = str(tmp_path / "cassette.bin")
+    record(path, {"soup": {"results": [1]}, "rice": {"results": [2]}})
+
+    with Cassette(path) as cassette:
+        assert len(cassette) == 2
+        assert cassette.replay("spoonacular", {"query": "rice"}) == {"results": [2]}
+        with pytest.raises(CassetteMiss):
+            cassette.replay("spoonacular", {"query": "pasta"})
+        assert cassette.stats() == {"mode": "replay", "entries": 2, "hits": 1, "misses": 1, "recorded": 0}
+
+
+def test_through_fetches_only_when_recording(tmp_path):
+    path = str(tmp_path / "cassette.bin")
+    with Cassette(path, "record") as cassette:
+        assert cassette.through("completion", ["hi"], lambda: "hello") == "hello"
+
+    def fail():
+        raise AssertionError("replay must not fetch")
+
+    with Cassette(path) as cassette:
+        assert cassette.through("completion", ["hi"], fail) == "hello"
+
+
+def test_replay_rejects_an_archive_without_index(tmp_path):
+    path = str(tmp_path / "cassette.bin")
+    record(path, {"soup": {"results": [1]}})
+    strip_index(path)
+
+    with pytest.raises(ValueError):
+        Cassette(path)
+
+
+def test_recording_rebuilds_a_missing_index(tmp_path):
+    path = str(tmp_path / "cassette.bin")
+    record(path, {"soup": {"results": [1]}, "rice": {"results": [2]}})
+    strip_index(path)
+
+    with Cassette(path, "record") as cassette:
+        assert len(cassette) == 2
+        cassette.record("spoonacular", {"query": "pasta"}, {"results": [3]})
+
+    with Cassette(path) as cassette:
+        assert len(cassette) == 3
+        assert cassette.replay("spoonacular", {"query": "soup"}) == {"results": [1]}
+        assert cassette.replay("spoonacular", {"query": "pasta"}) == {"results": [3]}
+
+
+def test_rebuild_drops_a_torn_final_record(tmp_path):
+    path = str(tmp_path / "cassette.bin")
+    record(path, {"soup": {"results": [1]}})
+    strip_index(path)
+    with open(path, "ab") as f:
+        f.write(RECORD_HEADER.pack(b"k" * 32, 100) + b"partial")
+
+    with Cassette(path, "record") as cassette:
+        assert len(cassette) == 1
+
+    with Cassette(path) as cassette:
+        assert cassette.replay("spoonacular", {"query": "soup"}) == {"results": [1]}
+
+
+def test_replay_sleeps_for_the_scaled_recorded_duration(tmp_path, monkeypatch):
+    path = str(tmp_path / "cassette.bin")
+    record(path, {"soup": {"results": [1]}})
+    sleeps = []
+    monkeypatch.setattr("cassette.time.sleep", sleeps.append)
+
+    with Cassette(path, latency_scale=2.0) as cassette:
+        cassette.replay("spoonacular", {"query": "soup"})
+    assert sleeps == [1.0]
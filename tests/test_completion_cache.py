@@ -0,0 +1,83 @@
+import time
+
+import pytest
+
+from completion_cache import CompletionCache, completion_key
+
+MESSAGES = [{"role": "user", "content": "Chicken and rice?"}]
+
+
+class Clock:
+    def __init__(self):
+        self.now = 1_000_000.0
+
+    def __call__(self):
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = Clock()
+    monkeypatch.setattr(time, "time", clock)
+    return clock
+
+
+def test_key_depends_on_every_request_field():
+    key = completion_key("openai:gpt-4o", 0.2, MESSAGES)
+    assert key == completion_key("openai:gpt-4o", 0.2, [dict(MESSAGES[0])])
+    assert key != completion_key("openai:gpt-4o-mini", 0.2, MESSAGES)
+    assert key != completion_key("openai:gpt-4o", 0.7, MESSAGES)
+    assert key != completion_key("openai:gpt-4o", 0.2, [{"role": "user", "content": "Soup?"}])
+
+
+def test_round_trip_survives_reopening(tmp_path):
+    path = str(tmp_path / "completions.sqlite3")
+    CompletionCache(path).set("key", "Fried rice")
+
+    cache = CompletionCache(path)
+    assert cache.get("key") == "Fried rice"
+    assert cache.get("other") is None
+    assert cache.stats() == {"hits": 1, "misses": 1, "entries": 1, "bytes": len("Fried rice")}
+
+
+def test_entries_expire_after_ttl(tmp_path, clock):
+    cache = CompletionCache(str(tmp_path / "completions.sqlite3"), ttl=60)
+    cache.set("key", "Fried rice")
+    clock.now += 59
+    assert cache.get("key") == "Fried rice"
+
+    clock.now += 2
+    assert cache.get("key") is None
+    assert cache.stats()["entries"] == 0
+
+
+def test_reads_do_not_extend_the_ttl(tmp_path, clock):
+    cache = CompletionCache(str(tmp_path / "completions.sqlite3"), ttl=60)
+    cache.set("key", "Fried rice")
+    for _ in range(3):
+        clock.now += 30
+        cache.get("key")
+    assert cache.get("key") is None
+
+
+def test_writes_purge_expired_entries(tmp_path, clock):
+    cache = CompletionCache(str(tmp_path / "completions.sqlite3"), ttl=60)
+    cache.set("old", "Fried rice")
+    clock.now += 61
+    cache.set("new", "Soup")
+    assert cache.stats()["entries"] == 1
+
+
+def test_evicts_least_recently_used_entries_over_budget(tmp_path, clock):
+    cache = CompletionCache(str(tmp_path / "completions.sqlite3"), ttl=None, max_bytes=20)
+    cache.set("a", "x" * 8)
+    clock.now += 1
+    cache.set("b", "y" * 8)
+    clock.now += 1
+    assert cache.get("a") == "x" * 8  # "b" is now the least recently used
+    clock.now += 1
+    cache.set("c", "z" * 8)
+
+    assert cache.get("b") is None
+    assert cache.get("a") == "x" * 8
+    assert cache.get("c") == "z" * 8
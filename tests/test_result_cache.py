@@ -0,0 +1,68 @@
+import time
+
+from result_cache import ResultCache, normalize_query
+
+
+def test_normalize_query_folds_case_whitespace_and_ingredient_order():
+    assert normalize_query("  Chicken, rice,  garlic ") == normalize_query("garlic,CHICKEN, rice")
+    assert normalize_query("Pasta   with  Tomatoes") == "pasta with tomatoes"
+
+
+def test_evicts_least_recently_used_entry():
+    cache = ResultCache(max_entries=2)
+    cache.set("a", {"title": "A"})
+    cache.set("b", {"title": "B"})
+    assert cache.get("a") == {"title": "A"}  # "b" is now the least recently used
+    cache.set("c", {"title": "C"})
+
+    assert cache.get("b") is None
+    assert cache.get("a") == {"title": "A"}
+    assert cache.get("c") == {"title": "C"}
+    assert cache.stats()["entries"] == 2
+
+
+def test_evicts_to_stay_under_byte_budget():
+    cache = ResultCache(max_bytes=100)
+    cache.set("a", {"text": "x" * 40})
+    cache.set("b", {"text": "y" * 40})
+
+    assert cache.get("a") is None
+    assert cache.get("b") == {"text": "y" * 40}
+    assert cache.stats()["bytes"] <= 100
+
+
+def test_skips_values_larger_than_the_budget():
+    cache = ResultCache(max_bytes=10)
+    cache.set("a", {"text": "x" * 40})
+    assert cache.get("a") is None
+    assert cache.stats()["entries"] == 0
+
+
+def test_overwriting_a_key_replaces_its_size():
+    cache = ResultCache()
+    cache.set("a", {"text": "x" * 40})
+    cache.set("a", {"text": "x"})
+    assert cache.stats()["entries"] == 1
+    assert cache.stats()["bytes"] == len('{"text": "x"}')
+
+
+def test_entries_expire_after_ttl():
+    cache = ResultCache(ttl=0.05)
+    cache.set("a", {"title": "A"})
+    assert cache.get("a") == {"title": "A"}
+    time.sleep(0.1)
+
+    assert cache.get("a") is None
+    assert cache.stats() == {"hits": 1, "misses": 1, "entries": 0, "bytes": 0}
+
+
+def test_values_are_copied_in_and_out():
+    cache = ResultCache()
+    value = {"ingredients": ["rice"]}
+    cache.set("a", value)
+    value["ingredients"].append("garlic")
+
+    first = cache.get("a")
+    assert first == {"ingredients": ["rice"]}
+    first["ingredients"].append("salt")
+    assert cache.get("a") == {"ingredients": ["rice"]}
@@ -0,0 +1,157 @@
+import time
+import asyncio
+import threading
+
+import pytest
+
+from deadline import Deadline, DeadlineExceeded, deadline_scope, check_deadline
+from single_flight import SingleFlight
+
+
+def wait_until(condition, timeout=2.0):
+    stop = time.monotonic() + timeout
+    while not condition():
+        assert time.monotonic() < stop, "condition not reached"
+        time.sleep(0.005)
+
+
+def run_in_thread(target):
+    """Start ``target`` in a thread and return a dict that receives its result or exception."""
+    outcome = {}
+
+    def run():
+        try:
+            outcome["result"] = target()
+        except BaseException as e:
+            outcome["error"] = e
+
+    thread = threading.Thread(target=run)
+    thread.start()
+    outcome["thread"] = thread
+    return outcome
+
+
+def test_follower_shares_the_leaders_call_and_gets_a_copy():
+    group = SingleFlight("test")
+    release = threading.Event()
+    calls = []
+
+    def fn():
+        calls.append(1)
+        release.wait(2)
+        return {"ingredients": ["rice"]}
+
+    leader = run_in_thread(lambda: group.do("key", fn))
+    wait_until(lambda: calls)
+    follower = run_in_thread(lambda: group.do("key", fn))
+    wait_until(lambda: group.shared == 1)
+    release.set()
+    leader["thread"].join()
+    follower["thread"].join()
+
+    assert calls == [1]
+    assert follower["result"] == leader["result"] == {"ingredients": ["rice"]}
+    assert follower["result"] is not leader["result"]
+    assert group.stats() == {"calls": 1, "shared": 1, "in_flight": 0}
+
+
+def test_follower_receives_the_leaders_exception():
+    group = SingleFlight("test")
+    release = threading.Event()
+
+    def fn():
+        release.wait(2)
+        raise ValueError("boom")
+
+    leader = run_in_thread(lambda: group.do("key", fn))
+    wait_until(lambda: group.calls == 1)
+    follower = run_in_thread(lambda: group.do("key", fn))
+    wait_until(lambda: group.shared == 1)
+    release.set()
+    leader["thread"].join()
+    follower["thread"].join()
+
+    assert isinstance(leader["error"], ValueError)
+    assert isinstance(follower["error"], ValueError)
+
+
+def test_follower_gives_up_on_its_own_deadline_without_stopping_the_leader():
+    group = SingleFlight("test")
+    release = threading.Event()
+
+    def fn():
+        release.wait(2)
+        return "done"
+
+    leader = run_in_thread(lambda: group.do("key", fn))
+    wait_until(lambda: group.calls == 1)
+
+    def follow():
+        with deadline_scope(Deadline(0.05)):
+            return group.do("key", fn)
+
+    follower = run_in_thread(follow)
+    follower["thread"].join()
+    assert isinstance(follower["error"], DeadlineExceeded)
+
+    release.set()
+    leader["thread"].join()
+    assert leader["result"] == "done"
+
+
+def test_follower_runs_the_call_itself_when_the_leader_runs_out_of_time():
+    group = SingleFlight("test")
+    calls = []
+
+    def fn():
+        calls.append(1)
+        # The first run stands in for a leader on a short deadline
+        if len(calls) == 1:
+            time.sleep(0.1)
+            check_deadline()
+        return "done"
+
+    def lead():
+        with deadline_scope(Deadline(0.05)):
+            return group.do("key", fn)
+
+    def follow():
+        with deadline_scope(Deadline(2)):
+            return group.do("key", fn)
+
+    leader = run_in_thread(lead)
+    wait_until(lambda: calls)
+    follower = run_in_thread(follow)
+    leader["thread"].join()
+    follower["thread"].join()
+
+    assert isinstance(leader["error"], DeadlineExceeded)
+    assert follower["result"] == "done"
+    assert group.shared == 1
+    assert len(calls) == 2
+
+
+def test_async_follower_cancellation_does_not_cancel_the_shared_call():
+    group = SingleFlight("test")
+    calls = []
+
+    async def fn():
+        calls.append(1)
+        await asyncio.sleep(0.05)
+        return {"title": "Soup"}
+
+    async def main():
+        leader = asyncio.ensure_future(group.ado("key", fn))
+        await asyncio.sleep(0)
+        follower = asyncio.ensure_future(group.ado("key", fn))
+        other = asyncio.ensure_future(group.ado("key", fn))
+        await asyncio.sleep(0)
+        follower.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await follower
+        return await leader, await other
+
+    leader_result, other_result = asyncio.run(main())
+    assert leader_result == other_result == {"title": "Soup"}
+    assert leader_result is not other_result
+    assert calls == [1]
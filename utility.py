@@ -1,12 +1,20 @@
 import os
+import re
+import html
+import time
+import asyncio
 import logging
-import aisuite as ai
+from typing import Iterator, List, Tuple, Any, Optional
 from dotenv import load_dotenv
 
 
-from bs4 import BeautifulSoup
 import xml.etree.ElementTree as ET
 from tenacity import retry, stop_after_attempt, wait_exponential
+from completion_cache import get_default_cache, completion_key
+from llm_client import get_default_llm_manager
+from instrumentation import get_default_tracer, traced, retry_hook
+from cassette import get_default_cassette
+from deadline import stop_before_deadline
 
 
 # Configure logging
@@ -16,42 +24,238 @@ logger = logging.getLogger(__name__)
 # Load environment variables from .env file
 load_dotenv()
 
+# Completion retries back off exponentially, and give up early rather than sleep past the request deadline
+COMPLETION_WAIT = wait_exponential(multiplier=1, min=4, max=15)
+COMPLETION_STOP = stop_after_attempt(3) | stop_before_deadline(COMPLETION_WAIT)
 
 
-@retry(stop=stop_after_attempt(3), wait=wait_exponential(multiplier=1, min=4, max=15))
-def get_completion(messages: list[dict]) -> str:
-    """ Generate a completion for the given messages and model.
+def completion_cache_enabled(use_cache: bool = True) -> bool:
+    """ Whether completions may be served from and stored in the completion cache.
+
+    The cache is skipped while a cassette is recording, since a cache hit would
+    never reach the archive and replaying the recording would then miss it.
+
+    Args:
+        use_cache (bool): The caller's choice; False always bypasses the cache.
+
+    Returns:
+        bool: True if the cache should be used.
+    """
+    if not use_cache or os.environ.get("COMPLETION_CACHE_DISABLED"):
+        return False
+    cassette = get_default_cassette()
+    return cassette is None or cassette.mode != "record"
+
+
+def get_completion(messages: list[dict], use_cache: bool = True, stage: str = "default") -> str:
+    """ Generate a completion for the given messages, serving repeats from the on-disk cache.
+    
+    Args:
+        messages (list): A list of messages, where each message is a dictionary with the following keys:
+            - role: The role of the sender of the message, e.g. "user" or "system".
+            - content: The text of the message.
+        use_cache (bool): Set to False to bypass the completion cache. The cache is also
+            bypassed when the COMPLETION_CACHE_DISABLED env variable is set or a cassette
+            is recording.
+        stage (str): Pipeline stage, e.g. "extraction" or "rewrite", selecting the model,
+            temperature and timeout.
+    
+    Returns:
+        str: The generated completion.
+    """
+    if not completion_cache_enabled(use_cache):
+        return record_completion(messages, stage)
+
+    config = get_default_llm_manager().stage(stage)
+    cache = get_default_cache()
+    key = completion_key(config.model, config.temperature, messages)
+    cached = cache.get(key)
+    if cached is not None:
+        logger.info("Completion cache hit")
+        return cached
+
+    completion = record_completion(messages, stage)
+    cache.set(key, completion)
+    return completion
+
+
+def completion_request(messages: list[dict], stage: str) -> list:
+    """ Describe a completion request for the cassette archive. """
+    config = get_default_llm_manager().stage(stage)
+    return [config.model, config.temperature, messages]
+
+
+def record_completion(messages: list[dict], stage: str = "default") -> str:
+    """ Request a completion through the record/replay cassette when one is configured.
+    
+    Args:
+        messages (list): A list of chat messages.
+        stage (str): Pipeline stage selecting the model, temperature and timeout.
+    
+    Returns:
+        str: The generated, or replayed, completion.
+    """
+    cassette = get_default_cassette()
+    if cassette is None:
+        return request_completion(messages, stage)
+    return cassette.through("completion", completion_request(messages, stage),
+                            lambda: request_completion(messages, stage))
+
+
+async def record_completion_async(messages: list[dict], stage: str = "default") -> str:
+    """ Asynchronous counterpart of record_completion. """
+    cassette = get_default_cassette()
+    if cassette is None:
+        return await request_completion_async(messages, stage)
+    return await cassette.athrough("completion", completion_request(messages, stage),
+                                   lambda: request_completion_async(messages, stage))
+
+
+@retry(stop=COMPLETION_STOP, wait=COMPLETION_WAIT, before_sleep=retry_hook("completion"))
+def request_completion(messages: list[dict], stage: str = "default") -> str:
+    """ Request a completion for the given messages from the model.
+    
+    Args:
+        messages (list): A list of messages, where each message is a dictionary with the following keys:
+            - role: The role of the sender of the message, e.g. "user" or "system".
+            - content: The text of the message.
+        stage (str): Pipeline stage selecting the model, temperature and timeout.
+    
+    Returns:
+        str: The generated completion.
+    """
+    try:
+        logger.info("Trying to get completion for messages")
+        completion = get_default_llm_manager().complete(messages, stage)
+    except Exception as e:
+        logger.error(f"Error getting completion for messages.\nException: {e}")
+        raise  # Allow @retry to handle the exception
+    else:
+        logger.info(f"successfully got completion for messages")
+        return completion
+    
+
+async def get_completion_async(messages: list[dict], use_cache: bool = True, stage: str = "default") -> str:
+    """ Asynchronous counterpart of get_completion sharing the same completion cache.
     
     Args:
         messages (list): A list of messages, where each message is a dictionary with the following keys:
             - role: The role of the sender of the message, e.g. "user" or "system".
             - content: The text of the message.
-        model (str): The model to use to generate the completion.
+        use_cache (bool): Set to False to bypass the completion cache.
+        stage (str): Pipeline stage selecting the model, temperature and timeout.
+    
+    Returns:
+        str: The generated completion.
+    """
+    if not completion_cache_enabled(use_cache):
+        return await record_completion_async(messages, stage)
+
+    config = get_default_llm_manager().stage(stage)
+    cache = get_default_cache()
+    key = completion_key(config.model, config.temperature, messages)
+    cached = await asyncio.to_thread(cache.get, key)
+    if cached is not None:
+        logger.info("Completion cache hit")
+        return cached
+
+    completion = await record_completion_async(messages, stage)
+    await asyncio.to_thread(cache.set, key, completion)
+    return completion
+
+
+@retry(stop=COMPLETION_STOP, wait=COMPLETION_WAIT, before_sleep=retry_hook("completion"))
+async def request_completion_async(messages: list[dict], stage: str = "default") -> str:
+    """ Request a completion without blocking the event loop.
+    
+    Args:
+        messages (list): A list of chat messages.
+        stage (str): Pipeline stage selecting the model, temperature and timeout.
     
     Returns:
         str: The generated completion.
     """
-    logger.info(f"Getting completion for messages:")
-    client = ai.Client()
-    client.configure({"openai" : {
-  "api_key": os.environ.get("API_KEY"),
-}})
-    response = None
-    model = "openai:gpt-4o"
     try:
         logger.info("Trying to get completion for messages")
-        response = client.chat.completions.create(
-                model=model,
-                messages=messages,
-                temperature=0.75
-            )
+        completion = await get_default_llm_manager().acomplete(messages, stage)
     except Exception as e:
         logger.error(f"Error getting completion for messages.\nException: {e}")
         raise  # Allow @retry to handle the exception
     else:
         logger.info(f"successfully got completion for messages")
-        return response.choices[0].message.content
+        return completion
+
+
+def get_completion_stream(messages: list[dict], use_cache: bool = True, stage: str = "default") -> Iterator[str]:
+    """ Stream a completion for the given messages as text chunks.
+    
+    A cached or replayed completion is yielded as a single chunk. Otherwise chunks are
+    yielded as the model produces them and the full text is cached once the
+    stream finishes. Only opening the stream is retried, since a stream that
+    already produced output can't be replayed transparently.
+    
+    Args:
+        messages (list): A list of chat messages.
+        use_cache (bool): Set to False to bypass the completion cache.
+        stage (str): Pipeline stage selecting the model, temperature and timeout.
+    
+    Yields:
+        str: Pieces of the completion in order.
+    """
+    use_cache = completion_cache_enabled(use_cache)
+    if use_cache:
+        config = get_default_llm_manager().stage(stage)
+        cache = get_default_cache()
+        key = completion_key(config.model, config.temperature, messages)
+        cached = cache.get(key)
+        if cached is not None:
+            logger.info("Completion cache hit")
+            yield cached
+            return
+
+    cassette = get_default_cassette()
+    if cassette is not None and cassette.mode == "replay":
+        completion = cassette.replay("completion", completion_request(messages, stage))
+        yield completion
+        if use_cache:
+            cache.set(key, completion)
+        return
+
+    started = time.perf_counter()
+    parts = []
+    for chunk in open_completion_stream(messages, stage):
+        if not chunk.choices:
+            continue
+        text = chunk.choices[0].delta.content
+        if text:
+            parts.append(text)
+            yield text
+    logger.info(f"successfully streamed completion for messages")
+
+    if cassette is not None:
+        cassette.record("completion", completion_request(messages, stage), "".join(parts), time.perf_counter() - started)
+    if use_cache:
+        cache.set(key, "".join(parts))
+
+
+@retry(stop=COMPLETION_STOP, wait=COMPLETION_WAIT, before_sleep=retry_hook("completion"))
+def open_completion_stream(messages: list[dict], stage: str = "default"):
+    """ Open a streaming completion request.
     
+    Args:
+        messages (list): A list of chat messages.
+        stage (str): Pipeline stage selecting the model, temperature and timeout.
+    
+    Returns:
+        An iterator of completion chunks from the provider.
+    """
+    try:
+        logger.info("Opening completion stream for messages")
+        return get_default_llm_manager().stream(messages, stage)
+    except Exception as e:
+        logger.error(f"Error opening completion stream.\nException: {e}")
+        raise  # Allow @retry to handle the exception
+
 
 def get_xml_data(xml_data: str, start_tag: str, end_tag: str) -> str:
     """ Remove any unnecessary data from the given XML data.
@@ -84,14 +288,14 @@ def xml_extract_ingredients(xml_data: str) -> str:
         str: The extracted ingredients.
     """
     logger.info(f"Extracting ingredients from XML")
-    start_tag = "<ingredient_extraction>"
-    end_tag = "</ingredient_extraction>"
-    xml_string = get_xml_data(xml_data, start_tag, end_tag)
-    root = ET.fromstring(xml_string)
+    root = parse_xml_fragment(xml_data, "ingredient_extraction")
 
     # Extract ingredients
     try:
-        ingredients = [ingredient.text for ingredient in root.findall('./ingredients/ingredient')]
+        if root is not None:
+            ingredients = [element_text(ingredient) for ingredient in root.iter('ingredient')]
+        else:
+            ingredients = lenient_find_all(get_xml_data(xml_data, "<ingredient_extraction>", "</ingredient_extraction>"), 'ingredient')
     except Exception as e:
         logger.error(f"Error extracting ingredients from XML.\nException: {e}")
         raise
@@ -100,63 +304,330 @@ def xml_extract_ingredients(xml_data: str) -> str:
         return ",".join(ingredients)
 
 
+_BARE_AMPERSAND = re.compile(r"&(?!(?:[a-zA-Z]+|#[0-9]+|#x[0-9a-fA-F]+);)")
 
-def parse_recipe(xml_content: str) -> dict:
-    """ Parse the recipe from the given XML content using BeautifulSoup.
+
+def parse_xml_fragment(text: str, root_tag: str) -> Optional[ET.Element]:
+    """ Parse the ``root_tag`` element out of model output with the C-backed expat parser.
+    
+    Text around the element (XML declaration, chatter, code fences) is
+    ignored. If the strict parse fails, bare ampersands, the most common
+    defect in LLM output, are escaped and the parse is retried once.
     
     Args:
-        xml_content(str): content in the xml format
+        text (str): The model output.
+        root_tag (str): Name of the root element to extract.
     
     Returns:
-        dict: The extracted recipe data.
+        Optional[Element]: The parsed element, or None if it is missing or still malformed.
     """
-    logging.info(f"Parsing recipe from XML")
-  
-    try: 
-        # Parse the XML content with BeautifulSoup
-        soup = BeautifulSoup(xml_content, 'xml')
-    except Exception as e:
-        logger.error(f"Error parsing XML content with BeautifulSoup.\nException: {e}")
-        return {}
+    start = text.find(f"<{root_tag}")
+    end = text.rfind(f"</{root_tag}>")
+    if start == -1 or end == -1:
+        return None
+    fragment = text[start:end + len(root_tag) + 3]
+    try:
+        return ET.fromstring(fragment)
+    except ET.ParseError:
+        pass
+    try:
+        return ET.fromstring(_BARE_AMPERSAND.sub("&amp;", fragment))
+    except ET.ParseError as e:
+        logger.error(f"Strict XML parse failed, recovering leniently.\nException: {e}")
+        return None
 
-    # Extract summary
-    summary = soup.find('summary').text.strip() if soup.find('summary') else 'No summary provided'
 
-    # Extract ingredients
-    ingredients = {}
+def element_text(element: Optional[ET.Element], default: str = '') -> str:
+    """ Return the stripped text of an element and its descendants.
     
-    for section in soup.find_all('section'):
-        section_name = section.get('name', 'Unnamed Section')
-        ingredients[section_name] = []
-        
-        for ingredient in section.find_all('ingredient'):
-            name = ingredient.find('name').text.strip() if ingredient.find('name') else "Unknown"
-            quantity = ingredient.find('quantity').text.strip() if ingredient.find('quantity') else "Unknown"
-            notes = ingredient.find('notes').text.strip() if ingredient.find('notes') else ""
-            
-            ingredients[section_name].append(f"{quantity} {name}, {notes}")
-
-    # Extract instructions
+    Args:
+        element (Element): The element, may be None.
+        default (str): Value returned when the element is missing.
+    
+    Returns:
+        str: The element text.
+    """
+    if element is None:
+        return default
+    return "".join(element.itertext()).strip()
+
+
+def format_ingredient(ingredient: ET.Element) -> str:
+    """ Format an ``<ingredient>`` element as "quantity name, notes".
+    
+    Args:
+        ingredient (Element): The ingredient element.
+    
+    Returns:
+        str: The formatted ingredient line.
+    """
+    name = element_text(ingredient.find('.//name'), "Unknown")
+    quantity = element_text(ingredient.find('.//quantity'), "Unknown")
+    notes = element_text(ingredient.find('.//notes'))
+    return f"{quantity} {name}, {notes}"
+
+
+def collect_recipe_element(element: ET.Element, recipe_data: dict) -> Optional[Tuple[str, Any]]:
+    """ Add one completed recipe element to ``recipe_data``.
+    
+    Shared by parse_recipe and RecipeStreamParser so both produce the same dict.
+    
+    Args:
+        element (Element): A fully parsed element.
+        recipe_data (dict): The recipe being built, as returned by new_recipe_data.
+    
+    Returns:
+        Optional[tuple]: The ``(kind, value)`` event for the element, or None if it isn't a recipe part.
+    """
+    tag = element.tag
+    if tag == 'summary' and recipe_data['summary'] is None:
+        recipe_data['summary'] = element_text(element)
+        return ("summary", recipe_data['summary'])
+    if tag == 'section':
+        section_name = element.get('name', 'Unnamed Section')
+        items = [format_ingredient(ingredient) for ingredient in element.iter('ingredient')]
+        recipe_data['ingredients'][section_name] = items
+        return ("section", (section_name, items))
+    if tag == 'step':
+        instruction_text = element_text(element.find('.//instruction'))
+        if instruction_text:
+            recipe_data['instructions'].append(instruction_text)
+            return ("step", instruction_text)
+    if tag == 'note':
+        note_text = element_text(element)
+        if note_text:
+            recipe_data['cooking_notes'].append(note_text)
+            return ("note", note_text)
+    return None
+
+
+def new_recipe_data() -> dict:
+    """ Return an empty recipe dict to be filled by collect_recipe_element. """
+    return {
+        'summary': None,
+        'ingredients': {},
+        'instructions': [],
+        'cooking_notes': [],
+    }
+
+
+def finish_recipe_data(recipe_data: dict) -> dict:
+    """ Fill in defaults for parts of a recipe dict that were never seen. """
+    if recipe_data['summary'] is None:
+        recipe_data['summary'] = 'No summary provided'
+    return recipe_data
+
+
+_TAG = re.compile(r"<[^>]*>")
+
+
+def lenient_find_all(text: str, tag: str) -> List[str]:
+    """ Extract the text of every ``<tag>...</tag>`` pair without a real XML parse.
+    
+    Used to recover what we can from malformed model output: nested tags are
+    stripped and entities unescaped.
+    
+    Args:
+        text (str): The malformed XML.
+        tag (str): Element name.
+    
+    Returns:
+        list: The stripped text of each match.
+    """
+    pattern = re.compile(rf"<{tag}(?:\s[^>]*)?>(.*?)</{tag}\s*>", re.DOTALL)
+    return [html.unescape(_TAG.sub("", match)).strip() for match in pattern.findall(text)]
+
+
+def lenient_parse_recipe(xml_content: str) -> dict:
+    """ Recover recipe data from malformed XML with tolerant pattern matching.
+    
+    Args:
+        xml_content(str): content in the xml format
+    
+    Returns:
+        dict: The extracted recipe data.
+    """
+    summaries = lenient_find_all(xml_content, 'summary')
+    ingredients = {}
+    section_pattern = re.compile(r"<section(\s[^>]*)?>(.*?)</section\s*>", re.DOTALL)
+    for attributes, body in section_pattern.findall(xml_content):
+        name_match = re.search(r'name\s*=\s*["\']([^"\']*)["\']', attributes or '')
+        section_name = html.unescape(name_match.group(1)) if name_match else 'Unnamed Section'
+        items = []
+        for ingredient in re.findall(r"<ingredient(?:\s[^>]*)?>(.*?)</ingredient\s*>", body, re.DOTALL):
+            name = (lenient_find_all(ingredient, 'name') or ["Unknown"])[0]
+            quantity = (lenient_find_all(ingredient, 'quantity') or ["Unknown"])[0]
+            notes = (lenient_find_all(ingredient, 'notes') or [""])[0]
+            items.append(f"{quantity} {name}, {notes}")
+        ingredients[section_name] = items
+
     instructions = []
-    for step in soup.find_all('step'):
-        instruction_text = step.find('instruction').text.strip() if step.find('instruction') else ''
+    for step in re.findall(r"<step(?:\s[^>]*)?>(.*?)</step\s*>", xml_content, re.DOTALL):
+        instruction_text = (lenient_find_all(step, 'instruction') or [''])[0]
         if instruction_text:
             instructions.append(instruction_text)
 
-    # Extract cooking notes
-    cooking_notes = []
-    for note in soup.find_all('note'):
-        note_text = note.text.strip() if note.text else ''
-        if note_text:
-            cooking_notes.append(note_text)
-
-    # Construct result
-    recipe_data = {
-        'summary': summary,
+    return {
+        'summary': summaries[0] if summaries else 'No summary provided',
         'ingredients': ingredients,
         'instructions': instructions,
-        'cooking_notes': cooking_notes
+        'cooking_notes': [note for note in lenient_find_all(xml_content, 'note') if note]
     }
 
+
+def recipe_from_info(info: dict, ingredients: Optional[dict] = None) -> dict:
+    """ Build a recipe dict straight from Spoonacular recipe information, without the LLM rewrite.
+
+    Used as the fallback when the rewrite can't finish in time; the result
+    has the same shape as ``parse_recipe``.
+
+    Args:
+        info (dict): Spoonacular recipe information.
+        ingredients (dict): Optional used/missed ingredient lists from the search result,
+            preferred over the information's ``extendedIngredients``.
+
+    Returns:
+        dict: The recipe data.
+    """
+    recipe_data = new_recipe_data()
+    summary = html.unescape(_TAG.sub("", info.get("summary") or "")).strip()
+    recipe_data['summary'] = summary or None
+
+    if ingredients and (ingredients.get("usedIngredients") or ingredients.get("missedIngredients")):
+        if ingredients.get("usedIngredients"):
+            recipe_data['ingredients']['Ingredients you have'] = list(ingredients["usedIngredients"])
+        if ingredients.get("missedIngredients"):
+            recipe_data['ingredients']['Ingredients to buy'] = list(ingredients["missedIngredients"])
+    else:
+        lines = [i.get("original") or i.get("name", "") for i in info.get("extendedIngredients", [])]
+        if lines:
+            recipe_data['ingredients']['Ingredients'] = lines
+
+    for block in info.get("analyzedInstructions") or []:
+        recipe_data['instructions'].extend(step["step"] for step in block.get("steps", []) if step.get("step"))
+    if not recipe_data['instructions']:
+        text = html.unescape(_TAG.sub("\n", info.get("instructions") or ""))
+        recipe_data['instructions'] = [line.strip() for line in text.splitlines() if line.strip()]
+    return finish_recipe_data(recipe_data)
+
+
+@traced("parse_recipe")
+def parse_recipe(xml_content: str) -> dict:
+    """ Parse the recipe from the given XML content.
+    
+    The ``<recipe>`` element is parsed strictly with expat first; only
+    malformed output goes through lenient_parse_recipe.
+    
+    Args:
+        xml_content(str): content in the xml format
+    
+    Returns:
+        dict: The extracted recipe data.
+    """
+    logging.info(f"Parsing recipe from XML")
+    get_default_tracer().current_span().set("bytes_in", len(xml_content.encode("utf-8")))
+
+    root = parse_xml_fragment(xml_content, 'recipe')
+    if root is None:
+        return lenient_parse_recipe(xml_content)
+
+    recipe_data = new_recipe_data()
+    for element in root.iter():
+        collect_recipe_element(element, recipe_data)
+
     logging.info(f"Successfully parsed recipe from XML")
-    return recipe_data
+    return finish_recipe_data(recipe_data)
+
+
+class RecipeStreamParser:
+    """ Incremental parser for the recipe XML produced by the rewrite prompt.
+    
+    Feed it completion chunks as they arrive; each call returns the sections
+    whose closing tag has been seen, so callers can render the summary, each
+    ingredient section, each step and each note while the model is still
+    generating. The final result has the same shape as ``parse_recipe``. If the stream turns out to be malformed, no further
+    events are emitted and ``close`` falls back to ``parse_recipe`` on the
+    full text.
+    
+    Events are ``(kind, value)`` tuples where kind is one of:
+        - "summary": the summary text
+        - "section": a ``(section_name, [ingredient lines])`` tuple
+        - "step": one instruction
+        - "note": one cooking note
+    """
+
+    def __init__(self):
+        self._text = []
+        self._parser = ET.XMLPullParser(events=("end",))
+        self._started = False
+        self._finished = False
+        self._failed = False
+        self._pending = ""
+        self._recipe_data = new_recipe_data()
+
+    def feed(self, chunk: str) -> List[Tuple[str, Any]]:
+        """ Consume a chunk of the completion.
+        
+        Args:
+            chunk (str): The next piece of text.
+        
+        Returns:
+            list: The events completed by this chunk.
+        """
+        self._text.append(chunk)
+        if self._failed or self._finished:
+            return []
+
+        if not self._started:
+            # Skip the XML declaration and any chatter or code fences before the root element
+            self._pending += chunk
+            start = self._pending.find("<recipe>")
+            if start == -1:
+                start = self._pending.find("<recipe ")
+            if start == -1:
+                return []
+            self._started = True
+            self._pending = self._pending[start:]
+        else:
+            self._pending += chunk
+
+        # Stop at the closing root tag, which may be split across chunks, so trailing chatter is never parsed
+        end_tag = "</recipe>"
+        end = self._pending.find(end_tag)
+        if end != -1:
+            chunk, self._pending = self._pending[:end + len(end_tag)], ""
+            self._finished = True
+        else:
+            keep = len(end_tag) - 1
+            chunk, self._pending = self._pending[:-keep], self._pending[-keep:]
+
+        try:
+            self._parser.feed(chunk)
+            return self._drain()
+        except ET.ParseError as e:
+            logger.error(f"Streaming recipe XML is malformed, deferring to the full parse.\nException: {e}")
+            self._failed = True
+            return []
+
+    def _drain(self) -> List[Tuple[str, Any]]:
+        events = []
+        for _, element in self._parser.read_events():
+            event = collect_recipe_element(element, self._recipe_data)
+            if event is not None:
+                events.append(event)
+        return events
+
+    def close(self) -> dict:
+        """ Finish parsing and return the recipe data.
+        
+        Returns:
+            dict: The extracted recipe data, as ``parse_recipe`` would return it.
+        """
+        if self._failed or not self._finished:
+            return parse_recipe("".join(self._text))
+        return finish_recipe_data(dict(self._recipe_data))
+
+    @property
+    def text(self) -> str:
+        """ The full completion text received so far. """
+        return "".join(self._text)